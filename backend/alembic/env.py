@@ -0,0 +1,113 @@
+import asyncio
+import re
+import warnings
+from logging.config import fileConfig
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from app.db.base import Base
+from app.db import models  # noqa: F401 - регистрирует таблицы в Base.metadata для autogenerate
+
+config = context.config
+
+# Логирование настраиваем только при запуске из командной строки:
+# при вызове из приложения (app.db.migrations) оно уже настроено
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    """Адрес из sqlalchemy.url (его выставляет app.db.migrations), иначе DATABASE_URL приложения."""
+    url = config.get_main_option("sqlalchemy.url")
+    if url:
+        return url
+    from app.core.config import settings
+
+    return settings.DATABASE_URL
+
+
+def for_dialect(index, dialect_name: str) -> bool:
+    """Создается ли индекс в базе этого диалекта (индексы с .ddl_if(dialect=...) - только в своем)."""
+    ddl_if = getattr(index, "_ddl_if", None)
+    if ddl_if is None or ddl_if.dialect is None:
+        return True
+    dialects = (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+    return dialect_name in dialects
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """
+    Autogenerate (alembic revision --autogenerate, alembic check) не сравнивает индексы только для
+    PostgreSQL (триграммные, префиксный по тегам, полнотекстовый), если база другого диалекта:
+    миграции их там не создают, и это не расхождение схемы.
+    """
+    if type_ == "index" and not reflected:
+        return for_dialect(obj, context.get_context().dialect.name)
+    return True
+
+
+def ignore_foreign_expression_indexes(dialect_name: str):
+    """
+    Индексы по выражению Alembic отбрасывает с предупреждением еще до include_object.
+    Для индексов чужого диалекта (ix_cards_search_document на SQLite) это предупреждение - шум.
+    """
+    for table in target_metadata.tables.values():
+        for index in table.indexes:
+            if not for_dialect(index, dialect_name):
+                message = f"autogenerate skipping metadata-specified expression-based index {repr(index.name)}"
+                warnings.filterwarnings("ignore", message=re.escape(message))
+
+
+def run_migrations_offline() -> None:
+    """Печатает SQL миграций без подключения к базе: alembic upgrade head --sql."""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    ignore_foreign_expression_indexes(connection.dialect.name)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite не умеет ALTER для большинства изменений: такие миграции пересоздают таблицу
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    # Отдельный движок без пула и без обработчиков приложения: в SQLite внешние ключи здесь выключены,
+    # иначе пересоздание таблицы в batch-миграции каскадно удалило бы зависимые строки
+    connectable = create_async_engine(database_url(), poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,92 @@
+"""Исходная схема: таблицы в том виде, в каком их создавал Base.metadata.create_all до миграций
+
+Базу, созданную старым create_all, не пересоздают, а помечают этой ревизией и обновляют:
+    alembic stamp 0001 && alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "tags",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+    )
+    op.create_index("ix_tags_id", "tags", ["id"])
+    op.create_index("ix_tags_name", "tags", ["name"], unique=True)
+
+    op.create_table(
+        "folders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_folders_id", "folders", ["id"])
+    op.create_index("ix_folders_name", "folders", ["name"])
+
+    op.create_table(
+        "card_sets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("is_public", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("folder_id", sa.Integer(), sa.ForeignKey("folders.id"), nullable=False),
+    )
+    op.create_index("ix_card_sets_id", "card_sets", ["id"])
+    op.create_index("ix_card_sets_name", "card_sets", ["name"])
+
+    op.create_table(
+        "card_set_tags",
+        sa.Column("card_set_id", sa.Integer(), sa.ForeignKey("card_sets.id"), primary_key=True),
+        sa.Column("tag_id", sa.Integer(), sa.ForeignKey("tags.id"), primary_key=True),
+    )
+
+    op.create_table(
+        "cards",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("term", sa.Text(), nullable=False),
+        sa.Column("definition", sa.Text(), nullable=False),
+        sa.Column("example", sa.Text(), nullable=True),
+        sa.Column("translation", sa.Text(), nullable=True),
+        sa.Column("order", sa.Integer(), nullable=False),
+        sa.Column("set_id", sa.Integer(), sa.ForeignKey("card_sets.id"), nullable=False),
+    )
+    op.create_index("ix_cards_id", "cards", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("cards")
+    op.drop_table("card_set_tags")
+    op.drop_table("card_sets")
+    op.drop_table("folders")
+    op.drop_table("tags")
+    op.drop_table("users")
@@ -0,0 +1,38 @@
+"""Составные индексы для списков и фильтров: cards(set_id, order, id), card_sets(folder_id, created_at, id),
+folders(owner_id, created_at, id) и обратный индекс card_set_tags(tag_id, card_set_id)
+
+На PostgreSQL индексы строятся CONCURRENTLY, без блокировки записи в таблицы.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_cards_set_id_order", "cards", ["set_id", "order", "id"]),
+    ("ix_card_sets_folder_id_created_at", "card_sets", ["folder_id", "created_at", "id"]),
+    ("ix_folders_owner_id_created_at", "folders", ["owner_id", "created_at", "id"]),
+    ("ix_card_set_tags_tag_id", "card_set_tags", ["tag_id", "card_set_id"]),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,45 @@
+"""Индексы поиска (только PostgreSQL): триграммы для названий папок и наборов,
+префиксный индекс тегов и полнотекстовый GIN-индекс карточек
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Выражения совпадают с индексами в app/db/models.py (trigram_index, card_search_document)
+INDEXES = (
+    ("ix_folders_name_trgm", "folders", "USING gin (name gin_trgm_ops)"),
+    ("ix_card_sets_name_trgm", "card_sets", "USING gin (name gin_trgm_ops)"),
+    ("ix_tags_name_prefix", "tags", "(name text_pattern_ops)"),
+    (
+        "ix_cards_search_document", "cards",
+        "USING gin (to_tsvector('simple'::regconfig, coalesce(term, '') || ' ' || "
+        "coalesce(definition, '') || ' ' || coalesce(translation, '')))",
+    ),
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, table, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name, _, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,52 @@
+"""Денормализованные счетчики и версия набора: folders.set_count, card_sets.next_order/card_count/version,
+tags.usage_count. Значения заполняются по фактическим данным
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("folders", "set_count", "0"),
+    ("card_sets", "next_order", "0"),
+    ("card_sets", "card_count", "0"),
+    ("card_sets", "version", "1"),
+    ("tags", "usage_count", "0"),
+)
+
+
+def upgrade() -> None:
+    for table, column, default in COLUMNS:
+        op.add_column(table, sa.Column(column, sa.Integer(), nullable=False, server_default=default))
+
+    # То же, что делает python -m app.db.repair_counters, плюс next_order - последний занятый Card.order
+    op.execute(
+        "UPDATE folders SET set_count = "
+        "(SELECT count(*) FROM card_sets WHERE card_sets.folder_id = folders.id)"
+    )
+    op.execute(
+        "UPDATE card_sets SET "
+        "card_count = (SELECT count(*) FROM cards WHERE cards.set_id = card_sets.id), "
+        'next_order = (SELECT coalesce(max(cards."order"), 0) FROM cards WHERE cards.set_id = card_sets.id)'
+    )
+    op.execute(
+        "UPDATE tags SET usage_count = "
+        "(SELECT count(*) FROM card_set_tags WHERE card_set_tags.tag_id = tags.id)"
+    )
+
+
+def downgrade() -> None:
+    for table, column, _ in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(column)
@@ -0,0 +1,75 @@
+"""Таблица фоновых задач jobs и ON DELETE CASCADE для карточек, связей с тегами и наборов,
+чтобы удаление набора или папки было одним DELETE
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, колонка, таблица-родитель): внешние ключи, которые получают ON DELETE CASCADE
+CASCADES = (
+    ("cards", "set_id", "card_sets"),
+    ("card_set_tags", "card_set_id", "card_sets"),
+    ("card_set_tags", "tag_id", "tags"),
+    ("card_sets", "folder_id", "folders"),
+)
+
+# Безымянные внешние ключи SQLite получают при пересоздании таблицы имена по этому шаблону
+SQLITE_NAMING = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _replace_foreign_keys(ondelete: Union[str, None]):
+    """
+    Пересоздает внешние ключи из CASCADES с нужным ondelete. На PostgreSQL у ключей имена
+    по умолчанию (<таблица>_<колонка>_fkey); SQLite не умеет ALTER CONSTRAINT, поэтому таблица пересоздается.
+    """
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table, column, parent in CASCADES:
+        name = f"{table}_{column}_fkey"
+        if sqlite:
+            with op.batch_alter_table(table, naming_convention=SQLITE_NAMING, recreate="always") as batch:
+                batch.drop_constraint(name, type_="foreignkey")
+                batch.create_foreign_key(name, parent, [column], ["id"], ondelete=ondelete)
+        else:
+            op.drop_constraint(name, table, type_="foreignkey")
+            op.create_foreign_key(name, table, parent, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("progress", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"])
+    op.create_index("ix_jobs_owner_id", "jobs", ["owner_id"])
+    op.create_index("ix_jobs_status_id", "jobs", ["status", "id"])
+
+    _replace_foreign_keys(ondelete="CASCADE")
+
+
+def downgrade() -> None:
+    _replace_foreign_keys(ondelete=None)
+    op.drop_table("jobs")
@@ -0,0 +1,36 @@
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db import replica
+from app.db.database import get_db
+from app.services import card_service
+
+
+async def get_owned_card(
+        card_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),
+):
+    """
+    Зависимость для эндпоинтов изменения карточки.
+    Одним запросом (JOIN по первичным ключам) проверяет, что карточка card_id
+    лежит в наборе, владельцем которого является текущий пользователь.
+    :return: строка (id, set_id, owner_id) карточки
+    """
+    card = await card_service.get_card_ownership(db, card_id=card_id)
+    if card is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Card not found")
+    if card.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to modify this card")
+    return card
+
+
+async def get_read_db(current_user: Principal = Depends(get_current_user)):
+    """
+    Сессия для читающих эндпоинтов: реплика, если она настроена и доступна,
+    иначе основная БД. Сразу после записи пользователь читает с основной БД.
+    """
+    session_factory = await replica.read_sessionmaker(current_user.id)
+    async with session_factory() as session:
+        yield session
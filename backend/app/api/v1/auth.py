@@ -39,78 +39,74 @@
 #
 #     return {"access_token": access_token, "token_type": "bearer"}
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from typing import Optional
+
+from fastapi import APIRouter, Cookie, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.database import AsyncSessionLocal
+from app.db.database import get_db
 from app.schemas.token import Token
 from app.services import user_service
-from app.core.security import verify_password, create_access_token, create_refresh_token
-from datetime import timedelta
+from app.core.security import create_access_token, create_refresh_token, token_claims
 
 router = APIRouter()
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
 
-@router.post("/login", response_model=Token)
-async def login_for_access_token(
-    response: Response,
-    form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db)
-):
-    user = await user_service.get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Incorrect email or password")
-    access_token = create_access_token({"sub": user.email})
-    refresh_token = create_refresh_token({"sub": user.email})
 
-    # Сохраняем refresh_token в HTTP-only cookie:
-    max_age = 60 * 60 * 24 * settings.REFRESH_TOKEN_EXPIRE_DAYS
+def _set_refresh_cookie(response: Response, refresh_token: str):
+    """Сохраняем refresh_token в HTTP-only cookie."""
     response.set_cookie(
         "refresh_token",
         refresh_token,
         httponly=True,
         secure=False,               # в продакшн включите True
         samesite="lax",
-        max_age=max_age,
+        max_age=60 * 60 * 24 * settings.REFRESH_TOKEN_EXPIRE_DAYS,
         path="/api/v1/auth/refresh"
     )
+
+
+@router.post("/login", response_model=Token)
+async def login_for_access_token(
+    response: Response,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_db)
+):
+    user = await user_service.authenticate_user(db, email=form_data.username, password=form_data.password)
+    if not user:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Incorrect email or password")
+    access_token = create_access_token(token_claims(user))
+    _set_refresh_cookie(response, create_refresh_token(token_claims(user)))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(response: Response, db: AsyncSession = Depends(get_db)):
-    from fastapi import Cookie
-    from jose import JWTError, jwt
-    from app.core.security import settings
-
-    token = response.request.cookies.get("refresh_token")
-    if not token:
+async def refresh_token(
+    response: Response,
+    refresh_cookie: Optional[str] = Cookie(None, alias="refresh_token"),
+    db: AsyncSession = Depends(get_db)
+):
+    if not refresh_cookie:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Missing refresh token")
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(refresh_cookie, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise JWTError()
     except JWTError:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid refresh token")
 
-    user = await user_service.get_user_by_email(db, email=email)
-    if not user:
+    # Refresh всегда сверяется с БД: заодно подхватываем актуальный is_active
+    user_id = payload.get("uid")
+    if user_id is not None:
+        user = await user_service.get_user_by_id(db, user_id=user_id)
+    else:
+        user = await user_service.get_user_by_email(db, email=email)
+    if not user or not user.is_active:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
 
-    new_access = create_access_token({"sub": email})
-    new_refresh = create_refresh_token({"sub": email})
+    new_access = create_access_token(token_claims(user))
     # Обновляем cookie
-    response.set_cookie(
-        "refresh_token",
-        new_refresh,
-        httponly=True,
-        secure=False,
-        samesite="lax",
-        max_age=max_age,
-        path="/api/v1/auth/refresh"
-    )
-    return {"access_token": new_access, "token_type": "bearer"}
\ No newline at end of file
+    _set_refresh_cookie(response, create_refresh_token(token_claims(user)))
+    return {"access_token": new_access, "token_type": "bearer"}
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import Response
@@ -6,27 +7,44 @@ from starlette.responses import Response
 from app.schemas.folder import FolderRead, FolderCreate, FolderUpdate
 from app.schemas.set import CardSetRead, CardSetCreate # <-- Импортируем схемы наборов
 from app.schemas.card import CardRead, CardCreate, CardReorderRequest
-from app.services import folder_service, set_service, card_service # <-- Импортируем сервис наборов
-from app.db.models import User, Folder
-from app.core.security import get_current_user, get_db
+from app.services import folder_service, set_service, card_service, export_service # <-- Импортируем сервис наборов
+from app.db.models import Folder
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db.database import get_db
+from app.api.deps import get_read_db
+from app.db import replica
+from app.core.pagination import set_next_cursor, offset_from_cursor, set_next_offset_cursor
 
 router = APIRouter()
 
 @router.get("/", response_model=List[FolderRead])
 async def read_folders(
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user),
         skip: int = 0,
         limit: int = 20,
-        search: str = Query(None, description="Search folders by name")):
+        search: str = Query(None, description="Search folders by name"),
+        cursor: Optional[str] = Query(None, description="Cursor of the next page from the X-Next-Cursor header")):
     """Получает список папок для текущего пользователя."""
-    return await folder_service.get_folders(db, user_id=current_user.id, skip=skip, limit=limit, search=search)
+    if search:
+        # Поиск ранжирован по релевантности, поэтому его курсор хранит смещение
+        skip, cursor = offset_from_cursor(cursor, skip), None
+    folders = await folder_service.get_folders(
+        db, user_id=current_user.id, skip=skip, limit=limit, search=search, cursor=cursor
+    )
+    if search:
+        set_next_offset_cursor(response, folders, limit, skip)
+    else:
+        set_next_cursor(response, folders, limit, "created_at", "id")
+    return folders
 
 @router.post("/", response_model=FolderRead, status_code=status.HTTP_201_CREATED)
 async def create_folder(
         folder: FolderCreate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
+        current_user: Principal = Depends(get_current_user)):
     """Создает новую папку для текущего пользователя."""
     return await folder_service.create_folder(db=db, folder=folder, user_id=current_user.id)
 
@@ -35,7 +53,7 @@ async def update_single_folder(
     folder_id: int,
     folder_update: FolderUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Обновляет папку по ID, если она существует и принадлежит текущему пользователю."""
 
@@ -58,7 +76,7 @@ async def update_single_folder(
 async def delete_folder(
         folder_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)):
+        current_user: Principal = Depends(get_current_user)):
     # Получение попки из БД
     folder = await folder_service.get_folder_by_id(db, folder_id)
     # Если не найдена
@@ -72,22 +90,54 @@ async def delete_folder(
     # Возвращаем 204 No Content — успешное удаление, контент не требуется
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
+@router.get("/{folder_id}/export", response_class=StreamingResponse,
+            responses={200: {"description": "CSV, JSONL or Anki package (.apkg) with the cards of all folder sets"}})
+async def export_folder(
+        folder_id: int,
+        request: Request,
+        file_format: export_service.ExportFormat = Query(export_service.ExportFormat.CSV, alias="format"),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user)):
+    """
+    Выгрузка всех наборов папки одним файлом (в чужой публичной папке - только публичные наборы).
+    Ответ потоковый, память не зависит от размера папки.
+    """
+    folder = await folder_service.get_folder_by_id(db, folder_id)
+    if not folder or (not folder.is_public and folder.owner_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Folder with ID {folder_id} not found")
+
+    session_factory = await replica.read_sessionmaker(current_user.id)
+    body = export_service.stream_folder_export(session_factory, folder_id, folder.name, current_user.id, file_format)
+    return export_service.export_response(
+        request, body, file_format, name=folder.name, fallback_name=f"folder-{folder_id}"
+    )
+
 # --- ЭНДПОИНТЫ ДЛЯ НАБОРОВ ВНУТРИ ПАПОК ---
 
 @router.get("/{folder_id}/sets", response_model=List[CardSetRead])
 async def read_sets_in_folder(
     folder_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
     skip: int = 0,
     limit: int = 20,
     search: str = Query(None, description="Search sets by name"),
-    tags: Optional[List[str]] = Query(None, description="Filter sets by tags")
+    tags: Optional[List[str]] = Query(None, description="Filter sets by tags"),
+    tag_match: set_service.TagMatch = Query(set_service.TagMatch.ANY, description="any: at least one of the tags, all: every tag"),
+    cursor: Optional[str] = Query(None, description="Cursor of the next page from the X-Next-Cursor header")
 ):
     """Получает список наборов в конкретной папке."""
-    sets = await set_service.get_sets_by_folder(db, folder_id=folder_id, user_id=current_user.id, skip=skip, limit=limit, search=search, tags=tags or [])
+    if search:
+        # Поиск ранжирован по релевантности, поэтому его курсор хранит смещение
+        skip, cursor = offset_from_cursor(cursor, skip), None
+    sets = await set_service.get_sets_by_folder(db, folder_id=folder_id, user_id=current_user.id, skip=skip, limit=limit, search=search, tags=tags or [], cursor=cursor, tag_match=tag_match)
     if sets is None:
         raise HTTPException(status_code=404, detail="Folder not found or access denied")
+    if search:
+        set_next_offset_cursor(response, sets, limit, skip)
+    else:
+        set_next_cursor(response, sets, limit, "created_at", "id")
     return sets
 
 @router.post("/{folder_id}/sets", response_model=CardSetRead, status_code=status.HTTP_201_CREATED)
@@ -95,7 +145,7 @@ async def create_new_set_in_folder(
     folder_id: int,
     card_set: CardSetCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Создает новый набор в конкретной папке."""
     created_set = await set_service.create_set_in_folder(
@@ -115,7 +165,7 @@ async def create_new_set_in_folder(
 #         set_id: int,
 #         card_data: CardCreate,
 #         db: AsyncSession = Depends(get_db),
-#         current_user: User = Depends(get_current_user),
+#         current_user: Principal = Depends(get_current_user),
 # ):
 #     """Создает новую карточку в наборе."""
 #     card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
@@ -129,7 +179,7 @@ async def create_new_set_in_folder(
 #         set_id: int,
 #         reorder_request: CardReorderRequest,
 #         db: AsyncSession = Depends(get_db),
-#         current_user: User = Depends(get_current_user),
+#         current_user: Principal = Depends(get_current_user),
 # ):
 #     """Изменяет порядок карточек в наборе."""
 #     card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Job
+from app.schemas.job import JobRead
+from app.services import job_service
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db.database import get_db
+
+router = APIRouter()
+
+
+def accepted_job_response(job: Job) -> JSONResponse:
+    """Ответ 202 для операции, ушедшей в фоновую задачу: тело - JobRead, Location - адрес статуса задачи."""
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=JobRead.model_validate(job).model_dump(mode="json"),
+        headers={"Location": f"/api/v1/jobs/{job.id}"},
+    )
+
+
+@router.get("/{job_id}", response_model=JobRead)
+async def read_job(
+        job_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Статус и прогресс фоновой задачи. Читается с основной базы: реплика может отставать от воркера."""
+    job = await job_service.get_job(db, job_id=job_id, user_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import Response
+
+from app.schemas.search import CardSearchHit
+from app.services import search_service
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.api.deps import get_read_db
+from app.core.pagination import offset_from_cursor, set_next_offset_cursor
+
+router = APIRouter()
+
+@router.get("/cards", response_model=List[CardSearchHit])
+async def search_cards(
+        response: Response,
+        q: str = Query(..., min_length=1, max_length=200, description="Words to find in term, definition or translation (3+ letters each)"),
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="Cursor of the next page from the X-Next-Cursor header"),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Полнотекстовый поиск по карточкам в своих и публичных наборах, самые релевантные первыми."""
+    # Выдача ранжирована, поэтому курсор хранит смещение
+    offset = offset_from_cursor(cursor, 0)
+    hits = await search_service.search_cards(db, user_id=current_user.id, query=q, limit=limit, offset=offset)
+    set_next_offset_cursor(response, hits, limit, offset)
+    return hits
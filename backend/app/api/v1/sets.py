@@ -1,33 +1,152 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.schemas.set import CardSetRead, CardSetUpdate
-from app.schemas.card import CardRead, CardCreate, CardReorderRequest
-from app.services import set_service, card_service
-from app.db.models import User
-from app.core.security import get_current_user, get_db
+from typing import List, Optional
+from app.schemas.set import CardSetClone, CardSetRead, CardSetUpdate
+from app.schemas.card import (
+    CardRead, CardCreate, CardReorderRequest, CardMoveRequest, CardImportResult, CardBatchRequest, CardBatchResponse,
+)
+from app.schemas.job import JobRead
+from app.services import set_service, card_service, folder_service, import_service, export_service, job_service
+from app.api.v1.jobs import accepted_job_response
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db import replica
+from app.db.database import get_db
+from app.api.deps import get_read_db
+from app.core.cache import cached_json_response, etag_for, etag_matches
+from app.core.compression import compress_stream, negotiate_encoding
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 router = APIRouter()
 
+_card_list_adapter = TypeAdapter(List[CardRead])
+
 @router.get("/{set_id}", response_model=CardSetRead)
-async def read_set(set_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Получает один набор по ID."""
-    db_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
-    if db_set is None:
+async def read_set(
+        set_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Получает один набор по ID. Поддерживает If-None-Match: без изменений отвечает 304."""
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if card_set is None:
+        raise HTTPException(status_code=404, detail="Card Set not found or access denied")
+
+    async def render():
+        db_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.TAGS)
+        return CardSetRead.model_validate(db_set).model_dump_json().encode(), {}
+
+    return await cached_json_response(request, f"set:{set_id}:v{card_set.version}", render)
+
+@router.get("/{set_id}/full", responses={200: {"description": '{"set": CardSetRead, "cards": [CardRead, ...]}'}})
+async def read_full_set(
+        set_id: int,
+        request: Request,
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user)):
+    """
+    Набор вместе со всеми карточками одним ответом - для загрузки учебной сессии.
+    Ответ собирается потоково из кортежей колонок (без ORM и Pydantic) и сжимается gzip/brotli
+    по Accept-Encoding. Поддерживает If-None-Match.
+    """
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if card_set is None:
+        raise HTTPException(status_code=404, detail="Card Set not found or access denied")
+
+    etag = etag_for(f"full:{set_id}:v{card_set.version}")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Строку набора читаем до ответа: после отправки заголовков 404 уже не вернуть
+    set_payload = await export_service.load_set_payload(db, set_id)
+    if set_payload is None:
+        raise HTTPException(status_code=404, detail="Card Set not found or access denied")
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    session_factory = await replica.read_sessionmaker(current_user.id)
+    body = compress_stream(export_service.stream_set_json(session_factory, set_payload), encoding)
+    return StreamingResponse(body, media_type="application/json", headers=headers)
+
+@router.get("/{set_id}/export", response_class=StreamingResponse,
+            responses={200: {"description": "CSV, JSONL or Anki package (.apkg) with the set's cards"}})
+async def export_set(
+        set_id: int,
+        request: Request,
+        file_format: export_service.ExportFormat = Query(export_service.ExportFormat.CSV, alias="format"),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user)):
+    """
+    Выгрузка карточек набора файлом. Ответ потоковый: карточки читаются серверным курсором,
+    CSV и JSONL сжимаются gzip/brotli по Accept-Encoding.
+    """
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if card_set is None:
         raise HTTPException(status_code=404, detail="Card Set not found or access denied")
-    return db_set
+
+    session_factory = await replica.read_sessionmaker(current_user.id)
+    body = export_service.stream_set_export(session_factory, set_id, file_format)
+    return export_service.export_response(request, body, file_format, name=card_set.name, fallback_name=f"set-{set_id}")
 
 @router.put("/{set_id}", response_model=CardSetRead)
-async def update_set(set_id: int, set_update: CardSetUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_set(set_id: int, set_update: CardSetUpdate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Обновляет набор по ID."""
     updated_set = await set_service.update_set(db, set_id=set_id, set_update=set_update, user_id=current_user.id)
     if updated_set is None:
         raise HTTPException(status_code=404, detail="Card Set not found or you are not the owner")
     return updated_set
 
-@router.delete("/{set_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_set(set_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Удаляет набор по ID."""
+@router.post("/{set_id}/clone", response_model=CardSetRead, status_code=status.HTTP_201_CREATED,
+             responses={202: {"model": JobRead, "description": "Large set: copying continues in a background job"}})
+async def clone_set(
+        set_id: int,
+        clone: CardSetClone,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),
+):
+    """
+    Копирует свой или публичный набор вместе с тегами и карточками в свою папку.
+    Набор больше JOB_THRESHOLD_CARDS карточек копируется фоновой задачей (202), id копии будет в ее result.
+    """
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if not card_set:
+        raise HTTPException(status_code=404, detail="Card Set not found or access denied")
+    folder = await folder_service.get_folder_by_id(db, clone.folder_id)
+    if not folder or folder.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Folder not found or you are not the owner")
+
+    if card_set.card_count > settings.JOB_THRESHOLD_CARDS:
+        job = await job_service.enqueue(
+            db, job_service.JobKind.CLONE_SET, owner_id=current_user.id,
+            payload={"set_id": set_id, "folder_id": clone.folder_id, "name": clone.name}, total=card_set.card_count,
+        )
+        return accepted_job_response(job)
+
+    cloned = await set_service.clone_set(
+        db, set_id=set_id, user_id=current_user.id, folder_id=clone.folder_id, name=clone.name
+    )
+    if cloned is None:
+        raise HTTPException(status_code=404, detail="Card Set not found or access denied")
+    return cloned
+
+@router.delete("/{set_id}", status_code=status.HTTP_204_NO_CONTENT,
+               responses={202: {"model": JobRead, "description": "Large set: deletion continues in a background job"}})
+async def delete_set(set_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """Удаляет набор по ID. Набор больше JOB_THRESHOLD_CARDS карточек удаляется фоновой задачей (202)."""
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if card_set and card_set.owner_id == current_user.id and card_set.card_count > settings.JOB_THRESHOLD_CARDS:
+        job = await job_service.enqueue(
+            db, job_service.JobKind.DELETE_SET, owner_id=current_user.id,
+            payload={"set_id": set_id}, total=card_set.card_count,
+        )
+        return accepted_job_response(job)
+
     success = await set_service.delete_set(db, set_id=set_id, user_id=current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Card Set not found or you are not the owner")
@@ -37,10 +156,10 @@ async def delete_set(set_id: int, db: AsyncSession = Depends(get_db), current_us
 async def clear_all_cards_in_set(
         set_id: int,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
 ):
     """Удаляет все карточки внутри набора."""
-    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
     if not card_set or card_set.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to clear this set")
 
@@ -50,20 +169,33 @@ async def clear_all_cards_in_set(
 @router.get("/{set_id}/cards", response_model=List[CardRead])
 async def read_cards_in_set(
         set_id: int,
+        request: Request,
         skip: int = 0,
         limit: int = 100,  # По умолчанию загружаем до 100 карточек, как мы и обсуждали
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        cursor: Optional[str] = Query(None, description="Cursor of the next page from the X-Next-Cursor header"),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user),
 ):
-    """Получает список карточек для указанного набора."""
+    """
+    Получает список карточек для указанного набора.
+    Страница кешируется по версии набора; при совпадении If-None-Match таблица cards не читается (304).
+    """
     # Сначала проверяем, имеет ли пользователь доступ к самому набору
-    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
     if not card_set:
         raise HTTPException(status_code=404, detail="Card Set not found or access denied")
 
     # Если доступ есть, получаем карточки
-    cards = await card_service.get_cards_by_set(db, set_id=set_id, skip=skip, limit=limit)
-    return cards
+    async def render():
+        cards = await card_service.get_cards_by_set(db, set_id=set_id, skip=skip, limit=limit, cursor=cursor)
+        cursor_headers = {}
+        following = next_cursor(cards, limit, "order", "id")
+        if following:
+            cursor_headers[NEXT_CURSOR_HEADER] = following
+        return _card_list_adapter.dump_json(_card_list_adapter.validate_python(cards, from_attributes=True)), cursor_headers
+
+    key = f"cards:{set_id}:v{card_set.version}:{skip}:{limit}:{cursor or ''}"
+    return await cached_json_response(request, key, render)
 
 
 @router.post("/{set_id}/cards", response_model=CardRead, status_code=status.HTTP_201_CREATED)
@@ -71,26 +203,97 @@ async def create_new_card(
         set_id: int,
         card_data: CardCreate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
 ):
     """Создает новую карточку в наборе."""
-    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
     if not card_set or card_set.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to add cards to this set")
     return await card_service.create_card(db, card_data=card_data, set_id=set_id)
 
 
+@router.post("/{set_id}/cards/import", response_model=CardImportResult,
+             responses={202: {"model": JobRead, "description": "Large file: import continues in a background job"}})
+async def import_cards_into_set(
+        set_id: int,
+        file: UploadFile = File(..., description="CSV, TSV или JSONL файл с карточками"),
+        file_format: Optional[import_service.ImportFormat] = Query(
+            None, alias="format", description="Формат файла; по умолчанию определяется по расширению"
+        ),
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),
+):
+    """
+    Массово импортирует карточки из файла и возвращает отчет об ошибках по строкам.
+    Файл больше JOB_THRESHOLD_IMPORT_BYTES импортируется фоновой задачей (202), отчет будет в ее result.
+    """
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if not card_set or card_set.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to add cards to this set")
+
+    file_format = file_format or import_service.detect_format(file.filename)
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Unsupported file format, expected csv, tsv or jsonl")
+
+    if file.size is not None and file.size > settings.JOB_THRESHOLD_IMPORT_BYTES:
+        path = await run_in_threadpool(job_service.spool_file, file.file, f".{file_format.value}")
+        job = await job_service.enqueue(
+            db, job_service.JobKind.IMPORT_CARDS, owner_id=current_user.id,
+            payload={"set_id": set_id, "path": path, "format": file_format.value},
+        )
+        return accepted_job_response(job)
+
+    return await import_service.import_cards(db, set_id=set_id, fileobj=file.file, fmt=file_format)
+
+
+@router.post("/{set_id}/cards:batch", response_model=CardBatchResponse)
+async def batch_update_cards(
+        set_id: int,
+        batch: CardBatchRequest,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),
+):
+    """Применяет пакет операций create/update/delete/move над карточками набора одной транзакцией."""
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if not card_set or card_set.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to edit cards in this set")
+
+    results = await card_service.apply_batch(db, set_id=set_id, operations=batch.operations)
+    return {"results": results}
+
+
 @router.post("/{set_id}/reorder", status_code=status.HTTP_204_NO_CONTENT)
 async def reorder_cards(
         set_id: int,
         reorder_request: CardReorderRequest,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
 ):
     """Изменяет порядок карточек в наборе."""
-    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id)
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
     if not card_set or card_set.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to reorder cards in this set")
 
     await card_service.update_card_order(db, set_id=set_id, card_ids=reorder_request.card_ids)
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+
+@router.post("/{set_id}/cards/{card_id}/move", response_model=CardRead)
+async def move_card(
+        set_id: int,
+        card_id: int,
+        move_request: CardMoveRequest,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user),
+):
+    """Переносит одну карточку между двумя соседями (обычно меняет одну строку)."""
+    card_set = await set_service.get_set_by_id(db, set_id=set_id, user_id=current_user.id, load=set_service.SetLoad.META)
+    if not card_set or card_set.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to reorder cards in this set")
+
+    card = await card_service.move_card(
+        db, set_id=set_id, card_id=card_id, after_id=move_request.after_id, before_id=move_request.before_id
+    )
+    if card is None:
+        raise HTTPException(status_code=404, detail="Card or its neighbours not found in this set")
+    return card
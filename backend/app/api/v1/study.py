@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.study import MAX_DUE_CARDS, StudyAnswersRequest, StudyAnswersResponse, StudyCard
+from app.services import study_service
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.db.database import get_db
+
+router = APIRouter()
+
+@router.get("/due", response_model=List[StudyCard])
+async def read_due_cards(
+        limit: int = Query(20, ge=1, le=MAX_DUE_CARDS),
+        new_limit: int = Query(10, ge=0, le=MAX_DUE_CARDS, description="How many never-studied cards to add after due ones"),
+        set_id: Optional[int] = Query(None, description="Study only this set"),
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Очередь повторения: карточки, срок которых наступил, затем новые."""
+    # Читаем с основной базы: очередь сразу после ответов не должна отставать от реплики
+    return await study_service.get_due_cards(
+        db, user_id=current_user.id, limit=limit, new_limit=new_limit, set_id=set_id
+    )
+
+@router.post("/answers", response_model=StudyAnswersResponse)
+async def submit_answers(
+        body: StudyAnswersRequest,
+        db: AsyncSession = Depends(get_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Пакет ответов одной транзакцией; по каждому ответу - новый срок или ошибка."""
+    results = await study_service.record_answers(db, user_id=current_user.id, answers=body.answers)
+    return StudyAnswersResponse(results=results)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.tag import TagSuggestion
+from app.services import tag_service
+from app.core.principal_cache import Principal
+from app.core.security import get_current_user
+from app.api.deps import get_read_db
+
+router = APIRouter()
+
+@router.get("/", response_model=List[TagSuggestion])
+async def suggest_tags(
+        prefix: str = Query("", max_length=100, description="Beginning of the tag name"),
+        limit: int = Query(tag_service.DEFAULT_SUGGESTIONS, ge=1, le=50),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: Principal = Depends(get_current_user)):
+    """Автодополнение тегов: теги с заданным префиксом, самые популярные первыми."""
+    return await tag_service.suggest_tags(db, prefix=prefix, limit=limit)
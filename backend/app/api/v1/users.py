@@ -1,16 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.database import AsyncSessionLocal
+from app.db.database import get_db
 from app.schemas.user import UserCreate, UserRead
 from app.services import user_service
 
 router = APIRouter()
 
-# Зависимость для получения сессии БД
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
-
 @router.post("/", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
@@ -0,0 +1,135 @@
+"""
+Кеш ответов с условными запросами (ETag / If-None-Match).
+
+Ключ кеша включает версию набора (CardSet.version), которую сервисы увеличивают при каждом
+изменении набора или его карточек. Поэтому записи не нужно удалять явно: после изменения
+запросы просто идут по новому ключу, а старые записи вытесняются LRU или истекают по TTL.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Protocol, Tuple
+
+from fastapi import Request, Response, status
+
+from app.core import metrics
+from app.core.config import settings
+
+response_cache_hits = metrics.counter("response_cache_hits_total", "Responses served from the response cache")
+response_cache_misses = metrics.counter("response_cache_misses_total", "Responses rendered because of a cache miss")
+not_modified_responses = metrics.counter("not_modified_responses_total", "Conditional GETs answered with 304")
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int): ...
+
+
+class LRUCacheBackend:
+    """Кеш в памяти процесса: не больше max_entries записей, самые давние вытесняются первыми."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int):
+        # TTL не нужен: версия в ключе делает устаревшие записи недостижимыми, их вытеснит LRU
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """
+    Общий кеш для нескольких воркеров. Подходит любой сервер с протоколом Redis (Redis, Valkey, KeyDB).
+    Ошибки сервера не роняют запрос: кеш считается промахом.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_URL requires the 'redis' package: pip install redis") from e
+        self._client = redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._client.get(key)
+        except self._errors:
+            return None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int):
+        try:
+            await self._client.set(key, value, ex=ttl_seconds)
+        except self._errors:
+            pass
+
+
+def _create_backend() -> CacheBackend:
+    if settings.RESPONSE_CACHE_URL:
+        return RedisCacheBackend(settings.RESPONSE_CACHE_URL)
+    return LRUCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+response_cache: CacheBackend = _create_backend()
+
+
+def _pack(body: bytes, headers: Dict[str, str]) -> bytes:
+    return json.dumps(headers).encode() + b"\n" + body
+
+
+def _unpack(value: bytes) -> Tuple[bytes, Dict[str, str]]:
+    headers, body = value.split(b"\n", 1)
+    return body, json.loads(headers)
+
+
+def etag_for(key: str) -> str:
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match сравнивается слабо (RFC 9110): W/"x" и "x" - один и тот же тег."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {_opaque_tag(candidate.strip()) for candidate in if_none_match.split(",")}
+    return "*" in candidates or _opaque_tag(etag) in candidates
+
+
+async def cached_json_response(
+        request: Request, key: str, render: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+) -> Response:
+    """
+    Отдает JSON-ответ для ключа key (в ключ должна входить версия набора):
+    304 - если клиент прислал совпадающий If-None-Match, иначе тело из кеша,
+    а при промахе - результат render() (тело и дополнительные заголовки), который сохраняется в кеш.
+    Права доступа проверяются до вызова: закешированное тело одинаково для всех, кому набор доступен.
+    """
+    etag = etag_for(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        not_modified_responses.inc()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cached = await response_cache.get(key)
+    if cached is not None:
+        response_cache_hits.inc()
+        body, extra_headers = _unpack(cached)
+    else:
+        response_cache_misses.inc()
+        body, extra_headers = await render()
+        await response_cache.set(key, _pack(body, extra_headers), settings.RESPONSE_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
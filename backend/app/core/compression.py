@@ -0,0 +1,47 @@
+import zlib
+from typing import AsyncIterator, Optional
+
+try:
+    import brotli  # необязательная зависимость: без нее отдаем gzip
+except ImportError:
+    brotli = None
+
+# Кодировки в порядке предпочтения
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Выбирает кодировку из заголовка Accept-Encoding; None - отдавать без сжатия."""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """Потоково сжимает чанки выбранной кодировкой, не собирая ответ целиком в памяти."""
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 - формат gzip
+        compress, finish = compressor.compress, compressor.flush
+
+    async for chunk in chunks:
+        compressed = compress(chunk)
+        if compressed:
+            yield compressed
+    yield finish()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +9,73 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
 
+    # Стоимость bcrypt (log2 числа раундов). При изменении старые хеши пересчитываются при входе
+    BCRYPT_ROUNDS: int = 12
+    # Потоки для хеширования паролей и сколько запросов может ждать свободный поток.
+    # Если заняты и потоки, и очередь, вход и регистрация отвечают 429
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Сколько секунд get_current_user может использовать закешированного пользователя без запроса к БД.
+    # Это же максимальная задержка, с которой деактивация (is_active) вступает в силу. 0 отключает кеш
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # Пул соединений с PostgreSQL (на один процесс uvicorn).
+    # Итоговое число соединений: воркеры * (DB_POOL_SIZE + DB_MAX_OVERFLOW) должно быть меньше max_connections
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # сколько секунд ждать свободное соединение, прежде чем упасть с ошибкой
+    DB_POOL_RECYCLE: int = 1800  # пересоздавать соединения старше N секунд
+    DB_POOL_PRE_PING: bool = True
+    # Кеш подготовленных выражений asyncpg на соединение. 0 - для PgBouncer в режиме transaction
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # statement_timeout по умолчанию для каждого запроса, мс. 0 - без ограничения
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+    # statement_timeout для долгих операций (импорт), выставляется на транзакцию
+    DB_LONG_STATEMENT_TIMEOUT_MS: int = 300000
+
+    # Реплика для читающих эндпоинтов. Без нее все запросы идут в DATABASE_URL
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # Сколько секунд после своей записи пользователь читает с основной БД (read-your-writes при лаге реплики).
+    # Отметка о записи хранится в памяти процесса: гарантия действует, только если чтение попало в тот же
+    # процесс, что и запись. При нескольких воркерах (uvicorn --workers, несколько контейнеров) направляйте
+    # запросы пользователя в один процесс (sticky-сессии балансировщика) или не задавайте DATABASE_REPLICA_URL
+    REPLICA_STICKY_SECONDS: float = 5
+    # Как часто перепроверять доступность реплики и сколько ждать ответа на проверку
+    REPLICA_HEALTH_CHECK_SECONDS: float = 10
+    REPLICA_HEALTH_CHECK_TIMEOUT: float = 1
+
+    # Кеш ответов для наборов и карточек. Без URL - LRU в памяти процесса;
+    # redis://... - общий кеш для нескольких воркеров (нужен пакет redis)
+    RESPONSE_CACHE_URL: Optional[str] = None
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+    RESPONSE_CACHE_TTL_SECONDS: int = 3600
+
+    # Фоновые задачи (app.services.job_service). Если задачи выполняет отдельный процесс
+    # (python -m app.worker), в API выставьте JOB_RUNNER_ENABLED=false
+    JOB_RUNNER_ENABLED: bool = True
+    JOB_CONCURRENCY: int = 1  # сколько задач процесс выполняет одновременно
+    JOB_POLL_SECONDS: float = 2  # как часто проверять очередь на задачи, поставленные другими процессами
+    # Исполнитель раз в треть аренды отмечает задачу живой (jobs.heartbeat_at). Задача в статусе running
+    # без отметки дольше JOB_LEASE_SECONDS считается брошенной (воркер убит) и снова забирается из очереди;
+    # после JOB_MAX_ATTEMPTS запусков брошенная задача становится failed
+    JOB_LEASE_SECONDS: float = 300
+    JOB_MAX_ATTEMPTS: int = 3
+    # Наборы больше этого числа карточек удаляются (и копируются) фоновой задачей, запрос отвечает 202
+    JOB_THRESHOLD_CARDS: int = 5000
+    # Файлы импорта больше этого размера, байт, импортируются фоновой задачей
+    JOB_THRESHOLD_IMPORT_BYTES: int = 1024 * 1024
+    # Сколько карточек удаляется за одну транзакцию в фоновом удалении
+    JOB_DELETE_BATCH_SIZE: int = 5000
+    # Каталог для загруженных файлов, ожидающих фонового импорта. Должен быть общим для API и воркера
+    JOB_SPOOL_DIR: Optional[str] = None
+
+    # Инструментирование запросов (app.core.instrumentation): SQL дольше SLOW_QUERY_MS пишутся
+    # в лог app.sql.slow (0 - не писать); SERVER_TIMING_ENABLED - заголовок Server-Timing в ответах
+    SLOW_QUERY_MS: float = 500
+    SERVER_TIMING_ENABLED: bool = True
+
     class Config:
         env_file = ".env"
 
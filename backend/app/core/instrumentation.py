@@ -0,0 +1,156 @@
+"""
+Инструментирование запросов: сколько времени занял запрос, сколько SQL он выполнил и сколько ждал БД.
+
+- RequestMetricsMiddleware заводит на каждый HTTP-запрос RequestStats (в contextvar) и по завершении
+  пишет гистограммы с разбивкой по маршруту (шаблон пути, например /api/v1/sets/{set_id}).
+- Слушатели движка (instrument_engine) добавляют к статистике текущего запроса каждое SQL-выражение
+  и его время; TimedQueuePool (app.db.database) - время ожидания соединения из пула.
+- Ответ получает заголовок Server-Timing (db, pool, app) - его видно во вкладке Network браузера.
+- Выражения дольше SLOW_QUERY_MS пишутся в лог app.sql.slow вместе с параметрами и маршрутом.
+
+Метрики отдаются в формате Prometheus на GET /metrics. Рост sql_statements у маршрута - первый
+признак N+1 (например, selectin-загрузки Card для каждого набора в списке).
+"""
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+
+slow_query_log = logging.getLogger("app.sql.slow")
+
+ROUTE_LABELS = ("method", "route")
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Request latency, including streaming the body",
+    labelnames=ROUTE_LABELS + ("status",),
+)
+request_statements = metrics.histogram(
+    "http_request_db_statements", "SQL statements executed per request",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100), labelnames=ROUTE_LABELS,
+)
+request_db_seconds = metrics.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", labelnames=ROUTE_LABELS,
+)
+request_pool_wait_seconds = metrics.histogram(
+    "http_request_db_pool_wait_seconds", "Time spent waiting for a pooled DB connection per request",
+    labelnames=ROUTE_LABELS,
+)
+slow_queries = metrics.counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS")
+
+# Маршрут для запросов, которые не совпали ни с одним путем (404): не плодим метки по сырым URL
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    scope: Scope
+    sql_statements: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def route(self) -> str:
+        # Роутер FastAPI кладет совпавший маршрут в scope["route"], пока запрос не дошел до роутера - его нет
+        return getattr(self.scope.get("route"), "path_format", UNMATCHED_ROUTE)
+
+    def server_timing(self, elapsed: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.sql_statements} queries", '
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}, app;dur={elapsed * 1000:.1f}"
+        )
+
+
+# Статистика текущего HTTP-запроса; None вне запроса (фоновые задачи, скрипты)
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def record_pool_wait(seconds: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started_at", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.sql_statements += 1
+        stats.db_seconds += elapsed
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        slow_queries.inc()
+        params = repr(parameters)
+        slow_query_log.warning(
+            "Slow query %.1f ms in %s: %s | parameters%s: %s",
+            elapsed * 1000, f"{stats.method} {stats.route}" if stats else "background",
+            statement, " (executemany)" if executemany else "",
+            params if len(params) <= 1000 else params[:1000] + "...",
+        )
+
+
+def instrument_engine(async_engine):
+    """Подключает подсчет SQL и лог медленных запросов к движку (основной БД или реплики)."""
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI-middleware (без BaseHTTPMiddleware, чтобы не буферизовать потоковые ответы).
+    Server-Timing выставляется в момент отправки заголовков, поэтому у потоковых ответов
+    он отражает работу до первого байта; гистограммы учитывают весь запрос.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", stats.server_timing(time.perf_counter() - started)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            labels = {"method": stats.method, "route": stats.route}
+            request_seconds.observe(time.perf_counter() - started, status=str(status), **labels)
+            request_statements.observe(stats.sql_statements, **labels)
+            request_db_seconds.observe(stats.db_seconds, **labels)
+            request_pool_wait_seconds.observe(stats.pool_wait_seconds, **labels)
@@ -0,0 +1,146 @@
+import bisect
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+class Counter:
+    """Монотонный счетчик внутри процесса."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Summary:
+    """Количество, сумма и максимум наблюдаемой величины (например, времени ожидания)."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+
+class Histogram:
+    """
+    Распределение величины по корзинам (buckets) с разбивкой по меткам, например {"route": ...}.
+    Для каждого набора меток хранятся счетчики корзин, количество и сумма - как у гистограммы Prometheus.
+    """
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # метки -> [число наблюдений в каждой корзине (не накопительно), последняя - +Inf..., count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 3)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def series(self) -> Dict[Tuple[str, ...], List[float]]:
+        """Снимок: метки -> копия [корзины..., +Inf, count, sum]."""
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+
+# Реестр всех метрик процесса по имени
+COUNTERS: Dict[str, Counter] = {}
+SUMMARIES: Dict[str, Summary] = {}
+HISTOGRAMS: Dict[str, Histogram] = {}
+
+# Корзины по умолчанию для времени, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def counter(name: str, description: str) -> Counter:
+    """Возвращает счетчик с этим именем, создавая его при первом обращении."""
+    if name not in COUNTERS:
+        COUNTERS[name] = Counter(name, description)
+    return COUNTERS[name]
+
+
+def ratio(hits: Counter, misses: Counter) -> float:
+    """Доля попаданий: hits / (hits + misses); 0.0, пока обращений не было."""
+    total = hits.value + misses.value
+    return hits.value / total if total else 0.0
+
+
+def summary(name: str, description: str) -> Summary:
+    """Возвращает сводку с этим именем, создавая ее при первом обращении."""
+    if name not in SUMMARIES:
+        SUMMARIES[name] = Summary(name, description)
+    return SUMMARIES[name]
+
+
+def histogram(name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+              labelnames: Sequence[str] = ()) -> Histogram:
+    """Возвращает гистограмму с этим именем, создавая ее при первом обращении."""
+    if name not in HISTOGRAMS:
+        HISTOGRAMS[name] = Histogram(name, description, buckets, labelnames)
+    return HISTOGRAMS[name]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus() -> str:
+    """Все метрики реестра в текстовом формате Prometheus (версия 0.0.4)."""
+    lines = []
+    for item in COUNTERS.values():
+        lines += [f"# HELP {item.name} {item.description}", f"# TYPE {item.name} counter",
+                  f"{item.name} {item.value}"]
+    for item in SUMMARIES.values():
+        # Максимум в модель summary не входит - отдаем его отдельной метрикой-gauge
+        lines += [f"# HELP {item.name} {item.description}", f"# TYPE {item.name} summary",
+                  f"{item.name}_count {item.count}", f"{item.name}_sum {_number(item.sum)}",
+                  f"# TYPE {item.name}_max gauge", f"{item.name}_max {_number(item.max)}"]
+    for item in HISTOGRAMS.values():
+        lines += [f"# HELP {item.name} {item.description}", f"# TYPE {item.name} histogram"]
+        for key, values in item.series().items():
+            cumulative = 0
+            for bound, observed in zip(item.buckets + ("+Inf",), values):
+                cumulative += observed
+                bucket = _labels(item.labelnames, key, f'le="{bound}"')
+                lines.append(f"{item.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{item.name}_count{_labels(item.labelnames, key)} {values[-2]}")
+            lines.append(f"{item.name}_sum{_labels(item.labelnames, key)} {_number(values[-1])}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import DateTime, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Заголовок, в котором отдается курсор следующей страницы.
+# Тело ответа остается прежним списком, поэтому старые клиенты со skip/limit не ломаются.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Упаковывает ключ последней строки страницы в непрозрачную строку."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """
+    Распаковывает курсор и приводит значения к ожидаемым типам.
+    :param types: типы компонентов ключа, например (datetime, int) или (int, int)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value, value_type in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_after(db: AsyncSession, columns: Sequence[Any], values: Sequence[Any], descending: bool = False):
+    """
+    Условие "строка идет строго после курсора" для сортировки по columns.
+    В SQLite даты хранятся строками в разных форматах (CURRENT_TIMESTAMP без микросекунд,
+    параметры SQLAlchemy - с микросекундами), поэтому там обе стороны приводятся к одному формату.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        columns = [
+            func.strftime("%Y-%m-%d %H:%M:%f", column) if isinstance(column.type, DateTime) else column
+            for column in columns
+        ]
+        values = [
+            func.strftime("%Y-%m-%d %H:%M:%f", value) if isinstance(value, datetime) else value
+            for value in values
+        ]
+    row, cursor_row = tuple_(*columns), tuple_(*values)
+    return row < cursor_row if descending else row > cursor_row
+
+
+def next_cursor(items: Sequence[Any], limit: int, *key_attrs: str) -> Optional[str]:
+    """
+    Курсор следующей страницы, построенный по последнему элементу, или None, если страница неполная.
+    :param key_attrs: атрибуты, образующие ключ сортировки, например ("created_at", "id")
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(*(getattr(last, attr) for attr in key_attrs))
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int, *key_attrs: str) -> Optional[str]:
+    """Если страница заполнена целиком, кладет в заголовок курсор следующей страницы (см. next_cursor)."""
+    cursor = next_cursor(items, limit, *key_attrs)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
+
+
+def offset_from_cursor(cursor: Optional[str], skip: int) -> int:
+    """
+    Для ранжированной выдачи (поиска) ключа сортировки нет, поэтому курсор хранит смещение.
+    Без курсора используется переданный skip.
+    """
+    if not cursor:
+        return skip
+    (offset,) = decode_cursor(cursor, int)
+    if offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return offset
+
+
+def set_next_offset_cursor(response: Response, items: Sequence[Any], limit: int, offset: int) -> Optional[str]:
+    """Пара к offset_from_cursor: курсор следующей страницы ранжированной выдачи."""
+    if not items or len(items) < limit:
+        return None
+    cursor = encode_cursor(offset + len(items))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
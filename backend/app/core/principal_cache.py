@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.models import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Аутентифицированный пользователь в том объеме, который нужен обработчикам запросов."""
+    id: int
+    email: str
+    is_active: bool
+
+
+principal_cache_hits = metrics.counter("principal_cache_hits_total", "get_current_user resolved without a DB query")
+principal_cache_misses = metrics.counter("principal_cache_misses_total", "get_current_user had to load the user row")
+
+
+class PrincipalCache:
+    """
+    LRU-кеш Principal по id пользователя с ограниченным временем жизни записи.
+    TTL - это максимальная задержка, с которой изменение is_active, сделанное в обход этого процесса,
+    становится видно. Изменения через ORM в этом процессе сбрасывают запись сразу (см. invalidate).
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            principal_cache_misses.inc()
+            return None
+        self._entries.move_to_end(user_id)
+        principal_cache_hits.inc()
+        return entry[1]
+
+    def put(self, principal: Principal):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def hit_ratio() -> float:
+        return metrics.ratio(principal_cache_hits, principal_cache_misses)
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.PRINCIPAL_CACHE_SIZE)
+
+
+@event.listens_for(User.is_active, "set")
+def _invalidate_on_is_active_change(target, value, oldvalue, initiator):
+    """Смена is_active через ORM сразу сбрасывает закешированного пользователя."""
+    if target.id is not None and value != oldvalue:
+        principal_cache.invalidate(target.id)
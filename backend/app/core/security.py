@@ -0,0 +1,141 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.principal_cache import Principal, principal_cache
+from app.db.database import get_db
+
+# min/max совпадают с default: хеш с любой другой стоимостью считается устаревшим (needs_update)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+
+# bcrypt занимает процессор на 100-300 мс и отпускает GIL, поэтому считаем его в отдельных потоках,
+# чтобы не блокировать event loop. Число одновременно принятых задач ограничено: потоки + очередь
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_jobs_limit = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+_password_jobs_in_flight = 0
+_password_jobs_lock = threading.Lock()
+
+
+def _password_job_done(_future):
+    # Вызывается, когда поток действительно освободился или задача снята из очереди, а не когда
+    # отменен ожидающий запрос. Вызов приходит из потока пула или из event loop, поэтому под блокировкой
+    global _password_jobs_in_flight
+    with _password_jobs_lock:
+        _password_jobs_in_flight -= 1
+
+
+async def _run_password_job(func, *args):
+    """
+    Выполняет func в пуле хеширования паролей.
+    Если пул и очередь заполнены, сразу отвечает 429, а не копит запросы без ограничений.
+    Задача считается занятой, пока работает поток: отмена запроса не освобождает место в пуле.
+    """
+    global _password_jobs_in_flight
+    with _password_jobs_lock:
+        if _password_jobs_in_flight >= _password_jobs_limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many authentication requests, try again later",
+                headers={"Retry-After": "1"},
+            )
+        _password_jobs_in_flight += 1
+    try:
+        future = _password_executor.submit(func, *args)
+    except BaseException:
+        _password_job_done(None)
+        raise
+    future.add_done_callback(_password_job_done)
+    return await asyncio.wrap_future(future)
+
+
+def shutdown_password_executor():
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_job(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Проверяет пароль. Вторым элементом возвращает новый хеш, если сохраненный
+    посчитан с устаревшей стоимостью (BCRYPT_ROUNDS изменился) - его нужно сохранить вместо старого.
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def token_claims(user) -> dict:
+    """Данные токена: sub - email (как и раньше), uid - id пользователя для поиска без запроса по email."""
+    return {"sub": user.email, "uid": user.id}
+
+
+def create_access_token(data: dict) -> str:
+    to_encode = data.copy()
+    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def create_refresh_token(data: dict) -> str:
+    to_encode = data.copy()
+    expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire})
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> Principal:
+    """
+    Возвращает Principal пользователя из токена.
+    По uid из токена пользователь берется из principal_cache; к БД идем только при промахе
+    (и для старых токенов без uid). Сессия не открывает соединение, пока не выполнен запрос.
+    """
+    from app.services import user_service
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        email: str = payload.get("sub")
+        user_id: Optional[int] = payload.get("uid")
+        if email is None:
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+
+    principal = principal_cache.get(user_id) if user_id is not None else None
+    if principal is None:
+        if user_id is not None:
+            user = await user_service.get_user_by_id(db, user_id=user_id)
+        else:
+            user = await user_service.get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        principal = Principal(id=user.id, email=user.email, is_active=user.is_active)
+        principal_cache.put(principal)
+
+    if not principal.is_active:
+        raise credentials_exception
+    # По этому id сессия отмечает пользователя, который записывал (read-your-writes для реплики)
+    db.info["user_id"] = principal.id
+    return principal
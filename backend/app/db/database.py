@@ -1,8 +1,95 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import time
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core import metrics
+from app.core.instrumentation import instrument_engine, record_pool_wait
 from app.core.config import settings
+from app.services.search_service import register_sqlite_functions
+
+pool_wait_seconds = metrics.summary("db_pool_wait_seconds", "Time spent waiting for a pooled DB connection")
+pool_timeouts = metrics.counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT")
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который замеряет, сколько запрос ждал свободное соединение."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            pool_wait_seconds.observe(waited)
+            record_pool_wait(waited)
+
+
+def engine_options(url: str) -> dict:
+    """Параметры пула и драйвера из Settings. SQLite (локальные проверки) работает с настройками по умолчанию."""
+    if url.startswith("sqlite"):
+        return {}
+    options = dict(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {
+            # Кеш подготовленных выражений: и собственный у SQLAlchemy, и у asyncpg
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)},
+        }
+    return options
+
 
 # Создаем асинхронный "движок" для подключения к БД
-engine = create_async_engine(settings.DATABASE_URL)
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+instrument_engine(engine)
+
+def _configure_sqlite_connection(dbapi_connection, _):
+    register_sqlite_functions(dbapi_connection)
+    # Без этого SQLite не проверяет внешние ключи и не выполняет ON DELETE CASCADE
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def register_dialect_functions(async_engine):
+    """
+    В SQLite нет pg_trgm: подключаем питоновскую реализацию similarity() на каждом соединении.
+    Там же включаем внешние ключи, чтобы удаление каскадом работало как на PostgreSQL.
+    """
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _configure_sqlite_connection)
+
+
+register_dialect_functions(engine)
+
+
+class PrimarySession(Session):
+    """Сессия основной (пишущей) БД. Отдельный класс, чтобы на него можно было повесить события (см. app.db.replica)."""
+
 
 # Создаем фабрику сессий для взаимодействия с БД
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
\ No newline at end of file
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=PrimarySession)
+
+
+async def get_db():
+    """Зависимость FastAPI: одна сессия на запрос. Соединение берется из пула при первом запросе к БД."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def set_statement_timeout(db: AsyncSession, milliseconds: int):
+    """Меняет statement_timeout до конца текущей транзакции (только PostgreSQL)."""
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text(f"SET LOCAL statement_timeout = {int(milliseconds)}"))
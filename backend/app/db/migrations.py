@@ -0,0 +1,64 @@
+"""
+Миграции схемы (Alembic, каталог backend/alembic).
+
+Схему меняют только миграции:
+
+    cd backend && alembic upgrade head
+
+Приложение при старте лишь сверяет версию схемы в базе с последней миграцией (check_schema_version)
+и не запускается на устаревшей схеме.
+Базу, созданную прежним Base.metadata.create_all, один раз помечают исходной ревизией:
+alembic stamp 0001 && alembic upgrade head.
+"""
+import os
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Конфигурация Alembic из backend/alembic.ini; url подменяет DATABASE_URL (тесты, бенчмарки)."""
+    config = Config(os.path.abspath(ALEMBIC_INI))
+    # Логирование настраивает приложение, alembic.ini нужен только при запуске из командной строки
+    config.attributes["configure_logger"] = False
+    if url is not None:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def head_revision() -> Optional[str]:
+    """Последняя ревизия из каталога миграций - читается с диска, без обращения к базе."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def upgrade_to_head(url: Optional[str] = None):
+    """
+    Применяет все миграции. Блокирующая функция (env.py сам крутит event loop):
+    из асинхронного кода вызывать через asyncio.to_thread.
+    """
+    command.upgrade(alembic_config(url), "head")
+
+
+async def check_schema_version(engine: AsyncEngine):
+    """
+    Проверка при старте: один SELECT из alembic_version. Если миграции не применены
+    или код новее базы, поднимает RuntimeError с подсказкой, что выполнить.
+    """
+    expected = head_revision()
+    try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except DBAPIError:
+        current = None
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {current or 'none'}, the code expects {expected}. "
+            "Run 'alembic upgrade head' in backend/ before starting the application."
+        )
@@ -1,14 +1,41 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, JSON, Table, Text, Index, DDL, event, func, literal_column
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from app.db.base import Base
 
-# Связующая таблица для отношения Many-to-Many между Наборами и Тегами
+# Триграммный поиск по названиям на PostgreSQL требует расширения pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """GIN-индекс gin_trgm_ops: обслуживает ILIKE '%...%' и similarity(). Создается только на PostgreSQL."""
+    return Index(
+        name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}
+    ).ddl_if(dialect="postgresql")
+
+
+def card_search_document(term, definition, translation):
+    """
+    Полнотекстовый документ карточки для PostgreSQL: to_tsvector('simple', term || definition || translation).
+    Константы вставлены литералами, чтобы выражение в запросе совпадало с выражением индекса.
+    """
+    space, empty = literal_column("' '"), literal_column("''")
+    text = func.coalesce(term, empty) + space + func.coalesce(definition, empty) + space + func.coalesce(translation, empty)
+    return func.to_tsvector(literal_column("'simple'::regconfig"), text)
+
+
+# Связующая таблица для отношения Many-to-Many между Наборами и Тегами.
+# Строки удаляются базой вместе с набором (ON DELETE CASCADE)
 card_set_tags_association = Table(
     'card_set_tags',
     Base.metadata,
-    Column('card_set_id', Integer, ForeignKey('card_sets.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('card_set_id', Integer, ForeignKey('card_sets.id', ondelete='CASCADE'), primary_key=True),
+    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    # Обратный индекс "тег -> наборы" для фильтрации наборов по тегам (первичный ключ начинается с card_set_id)
+    Index('ix_card_set_tags_tag_id', 'tag_id', 'card_set_id'),
 )
 
 class User(Base):
@@ -20,12 +47,18 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Связь "один ко многим": один пользователь - много папок
-    folders = relationship("Folder", back_populates="owner", cascade="all, delete-orphan")
+    folders = relationship("Folder", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
     # Связь "один ко многим": один пользователь - много наборов
-    card_sets = relationship("CardSet", back_populates="owner", cascade="all, delete-orphan")
+    card_sets = relationship("CardSet", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
 
 class Folder(Base):
     __tablename__ = "folders"
+    __table_args__ = (
+        # Постраничный список папок пользователя по ключу (created_at, id)
+        Index("ix_folders_owner_id_created_at", "owner_id", "created_at", "id"),
+        # Поиск папок по подстроке названия
+        trigram_index("ix_folders_name_trgm", "name"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     is_public = Column(Boolean, default=False)
@@ -35,11 +68,22 @@ class Folder(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="folders")
 
-    # Связь "один ко многим": одна папка - много наборов
-    card_sets = relationship("CardSet", back_populates="folder", cascade="all, delete-orphan")
+    # Денормализованное число наборов в папке. Поддерживается сервисами при создании и удалении наборов,
+    # пересчитывается командой python -m app.db.repair_counters
+    set_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Связь "один ко многим": одна папка - много наборов.
+    # Наборы удаляет сама база (ON DELETE CASCADE), ORM не загружает их перед удалением папки
+    card_sets = relationship("CardSet", back_populates="folder", cascade="all, delete-orphan", passive_deletes=True)
 
 class CardSet(Base):
     __tablename__ = "card_sets"
+    __table_args__ = (
+        # Постраничный список наборов папки по ключу (created_at, id)
+        Index("ix_card_sets_folder_id_created_at", "folder_id", "created_at", "id"),
+        # Поиск наборов по подстроке названия
+        trigram_index("ix_card_sets_name_trgm", "name"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
@@ -51,20 +95,44 @@ class CardSet(Base):
     owner = relationship("User", back_populates="card_sets")
 
     # Связь с папкой
-    folder_id = Column(Integer, ForeignKey("folders.id"), nullable=False)
+    folder_id = Column(Integer, ForeignKey("folders.id", ondelete="CASCADE"), nullable=False)
     folder = relationship("Folder", back_populates="card_sets")
 
+    # Последнее выданное значение Card.order в этом наборе.
+    # Увеличивается атомарным UPDATE ... RETURNING, поэтому параллельные вставки не получают одинаковый order
+    next_order = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Денормализованное число карточек в наборе. Поддерживается сервисами при вставке и удалении карточек,
+    # пересчитывается командой python -m app.db.repair_counters
+    card_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Версия содержимого набора: растет при любом изменении набора или его карточек.
+    # По ней строятся ETag и ключи кеша ответов (app.core.cache)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     # Связь "многие ко многим" с тегами
-    tags = relationship("Tag", secondary=card_set_tags_association, back_populates="card_sets")
+    tags = relationship("Tag", secondary=card_set_tags_association, back_populates="card_sets", passive_deletes=True)
 
-    # Связь "один ко многим": один набор - много карточек
-    cards = relationship("Card", back_populates="card_set", cascade="all, delete-orphan", lazy="selectin")
+    # Связь "один ко многим": один набор - много карточек.
+    # Карточки НЕ грузятся вместе с набором: их читают отдельными запросами (card_service, /sets/{id}/full).
+    # При удалении набора карточки удаляет база (ON DELETE CASCADE), а не ORM по одной
+    cards = relationship("Card", back_populates="card_set", cascade="all, delete-orphan", lazy="select", passive_deletes=True)
 
 class Tag(Base):
     __tablename__ = "tags"
+    __table_args__ = (
+        # Автодополнение по префиксу (name LIKE 'пре%') на PostgreSQL при любой collation
+        Index(
+            "ix_tags_name_prefix", "name", postgresql_ops={"name": "text_pattern_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
 
+    # Число наборов с этим тегом: для подсказок популярных тегов без обхода card_set_tags.
+    # Поддерживается tag_service, пересчитывается командой python -m app.db.repair_counters
+    usage_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Связь "многие ко многим" с наборами
     card_sets = relationship("CardSet", secondary=card_set_tags_association, back_populates="tags")
 
@@ -83,5 +151,67 @@ class Card(Base):
     order = Column(Integer, nullable=False, default=0)
 
     # Связь с набором, к которому принадлежит карточка
-    set_id = Column(Integer, ForeignKey("card_sets.id"), nullable=False)
-    card_set = relationship("CardSet", back_populates="cards")
\ No newline at end of file
+    set_id = Column(Integer, ForeignKey("card_sets.id", ondelete="CASCADE"), nullable=False)
+    card_set = relationship("CardSet", back_populates="cards")
+
+    __table_args__ = (
+        # Список карточек набора (ключ пагинации (order, id)) и перенос карточек идут по этому индексу
+        Index("ix_cards_set_id_order", "set_id", "order", "id"),
+        # Полнотекстовый GIN-индекс по текстовым полям карточки (только PostgreSQL)
+        Index(
+            "ix_cards_search_document",
+            card_search_document(term, definition, translation),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class CardReview(Base):
+    """Состояние интервального повторения (SM-2) карточки для конкретного пользователя."""
+    __tablename__ = "card_reviews"
+    __table_args__ = (
+        # Очередь к повторению: карточки пользователя с наступившим due_at по возрастанию
+        Index("ix_card_reviews_user_id_due_at", "user_id", "due_at"),
+    )
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    card_id = Column(Integer, ForeignKey("cards.id", ondelete="CASCADE"), primary_key=True)
+
+    # Параметры SM-2
+    ease_factor = Column(Float, nullable=False, default=2.5)
+    interval_days = Column(Integer, nullable=False, default=0)
+    repetitions = Column(Integer, nullable=False, default=0)
+    lapses = Column(Integer, nullable=False, default=0)
+
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class Job(Base):
+    """Фоновая задача (удаление, импорт, копирование больших наборов). Статус и прогресс читает GET /api/v1/jobs/{id}."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Выбор следующей задачи из очереди: WHERE status = 'queued' ORDER BY id
+        Index("ix_jobs_status_id", "status", "id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    # queued -> running -> succeeded | failed (см. job_service.JobStatus)
+    status = Column(String, nullable=False, default="queued")
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Параметры задачи и ее результат (JSON); error - текст ошибки упавшей задачи
+    payload = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Прогресс: сколько единиц работы (карточек, строк) сделано из total; total может быть неизвестен
+    progress = Column(Integer, nullable=False, default=0, server_default="0")
+    total = Column(Integer, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Исполнитель обновляет отметку, пока задача выполняется; давно не обновленная running-задача
+    # брошена убитым воркером и снова забирается из очереди (settings.JOB_LEASE_SECONDS)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
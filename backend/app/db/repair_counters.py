@@ -0,0 +1,71 @@
+"""
+Пересчет денормализованных счетчиков Folder.set_count, CardSet.card_count и Tag.usage_count
+по фактическим данным.
+
+Сервисы поддерживают счетчики сами, команда нужна для первичного заполнения
+существующей базы и для исправления расхождений:
+
+    python -m app.db.repair_counters
+"""
+import asyncio
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal, engine
+from app.db.models import Card, CardSet, Folder, Tag, card_set_tags_association
+
+
+async def repair_counters(db: AsyncSession) -> tuple[int, int, int]:
+    """
+    Перезаписывает счетчики коррелированными подзапросами и возвращает
+    число исправленных (папок, наборов, тегов). Строки с верным значением не трогаются.
+    """
+    actual_set_count = (
+        select(func.count(CardSet.id)).where(CardSet.folder_id == Folder.id).scalar_subquery()
+    )
+    folders = await db.execute(
+        update(Folder)
+        .where(Folder.set_count != actual_set_count)
+        .values(set_count=actual_set_count)
+        .execution_options(synchronize_session=False)
+    )
+
+    actual_card_count = (
+        select(func.count(Card.id)).where(Card.set_id == CardSet.id).scalar_subquery()
+    )
+    sets = await db.execute(
+        update(CardSet)
+        .where(CardSet.card_count != actual_card_count)
+        .values(card_count=actual_card_count)
+        .execution_options(synchronize_session=False)
+    )
+
+    actual_usage_count = (
+        select(func.count())
+        .select_from(card_set_tags_association)
+        .where(card_set_tags_association.c.tag_id == Tag.id)
+        .scalar_subquery()
+    )
+    tags = await db.execute(
+        update(Tag)
+        .where(Tag.usage_count != actual_usage_count)
+        .values(usage_count=actual_usage_count)
+        .execution_options(synchronize_session=False)
+    )
+
+    await db.commit()
+    return folders.rowcount, sets.rowcount, tags.rowcount
+
+
+async def main():
+    try:
+        async with AsyncSessionLocal() as db:
+            folders, sets, tags = await repair_counters(db)
+        print(f"Repaired set_count in {folders} folders, card_count in {sets} sets, usage_count in {tags} tags")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
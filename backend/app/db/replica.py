@@ -0,0 +1,145 @@
+"""
+Маршрутизация чтений на реплику.
+
+Читающие эндпоинты получают сессию через app.api.deps.get_read_db, которая выбирает фабрику сессий:
+- реплику, если она настроена (DATABASE_REPLICA_URL) и отвечает на проверку здоровья;
+- основную БД, если пользователь что-то записал за последние REPLICA_STICKY_SECONDS
+  (реплика могла еще не догнать его изменения) или реплика недоступна.
+
+Запись фиксируется событиями сессии основной БД: после commit транзакции, в которой были
+INSERT/UPDATE/DELETE, id пользователя (session.info["user_id"], его кладет get_current_user)
+попадает в таблицу "липкости". Таблица живет в памяти процесса, как и principal_cache.
+
+Ограничение: read-your-writes гарантирован только в пределах одного процесса. Если запись обработал
+один воркер, а следующее чтение - другой, второй о записи не знает и может отдать данные с отстающей
+реплики. С несколькими воркерами нужна привязка пользователя к процессу на балансировщике,
+иначе реплику лучше не включать.
+Локально реплику можно изобразить вторым файлом SQLite или вторым экземпляром PostgreSQL.
+"""
+import asyncio
+import time
+from typing import Dict
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import metrics
+from app.core.instrumentation import instrument_engine
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, PrimarySession, engine_options, register_dialect_functions
+
+replica_reads = metrics.counter("db_replica_reads_total", "Read-only requests served by the replica")
+primary_reads = metrics.counter("db_primary_reads_total", "Read-only requests served by the primary")
+replica_failures = metrics.counter("db_replica_failures_total", "Failed replica health checks and disconnects")
+
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(settings.DATABASE_REPLICA_URL, **engine_options(settings.DATABASE_REPLICA_URL))
+    register_dialect_functions(replica_engine)
+    instrument_engine(replica_engine)
+    ReplicaSessionLocal = async_sessionmaker(replica_engine, expire_on_commit=False)
+
+
+# --- Read-your-writes ---
+
+# user_id -> момент (time.monotonic), до которого чтения пользователя идут в основную БД
+_sticky_until: Dict[int, float] = {}
+
+
+def mark_write(user_id: int):
+    now = time.monotonic()
+    _sticky_until[user_id] = now + settings.REPLICA_STICKY_SECONDS
+    # Не даем таблице расти бесконечно: вычищаем истекшие записи, когда их накопилось много
+    if len(_sticky_until) > 10000:
+        for expired in [uid for uid, until in _sticky_until.items() if until < now]:
+            del _sticky_until[expired]
+
+
+def is_sticky(user_id: int) -> bool:
+    until = _sticky_until.get(user_id)
+    return until is not None and until > time.monotonic()
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _track_flush_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _remember_writer(session):
+    user_id = session.info.get("user_id")
+    if session.info.pop("has_writes", False) and user_id is not None:
+        mark_write(user_id)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("has_writes", None)
+
+
+# --- Здоровье реплики ---
+
+_replica_healthy = True
+_next_health_check = 0.0
+
+
+def _mark_replica_unhealthy():
+    global _replica_healthy, _next_health_check
+    replica_failures.inc()
+    _replica_healthy = False
+    _next_health_check = time.monotonic() + settings.REPLICA_HEALTH_CHECK_SECONDS
+
+
+if replica_engine is not None:
+    @event.listens_for(replica_engine.sync_engine, "handle_error")
+    def _on_replica_error(context):
+        # Разрыв соединения с репликой: до следующей проверки читаем с основной БД
+        if context.is_disconnect:
+            _mark_replica_unhealthy()
+
+
+async def _ping_replica():
+    async with replica_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def replica_available() -> bool:
+    """
+    Доступна ли реплика. Проверка (SELECT 1) выполняется не чаще раза в REPLICA_HEALTH_CHECK_SECONDS;
+    в промежутке возвращается результат последней проверки.
+    """
+    global _replica_healthy, _next_health_check
+    if replica_engine is None:
+        return False
+    now = time.monotonic()
+    if now < _next_health_check:
+        return _replica_healthy
+    # Сдвигаем срок до await, чтобы параллельные запросы не проверяли реплику одновременно
+    _next_health_check = now + settings.REPLICA_HEALTH_CHECK_SECONDS
+    try:
+        await asyncio.wait_for(_ping_replica(), timeout=settings.REPLICA_HEALTH_CHECK_TIMEOUT)
+        _replica_healthy = True
+    except Exception:
+        _mark_replica_unhealthy()
+    return _replica_healthy
+
+
+async def read_sessionmaker(user_id: int) -> async_sessionmaker:
+    """Фабрика сессий для читающего запроса пользователя user_id."""
+    if not is_sticky(user_id) and await replica_available():
+        replica_reads.inc()
+        return ReplicaSessionLocal
+    primary_reads.inc()
+    return AsyncSessionLocal
+
+
+async def dispose():
+    if replica_engine is not None:
+        await replica_engine.dispose()
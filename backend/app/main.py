@@ -1,8 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.base import Base
 from app.db.database import engine
-from app.api.v1 import users, auth, folders, sets, cards
+from app.db.migrations import check_schema_version
+from app.db import replica
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.security import shutdown_password_executor
+from app.api.v1 import users, auth, folders, sets, cards, search, tags, study, jobs, metrics
+from app.services import job_service
 
 app = FastAPI(title="English Flashcards API")
 
@@ -21,14 +27,26 @@ app.add_middleware(
     allow_credentials=True, # Разрешаем передачу cookie
     allow_methods=["*"], # Разрешаем все методы (GET, POST, etc.)
     allow_headers=["*"], # Разрешаем все заголовки
+    expose_headers=[NEXT_CURSOR_HEADER], # Даем фронтенду прочитать курсор следующей страницы
 )
 
-# Это асинхронная функция, которая создаст таблицы в БД при старте приложения
+# Время, число SQL и ожидание пула по маршрутам: гистограммы для /metrics и заголовок Server-Timing.
+# Добавлен последним, поэтому внешний: учитывает и работу CORS
+app.add_middleware(RequestMetricsMiddleware)
+
+# Схему создают и обновляют миграции (alembic upgrade head); при старте только сверяем ее версию
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all) # Раскомментируйте, чтобы пересоздавать таблицы при каждом старте
-        await conn.run_sync(Base.metadata.create_all)
+    await check_schema_version(engine)
+    # Фоновые задачи выполняются в этом же процессе, если их не забирает отдельный app.worker
+    if settings.JOB_RUNNER_ENABLED:
+        job_service.runner.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_service.runner.stop()
+    shutdown_password_executor()
+    await replica.dispose()
 
 # Подключаем роутеры
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
@@ -36,6 +54,11 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(folders.router, prefix="/api/v1/folders", tags=["folders"])
 app.include_router(sets.router, prefix="/api/v1/sets", tags=["sets"])
 app.include_router(cards.router, prefix="/api/v1/cards", tags=["cards"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
+app.include_router(tags.router, prefix="/api/v1/tags", tags=["tags"])
+app.include_router(study.router, prefix="/api/v1/study", tags=["study"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 
 @app.get("/")
 def read_root():
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, constr
-from typing import Optional
+from pydantic import BaseModel, Field, constr, model_validator
+from typing import Annotated, Literal, Optional, Union
 
 # Лимиты символов для полей карточки
 TERM_MAX_LENGTH = 255
@@ -7,6 +7,9 @@ DEFINITION_MAX_LENGTH = 1000
 EXAMPLE_MAX_LENGTH = 1000
 TRANSLATION_MAX_LENGTH = 1000
 
+# Максимум операций в одном пакетном запросе
+MAX_BATCH_OPERATIONS = 500
+
 class CardBase(BaseModel):
     term: constr(max_length=TERM_MAX_LENGTH)
     definition: constr(max_length=DEFINITION_MAX_LENGTH)
@@ -29,4 +32,61 @@ class CardRead(CardBase):
 
 # Схема для операции пересортировки
 class CardReorderRequest(BaseModel):
-    card_ids: list[int]
\ No newline at end of file
+    card_ids: list[int]
+
+# Схема для переноса одной карточки между соседями (хотя бы один сосед обязателен)
+class CardMoveRequest(BaseModel):
+    after_id: Optional[int] = None  # Карточка, которая окажется перед перенесенной
+    before_id: Optional[int] = None  # Карточка, которая окажется после перенесенной
+
+    @model_validator(mode="after")
+    def check_neighbours(self):
+        if self.after_id is None and self.before_id is None:
+            raise ValueError("after_id or before_id is required")
+        return self
+
+# Схемы для массового импорта карточек из файла
+class CardImportRowError(BaseModel):
+    row: int  # Номер строки в исходном файле (начиная с 1)
+    errors: list[str]
+
+class CardImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[CardImportRowError]  # Не больше import_service.MAX_REPORTED_ERRORS записей
+
+
+# Схемы для пакетного изменения карточек (POST /sets/{set_id}/cards:batch)
+class CardBatchCreate(CardCreate):
+    op: Literal["create"]
+
+class CardBatchUpdate(CardUpdate):
+    op: Literal["update"]
+    id: int
+
+class CardBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+class CardBatchMove(BaseModel):
+    op: Literal["move"]
+    id: int
+    order: int  # Новое значение поля order карточки
+
+CardBatchOperation = Annotated[
+    Union[CardBatchCreate, CardBatchUpdate, CardBatchDelete, CardBatchMove],
+    Field(discriminator="op"),
+]
+
+class CardBatchRequest(BaseModel):
+    operations: list[CardBatchOperation] = Field(max_length=MAX_BATCH_OPERATIONS)
+
+class CardBatchResult(BaseModel):
+    index: int  # Позиция операции в запросе
+    op: str
+    ok: bool
+    id: Optional[int] = None  # ID карточки; для create - ID созданной карточки
+    error: Optional[str] = None
+
+class CardBatchResponse(BaseModel):
+    results: list[CardBatchResult]
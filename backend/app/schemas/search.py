@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class CardSearchHit(BaseModel):
+    id: int
+    set_id: int
+    set_name: str
+    order: int
+    term: str
+    definition: str
+    translation: Optional[str] = None
+    # Те же поля с найденными словами в <mark>...</mark>; остальной текст HTML-экранирован
+    term_highlight: str
+    definition_highlight: str
+    translation_highlight: Optional[str] = None
@@ -16,6 +16,10 @@ class CardSetCreate(CardSetBase):
 class CardSetUpdate(CardSetBase):
     tags: List[constr(strip_whitespace=True, to_lower=True)] = []
 
+class CardSetClone(BaseModel):
+    folder_id: int  # Своя папка, в которую копируется набор
+    name: Optional[str] = None  # Название копии; по умолчанию - как у исходного набора
+
 class CardSetRead(CardSetBase):
     id: int
     created_at: datetime
@@ -23,6 +27,7 @@ class CardSetRead(CardSetBase):
     folder_id: int
     tags: List[TagRead] = [] # Отдаем теги как список объектов
     card_count: int
+    version: int
 
     class Config:
         from_attributes = True
\ No newline at end of file
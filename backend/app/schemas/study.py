@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, timezone
+from typing import List, Optional
+
+# Максимум ответов в одном пакете и карточек в одной выдаче очереди
+MAX_STUDY_ANSWERS = 500
+MAX_DUE_CARDS = 200
+
+class StudyCard(BaseModel):
+    id: int
+    set_id: int
+    term: str
+    definition: str
+    example: Optional[str] = None
+    translation: Optional[str] = None
+    # Состояние повторения; у новых карточек (is_new) его еще нет
+    is_new: bool
+    due_at: Optional[datetime] = None
+    interval_days: int = 0
+    ease_factor: Optional[float] = None
+    repetitions: int = 0
+
+# Оценка ответа по шкале SM-2: 0-2 - не вспомнил, 3 - с трудом, 4 - хорошо, 5 - легко
+class StudyAnswer(BaseModel):
+    card_id: int
+    quality: int = Field(..., ge=0, le=5)
+    reviewed_at: Optional[datetime] = None  # Время ответа на клиенте (для офлайн-сессий); по умолчанию - сейчас
+
+    @field_validator("reviewed_at")
+    @classmethod
+    def to_utc(cls, value: Optional[datetime]):
+        # Время без часового пояса считаем UTC: иначе его нельзя сравнить с серверным now
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+class StudyAnswersRequest(BaseModel):
+    answers: List[StudyAnswer] = Field(..., min_length=1, max_length=MAX_STUDY_ANSWERS)
+
+class StudyAnswerResult(BaseModel):
+    card_id: int
+    ok: bool
+    due_at: Optional[datetime] = None
+    interval_days: Optional[int] = None
+    error: Optional[str] = None
+
+class StudyAnswersResponse(BaseModel):
+    results: List[StudyAnswerResult]
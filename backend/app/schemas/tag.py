@@ -10,4 +10,7 @@ class TagRead(TagBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TagSuggestion(TagRead):
+    usage_count: int
@@ -0,0 +1,181 @@
+"""
+Сборка колоды Anki (.apkg) для экспорта.
+
+.apkg - zip с SQLite-базой коллекции (collection.anki2, схема 11) и файлом media.
+Карточки дописываются в базу во временном файле пачками, поэтому память не зависит от размера колоды;
+zip собирается после того, как записана последняя карточка.
+"""
+import hashlib
+import html
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from typing import Iterable, Iterator
+
+# Поля заметки Anki и как они собираются из карточки
+NOTE_FIELDS = ("Front", "Back")
+FIELD_SEPARATOR = "\x1f"
+
+_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn ON notes (usn);
+CREATE INDEX ix_cards_usn ON cards (usn);
+CREATE INDEX ix_revlog_usn ON revlog (usn);
+CREATE INDEX ix_cards_nid ON cards (nid);
+CREATE INDEX ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX ix_revlog_cid ON revlog (cid);
+CREATE INDEX ix_notes_csum ON notes (csum);
+"""
+
+_DECK_CONFIG = {
+    "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+    "replayq": True, "dyn": False,
+    "new": {"bury": True, "delays": [1, 10], "initialFactor": 2500, "ints": [1, 4, 7], "order": 1, "perDay": 20,
+            "separate": True},
+    "lapse": {"delays": [10], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0},
+    "rev": {"bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500, "minSpace": 1, "perDay": 100},
+}
+
+
+def _stable_id(*parts) -> int:
+    """Детерминированный 52-битный id: повторный импорт той же карточки обновляет заметку, а не дублирует ее."""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") >> 12
+
+
+def _checksum(text: str) -> int:
+    return int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+
+
+def _field(value) -> str:
+    """Поля заметок Anki - HTML: экранируем текст и сохраняем переносы строк."""
+    return html.escape(value or "").replace("\n", "<br>")
+
+
+class AnkiPackage:
+    """
+    Колода Anki во временном каталоге. Порядок работы: add_deck для каждого набора,
+    add_cards пачками, затем build собирает .apkg (читать его - iter_file); close удаляет временные файлы.
+    Все методы блокирующие - вызывать через run_in_threadpool.
+    """
+
+    def __init__(self):
+        self._directory = tempfile.mkdtemp(prefix="anki-export-")
+        self._path = os.path.join(self._directory, "collection.anki2")
+        self._db = sqlite3.connect(self._path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._now = int(time.time())
+        self._model_id = _stable_id("flashcards-model")
+        self._decks: dict[int, dict] = {}
+        self._due = 0
+
+    def add_deck(self, set_id: int, name: str, tags: Iterable[str]):
+        deck_id = _stable_id("flashcards-deck", set_id)
+        self._decks[set_id] = {
+            "id": deck_id, "name": name, "tags": " ".join(tag.replace(" ", "_") for tag in tags),
+        }
+
+    def add_cards(self, rows: Iterable[tuple]):
+        """rows - кортежи (id, set_id, term, definition, example, translation)."""
+        notes, cards = [], []
+        for card_id, set_id, term, definition, example, translation in rows:
+            deck = self._decks[set_id]
+            back = "<br>".join(_field(value) for value in (definition, example, translation) if value)
+            note_id = _stable_id("flashcards-note", card_id)
+            tags = f" {deck['tags']} " if deck["tags"] else ""
+            notes.append((
+                note_id, f"flashcards-{card_id}", self._model_id, self._now, -1, tags,
+                FIELD_SEPARATOR.join((_field(term), back)), term, _checksum(term), 0, "",
+            ))
+            self._due += 1
+            cards.append((
+                _stable_id("flashcards-card", card_id), note_id, deck["id"], 0, self._now, -1,
+                0, 0, self._due, 0, 0, 0, 0, 0, 0, 0, 0, "",
+            ))
+        self._db.executemany("INSERT INTO notes VALUES (?,?,?,?,?,?,?,?,?,?,?)", notes)
+        self._db.executemany("INSERT INTO cards VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", cards)
+
+    def _write_collection(self):
+        decks = {
+            "1": {"id": 1, "name": "Default", "conf": 1, "desc": "", "dyn": 0, "collapsed": False,
+                  "extendNew": 10, "extendRev": 50, "mod": self._now, "usn": 0,
+                  "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0], "timeToday": [0, 0]},
+        }
+        for deck in self._decks.values():
+            decks[str(deck["id"])] = {**decks["1"], "id": deck["id"], "name": deck["name"]}
+        model = {
+            "id": self._model_id, "name": "Flashcards Basic", "type": 0, "mod": self._now, "usn": -1, "sortf": 0,
+            "did": 1, "tags": [], "vers": [], "req": [[0, "all", [0]]],
+            "flds": [
+                {"name": name, "ord": ord_, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+                for ord_, name in enumerate(NOTE_FIELDS)
+            ],
+            "tmpls": [{
+                "name": "Card 1", "ord": 0, "qfmt": "{{Front}}", "afmt": "{{FrontSide}}<hr id=answer>{{Back}}",
+                "did": None, "bqfmt": "", "bafmt": "",
+            }],
+            "css": ".card { font-family: arial; font-size: 20px; text-align: center; }",
+            "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n", "latexPost": "\\end{document}",
+        }
+        conf = {
+            "nextPos": self._due + 1, "estTimes": True, "activeDecks": [1], "sortType": "noteFld", "timeLim": 0,
+            "sortBackwards": False, "addToCur": True, "curDeck": 1, "newSpread": 0, "dueCounts": True,
+            "curModel": str(self._model_id), "collapseTime": 1200,
+        }
+        self._db.execute(
+            "INSERT INTO col VALUES (1,?,?,?,11,0,0,0,?,?,?,?,?)",
+            (
+                self._now, self._now * 1000, self._now * 1000, json.dumps(conf),
+                json.dumps({str(self._model_id): model}), json.dumps(decks), json.dumps({"1": _DECK_CONFIG}), "{}",
+            ),
+        )
+        self._db.commit()
+        self._db.close()
+
+    def build(self) -> str:
+        """Дописывает коллекцию и упаковывает ее в .apkg; возвращает путь к файлу."""
+        self._write_collection()
+        package_path = os.path.join(self._directory, "deck.apkg")
+        with zipfile.ZipFile(package_path, "w", compression=zipfile.ZIP_DEFLATED) as package:
+            package.write(self._path, "collection.anki2")
+            package.writestr("media", "{}")
+        return package_path
+
+    @staticmethod
+    def iter_file(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with open(path, "rb") as package:
+            while chunk := package.read(chunk_size):
+                yield chunk
+
+    def close(self):
+        try:
+            self._db.close()
+        except sqlite3.ProgrammingError:
+            pass
+        shutil.rmtree(self._directory, ignore_errors=True)
@@ -1,67 +1,374 @@
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, func, delete
-from typing import List
+from sqlalchemy import and_, case, func, delete, insert, update
+from sqlalchemy.engine import Row
+from typing import List, Optional
+from app.core.pagination import decode_cursor, keyset_after
 from app.db.models import Card, CardSet
-from app.schemas.card import CardCreate, CardUpdate
+from app.schemas.card import (
+    CardCreate, CardUpdate, CardBatchOperation, CardBatchResult,
+    CardBatchCreate, CardBatchUpdate, CardBatchDelete, CardBatchMove,
+)
 
+CARD_TEXT_FIELDS = ("term", "definition", "example", "translation")
 
-async def get_cards_by_set(db: AsyncSession, set_id: int, skip: int, limit: int) -> List[Card]:
-    """Получает список карточек для набора с пагинацией."""
-    query = select(Card).where(Card.set_id == set_id).order_by(Card.order).offset(skip).limit(limit)
+# Карточки хранят разреженный порядок с шагом ORDER_STEP: перенос карточки между
+# двумя соседями пишет одну строку (середину промежутка), а не сдвигает весь набор.
+ORDER_STEP = 1024
+
+
+async def get_cards_by_set(
+        db: AsyncSession, set_id: int, skip: int, limit: int, cursor: Optional[str] = None
+) -> List[Card]:
+    """
+    Получает список карточек для набора с пагинацией.
+    Если передан cursor (ключ (order, id) последней карточки предыдущей страницы),
+    используется keyset-пагинация и skip игнорируется.
+    """
+    query = select(Card).where(Card.set_id == set_id)
+    if cursor:
+        order, card_id = decode_cursor(cursor, int, int)
+        query = query.where(keyset_after(db, (Card.order, Card.id), (order, card_id)))
+    else:
+        query = query.offset(skip)
+    query = query.order_by(Card.order, Card.id).limit(limit)
     result = await db.execute(query)
     return result.scalars().all()
 
 
+async def allocate_orders(db: AsyncSession, set_id: int, count: int = 1) -> List[int]:
+    """
+    Выделяет значения order для count новых карточек в конце набора.
+    Счетчик CardSet.next_order сдвигается одним UPDATE ... RETURNING: строка набора
+    блокируется до конца транзакции, поэтому параллельные запросы получают разные значения.
+    Тем же UPDATE увеличиваются CardSet.card_count (вызывающий обязан вставить ровно count карточек)
+    и CardSet.version.
+    """
+    result = await db.execute(
+        update(CardSet)
+        .where(CardSet.id == set_id)
+        .values(
+            next_order=CardSet.next_order + ORDER_STEP * count,
+            card_count=CardSet.card_count + count,
+            version=CardSet.version + 1,
+        )
+        .returning(CardSet.next_order)
+        .execution_options(synchronize_session=False)
+    )
+    last_order = result.scalar_one()
+    first_order = last_order - ORDER_STEP * (count - 1)
+    return [first_order + ORDER_STEP * position for position in range(count)]
+
+
+async def touch_set(db: AsyncSession, set_id: int, **values):
+    """
+    Увеличивает CardSet.version (по нему строятся ETag и ключи кеша ответов) и заодно
+    записывает values в строку набора. Вызывается при каждом изменении карточек набора.
+    """
+    await db.execute(
+        update(CardSet)
+        .where(CardSet.id == set_id)
+        .values(version=CardSet.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _raise_order_counter(db: AsyncSession, set_id: int, max_order: int):
+    """Подтягивает счетчик next_order, если карточку поставили дальше последнего выданного значения."""
+    await touch_set(
+        db, set_id, next_order=case((CardSet.next_order < max_order, max_order), else_=CardSet.next_order)
+    )
+
+
+async def _decrease_card_count(db: AsyncSession, set_id: int, count: int):
+    """Уменьшает CardSet.card_count после удаления карточек."""
+    await touch_set(db, set_id, card_count=CardSet.card_count - count)
+
+
 async def create_card(db: AsyncSession, card_data: CardCreate, set_id: int) -> Card:
     """Создает новую карточку в наборе."""
-    max_order_query = select(func.max(Card.order)).where(Card.set_id == set_id)
-    max_order_result = await db.execute(max_order_query)
-    max_order = max_order_result.scalar() or 0
+    (order,) = await allocate_orders(db, set_id)
 
-    new_card = Card(**card_data.dict(), set_id=set_id, order=max_order + 1)
-    db.add(new_card)
+    result = await db.execute(
+        insert(Card).values(**card_data.dict(), set_id=set_id, order=order).returning(Card)
+    )
+    new_card = result.scalars().one()
     await db.commit()
-    await db.refresh(new_card)
     return new_card
 
 
-async def update_card(db: AsyncSession, card_id: int, card_data: CardUpdate) -> Card:
-    """Обновляет данные одной карточки."""
-    card = await db.get(Card, card_id)
-    if card:
-        update_data = card_data.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(card, key, value)
-        await db.commit()
-        await db.refresh(card)
+async def get_card_ownership(db: AsyncSession, card_id: int) -> Row | None:
+    """
+    Находит набор и владельца карточки одним JOIN по первичным ключам.
+    :return: строка (id, set_id, owner_id) или None, если карточки нет
+    """
+    query = (
+        select(Card.id, Card.set_id, CardSet.owner_id)
+        .join(CardSet, CardSet.id == Card.set_id)
+        .where(Card.id == card_id)
+    )
+    result = await db.execute(query)
+    return result.first()
+
+
+async def update_card(db: AsyncSession, card_id: int, card_data: CardUpdate) -> Card | None:
+    """Обновляет данные одной карточки запросом UPDATE ... RETURNING и сдвигает версию ее набора."""
+    update_data = card_data.dict(exclude_unset=True)
+    if not update_data:
+        return await db.get(Card, card_id)
+
+    result = await db.execute(
+        update(Card).where(Card.id == card_id).values(**update_data).returning(Card)
+    )
+    card = result.scalars().one_or_none()
+    if card is not None:
+        await touch_set(db, card.set_id)
+    await db.commit()
     return card
 
 
 async def delete_card(db: AsyncSession, card_id: int) -> bool:
-    """Удаляет одну карточку."""
-    card = await db.get(Card, card_id)
-    if card:
-        await db.delete(card)
-        await db.commit()
-        return True
-    return False
+    """Удаляет одну карточку запросом DELETE ... RETURNING и уменьшает счетчик карточек ее набора."""
+    result = await db.execute(delete(Card).where(Card.id == card_id).returning(Card.set_id))
+    set_id = result.scalar_one_or_none()
+    if set_id is None:
+        return False
+    await _decrease_card_count(db, set_id, 1)
+    await db.commit()
+    return True
 
 
 async def update_card_order(db: AsyncSession, set_id: int, card_ids: List[int]):
-    """Обновляет порядок карточек в наборе."""
-    cards_query = select(Card).where(Card.set_id == set_id)
-    result = await db.execute(cards_query)
-    cards_map = {card.id: card for card in result.scalars().all()}
+    """
+    Обновляет порядок карточек в наборе одним запросом UPDATE ... CASE.
+    Строки, чья позиция не изменилась, не перезаписываются.
+    """
+    positions = {card_id: ORDER_STEP * (index + 1) for index, card_id in enumerate(card_ids)}
+    if not positions:
+        return
+    new_order = case(positions, value=Card.id)
+    await db.execute(
+        update(Card)
+        .where(Card.set_id == set_id, Card.id.in_(positions), Card.order != new_order)
+        .values(order=new_order)
+        .execution_options(synchronize_session=False)
+    )
+    await _raise_order_counter(db, set_id, max(positions.values()))
+    await db.commit()
+
+
+async def renumber_set(db: AsyncSession, set_id: int):
+    """
+    Заново раскладывает порядок карточек набора с шагом ORDER_STEP, сохраняя текущую сортировку.
+    Нужна, когда в разреженном порядке закончились промежутки. Коммит - на вызывающей стороне.
+    """
+    numbered = (
+        select(Card.id, (func.row_number().over(order_by=(Card.order, Card.id)) * ORDER_STEP).label("new_order"))
+        .where(Card.set_id == set_id)
+        .subquery()
+    )
+    await db.execute(
+        update(Card)
+        .where(Card.id == numbered.c.id, Card.order != numbered.c.new_order)
+        .values(order=numbered.c.new_order)
+        .execution_options(synchronize_session=False)
+    )
+    count_result = await db.execute(select(func.count(Card.id)).where(Card.set_id == set_id))
+    await _raise_order_counter(db, set_id, count_result.scalar() * ORDER_STEP)
+
+
+async def _neighbour_orders(db: AsyncSession, set_id: int, neighbour_ids: List[int]) -> dict[int, int]:
+    result = await db.execute(select(Card.id, Card.order).where(Card.set_id == set_id, Card.id.in_(neighbour_ids)))
+    return dict(result.all())
 
-    for index, card_id in enumerate(card_ids):
-        if card_id in cards_map:
-            cards_map[card_id].order = index
 
+async def _adjacent_card(
+        db: AsyncSession, set_id: int, card_id: int, key: tuple[int, int], below: bool = False
+) -> Row | None:
+    """
+    Ближайшая карточка набора после ключа (order, id) или, если below, перед ним; переносимая card_id
+    не считается. Диапазонный проход по индексу ix_cards_set_id_order с LIMIT 1.
+    """
+    sort = (Card.order.desc(), Card.id.desc()) if below else (Card.order, Card.id)
+    result = await db.execute(
+        select(Card.id, Card.order)
+        .where(Card.set_id == set_id, Card.id != card_id, keyset_after(db, (Card.order, Card.id), key, descending=below))
+        .order_by(*sort)
+        .limit(1)
+    )
+    return result.first()
+
+
+async def move_card(
+        db: AsyncSession, set_id: int, card_id: int, after_id: int | None, before_id: int | None
+) -> Card | None:
+    """
+    Переносит карточку между соседями after_id (станет перед ней) и before_id (станет после нее).
+    Если передан один сосед, второй - соседняя с ним карточка набора (или край набора).
+    Обычно пишет одну строку: новый order - середина промежутка между соседями.
+    Если промежуток исчерпан (или у соседей одинаковый order), набор перенумеровывается
+    (renumber_set) и расчет повторяется.
+    Пара соседей, которые не стоят рядом в этом порядке, отклоняется с 400.
+    :return: обновленная карточка или None, если карточка или соседи не найдены в наборе
+    """
+    neighbour_ids = [neighbour for neighbour in (after_id, before_id) if neighbour is not None]
+    if not neighbour_ids or card_id in neighbour_ids:
+        return None
+
+    for attempt in range(2):
+        orders = await _neighbour_orders(db, set_id, neighbour_ids)
+        if len(orders) != len(neighbour_ids):
+            return None
+
+        # Ключи сортировки (order, id) соседей; None - край набора
+        if after_id is not None:
+            lower = (orders[after_id], after_id)
+            following = await _adjacent_card(db, set_id, card_id, lower)
+            upper = (following.order, following.id) if following is not None else None
+            if before_id is not None and upper != (orders[before_id], before_id):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="after_id and before_id must be adjacent cards, after_id first",
+                )
+        else:
+            upper = (orders[before_id], before_id)
+            preceding = await _adjacent_card(db, set_id, card_id, upper, below=True)
+            lower = (preceding.order, preceding.id) if preceding is not None else None
+
+        if lower is None:
+            new_order = upper[0] - ORDER_STEP
+        elif upper is None:
+            new_order = lower[0] + ORDER_STEP
+        elif upper[0] - lower[0] > 1:
+            new_order = (lower[0] + upper[0]) // 2
+        elif attempt == 0:
+            # Промежуток между соседями исчерпан - раскладываем набор заново
+            await renumber_set(db, set_id)
+            continue
+        else:
+            return None
+        break
+
+    result = await db.execute(
+        update(Card)
+        .where(Card.id == card_id, Card.set_id == set_id)
+        .values(order=new_order)
+        .returning(Card)
+    )
+    card = result.scalars().one_or_none()
+    if card is not None:
+        await _raise_order_counter(db, set_id, new_order)
     await db.commit()
+    return card
 
 
 async def delete_all_cards_in_set(db: AsyncSession, set_id: int):
     """Удаляет все карточки в наборе."""
     await db.execute(delete(Card).where(Card.set_id == set_id))
-    await db.commit()
\ No newline at end of file
+    await touch_set(db, set_id, card_count=0)
+    await db.commit()
+
+
+async def apply_batch(db: AsyncSession, set_id: int, operations: List[CardBatchOperation]) -> List[CardBatchResult]:
+    """
+    Применяет пакет операций над карточками набора в одной транзакции.
+    Операции группируются по типу и выполняются по одному запросу на группу:
+    UPDATE ... SET col = CASE id ... END, DELETE ... WHERE id IN (...), многострочный INSERT.
+    Порядок групп: update, move, delete, create.
+    Операции над карточками, которых нет в наборе, не выполняются и помечаются ошибкой,
+    как и повторные операции над карточкой, уже затронутой этим пакетом (применяется первая).
+    update меняет только переданные поля.
+    """
+    results: List[CardBatchResult | None] = [None] * len(operations)
+
+    # Один запрос, чтобы узнать, какие из упомянутых карточек действительно лежат в этом наборе
+    referenced_ids = {op.id for op in operations if not isinstance(op, CardBatchCreate)}
+    existing_ids = set()
+    if referenced_ids:
+        existing_result = await db.execute(
+            select(Card.id).where(Card.set_id == set_id, Card.id.in_(referenced_ids))
+        )
+        existing_ids = set(existing_result.scalars().all())
+
+    updates: dict[int, dict] = {}
+    moves: dict[int, int] = {}
+    deletes: set[int] = set()
+    creates: list[tuple[int, CardBatchCreate]] = []
+
+    # Какая операция пакета первой затронула карточку: группы выполняются не в порядке запроса,
+    # поэтому две операции над одной карточкой не имеют однозначного результата
+    claimed_by: dict[int, int] = {}
+
+    for index, op in enumerate(operations):
+        if isinstance(op, CardBatchCreate):
+            creates.append((index, op))
+            continue
+        if op.id not in existing_ids:
+            results[index] = CardBatchResult(index=index, op=op.op, ok=False, id=op.id, error="Card not found in this set")
+            continue
+        if op.id in claimed_by:
+            results[index] = CardBatchResult(
+                index=index, op=op.op, ok=False, id=op.id,
+                error=f"Card is already changed by operation {claimed_by[op.id]} of this batch",
+            )
+            continue
+        claimed_by[op.id] = index
+        if isinstance(op, CardBatchUpdate):
+            updates[op.id] = op.dict(include=set(CARD_TEXT_FIELDS), exclude_unset=True)
+        elif isinstance(op, CardBatchMove):
+            moves[op.id] = op.order
+        elif isinstance(op, CardBatchDelete):
+            deletes.add(op.id)
+        results[index] = CardBatchResult(index=index, op=op.op, ok=True, id=op.id)
+
+    # CASE только по переданным полям; карточки, где поле не передано, сохраняют свое значение (else_)
+    changed_values = {}
+    for field in CARD_TEXT_FIELDS:
+        whens = {card_id: data[field] for card_id, data in updates.items() if field in data}
+        if whens:
+            changed_values[field] = case(whens, value=Card.id, else_=getattr(Card, field))
+    if changed_values:
+        changed_ids = [card_id for card_id, data in updates.items() if data]
+        await db.execute(
+            update(Card)
+            .where(Card.set_id == set_id, Card.id.in_(changed_ids))
+            .values(changed_values)
+            .execution_options(synchronize_session=False)
+        )
+        await touch_set(db, set_id)
+
+    if moves:
+        await db.execute(
+            update(Card)
+            .where(Card.set_id == set_id, Card.id.in_(moves))
+            .values(order=case(moves, value=Card.id))
+            .execution_options(synchronize_session=False)
+        )
+        await _raise_order_counter(db, set_id, max(moves.values()))
+
+    if deletes:
+        deleted = await db.execute(
+            delete(Card)
+            .where(Card.set_id == set_id, Card.id.in_(deletes))
+            .execution_options(synchronize_session=False)
+        )
+        await _decrease_card_count(db, set_id, deleted.rowcount)
+
+    if creates:
+        orders = await allocate_orders(db, set_id, len(creates))
+        values = [
+            {**op.dict(include=set(CARD_TEXT_FIELDS)), "set_id": set_id, "order": order}
+            for order, (_, op) in zip(orders, creates)
+        ]
+        # render_nulls: не разбивать пачку на несколько INSERT из-за пустых необязательных полей.
+        # ID сопоставляем с операциями по выданному order - он уникален внутри пачки.
+        created = await db.execute(
+            insert(Card).returning(Card.id, Card.order).execution_options(render_nulls=True), values
+        )
+        id_by_order = {order: card_id for card_id, order in created.all()}
+        for order, (index, op) in zip(orders, creates):
+            results[index] = CardBatchResult(index=index, op=op.op, ok=True, id=id_by_order[order])
+
+    await db.commit()
+    return results
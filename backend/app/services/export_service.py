@@ -0,0 +1,219 @@
+import csv
+import io
+from urllib.parse import quote
+from enum import Enum
+from typing import AsyncIterator, Dict, Optional
+
+import orjson
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from app.core.compression import compress_stream, negotiate_encoding
+
+from app.db.models import Card, CardSet, Tag, card_set_tags_association
+from app.services.anki_package import AnkiPackage
+
+# Сколько строк карточек читать из курсора и кодировать за один шаг
+EXPORT_BATCH_SIZE = 1000
+
+SET_COLUMNS = (
+    CardSet.id, CardSet.name, CardSet.description, CardSet.is_public, CardSet.created_at,
+    CardSet.owner_id, CardSet.folder_id, CardSet.card_count, CardSet.version,
+)
+CARD_COLUMNS = (Card.id, Card.term, Card.definition, Card.example, Card.translation, Card.order, Card.set_id)
+
+
+async def load_set_payload(db: AsyncSession, set_id: int) -> Optional[dict]:
+    """
+    Заголовок выгрузки GET /sets/{id}/full: строка набора с тегами (поля как у CardSetRead) или None.
+    Читается до начала ответа, чтобы удаленный набор дал 404, а не оборванное тело с кодом 200.
+    """
+    set_row = (await db.execute(select(*SET_COLUMNS).where(CardSet.id == set_id))).mappings().one_or_none()
+    if set_row is None:
+        return None
+    tags = await db.execute(
+        select(Tag.id, Tag.name)
+        .join(card_set_tags_association, card_set_tags_association.c.tag_id == Tag.id)
+        .where(card_set_tags_association.c.card_set_id == set_id)
+    )
+    return {**set_row, "tags": [{"id": tag_id, "name": name} for tag_id, name in tags.all()]}
+
+
+async def stream_set_json(session_factory: async_sessionmaker, set_payload: dict) -> AsyncIterator[bytes]:
+    """
+    Отдает набор целиком как JSON {"set": {...}, "cards": [...]} по частям; set_payload - из load_set_payload.
+    Выбираются только нужные колонки (кортежи, без ORM-объектов и Pydantic), карточки читаются
+    потоково по EXPORT_BATCH_SIZE и кодируются orjson. Поля совпадают с CardSetRead и CardRead.
+    Сессия открывается здесь, а не берется из зависимости: зависимости FastAPI закрываются
+    до того, как начнет отправляться тело StreamingResponse.
+    """
+    yield b'{"set":' + orjson.dumps(set_payload, option=orjson.OPT_UTC_Z) + b',"cards":['
+    async with session_factory() as db:
+        keys = [column.key for column in CARD_COLUMNS]
+        result = await db.stream(
+            select(*CARD_COLUMNS)
+            .where(Card.set_id == set_payload["id"])
+            .order_by(Card.order, Card.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        first = True
+        async for rows in result.partitions():
+            # Один orjson.dumps на пачку: внешние скобки списка срезаем, пачки склеиваем запятой
+            encoded = orjson.dumps([dict(zip(keys, row)) for row in rows])[1:-1]
+            if encoded:
+                yield encoded if first else b"," + encoded
+                first = False
+    yield b"]}"
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    ANKI = "apkg"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.JSONL: "application/x-ndjson",
+    ExportFormat.ANKI: "application/zip",
+}
+
+def export_response(
+        request: Request, body: AsyncIterator[bytes], fmt: ExportFormat, name: str, fallback_name: str,
+) -> StreamingResponse:
+    """
+    Потоковый ответ-файл выгрузки. Текстовые форматы сжимаются по Accept-Encoding, zip (.apkg) уже сжат.
+    Content-Disposition содержит название в UTF-8 (filename*, RFC 5987) и ASCII-запасное для старых клиентов.
+    """
+    extension = fmt.value
+    headers = {
+        "Content-Disposition": f'attachment; filename="{fallback_name}.{extension}"; '
+                               f"filename*=UTF-8''{quote(name)}.{extension}",
+    }
+    encoding = None
+    if fmt != ExportFormat.ANKI:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(compress_stream(body, encoding), media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
+
+
+# Колонки выгрузки: совпадают с полями импорта (import_service.CARD_FIELDS), поэтому выгрузку набора
+# можно загрузить обратно. В выгрузке папки первой идет колонка set - название набора
+EXPORT_FIELDS = ("term", "definition", "example", "translation")
+EXPORT_COLUMNS = (Card.id, Card.set_id, Card.term, Card.definition, Card.example, Card.translation)
+
+
+async def _load_sets(db: AsyncSession, condition) -> Dict[int, dict]:
+    """Названия и теги выгружаемых наборов: id -> {"name", "tags"}. Наборов мало, в отличие от карточек."""
+    rows = await db.execute(select(CardSet.id, CardSet.name).where(condition).order_by(CardSet.id))
+    sets = {set_id: {"name": name, "tags": []} for set_id, name in rows.all()}
+    if sets:
+        tags = await db.execute(
+            select(card_set_tags_association.c.card_set_id, Tag.name)
+            .join(Tag, Tag.id == card_set_tags_association.c.tag_id)
+            .where(card_set_tags_association.c.card_set_id.in_(sets))
+        )
+        for set_id, name in tags.all():
+            sets[set_id]["tags"].append(name)
+    return sets
+
+
+async def _card_batches(db: AsyncSession, set_ids) -> AsyncIterator[list]:
+    """Карточки наборов через серверный курсор, пачками по EXPORT_BATCH_SIZE, по порядку наборов и карточек."""
+    result = await db.stream(
+        select(*EXPORT_COLUMNS)
+        .where(Card.set_id.in_(set_ids))
+        .order_by(Card.set_id, Card.order, Card.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield rows
+
+
+async def _encode_csv(sets: Dict[int, dict], batches: AsyncIterator[list], with_set: bool) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM - чтобы Excel распознал UTF-8; импорт его пропускает
+    writer.writerow((("set",) if with_set else ()) + EXPORT_FIELDS)
+    yield ("\ufeff" + buffer.getvalue()).encode()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for _, set_id, *fields in rows:
+            writer.writerow(([sets[set_id]["name"]] if with_set else []) + [value or "" for value in fields])
+        yield buffer.getvalue().encode()
+
+
+async def _encode_jsonl(sets: Dict[int, dict], batches: AsyncIterator[list], with_set: bool) -> AsyncIterator[bytes]:
+    async for rows in batches:
+        lines = []
+        for _, set_id, *fields in rows:
+            card = {key: value for key, value in zip(EXPORT_FIELDS, fields) if value is not None}
+            if with_set:
+                card = {"set": sets[set_id]["name"], **card}
+            lines.append(orjson.dumps(card))
+        yield b"\n".join(lines) + b"\n"
+
+
+async def _encode_anki(sets: Dict[int, dict], batches: AsyncIterator[list], with_set: bool) -> AsyncIterator[bytes]:
+    """
+    Колода Anki: по подколоде на набор. SQLite-база пишется во временный файл пачками,
+    поэтому первый байт уходит только после чтения последней карточки, но память по-прежнему ограничена.
+    """
+    package = await run_in_threadpool(AnkiPackage)
+    try:
+        for set_id, card_set in sets.items():
+            package.add_deck(set_id, card_set["name"], card_set["tags"])
+        async for rows in batches:
+            await run_in_threadpool(package.add_cards, rows)
+        path = await run_in_threadpool(package.build)
+        async for chunk in iterate_in_threadpool(AnkiPackage.iter_file(path)):
+            yield chunk
+    finally:
+        await run_in_threadpool(package.close)
+
+
+_ENCODERS = {
+    ExportFormat.CSV: _encode_csv,
+    ExportFormat.JSONL: _encode_jsonl,
+    ExportFormat.ANKI: _encode_anki,
+}
+
+
+async def _stream_export(session_factory: async_sessionmaker, condition, fmt: ExportFormat, with_set: bool,
+                         deck_prefix: str = "") -> AsyncIterator[bytes]:
+    """Общая часть выгрузок. Сессия своя: зависимости FastAPI закрываются до отправки тела ответа."""
+    async with session_factory() as db:
+        sets = await _load_sets(db, condition)
+        if fmt == ExportFormat.ANKI and deck_prefix:
+            # В Anki "Папка::Набор" - подколода набора внутри колоды папки
+            for card_set in sets.values():
+                card_set["name"] = f"{deck_prefix}::{card_set['name']}"
+        async for chunk in _ENCODERS[fmt](sets, _card_batches(db, list(sets)), with_set):
+            yield chunk
+
+
+def stream_set_export(session_factory: async_sessionmaker, set_id: int, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Выгрузка карточек набора в CSV, JSONL или колоду Anki.
+    Карточки читаются серверным курсором и кодируются пачками: CSV и JSONL начинают отправляться
+    после первой пачки, память ограничена EXPORT_BATCH_SIZE строк. Права проверяет вызывающий.
+    """
+    return _stream_export(session_factory, CardSet.id == set_id, fmt, with_set=False)
+
+
+def stream_folder_export(
+        session_factory: async_sessionmaker, folder_id: int, folder_name: str, user_id: int, fmt: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка всех доступных пользователю наборов папки (своих и публичных) одним файлом.
+    В CSV и JSONL у каждой карточки есть колонка set, в Anki каждый набор - подколода "Папка::Набор".
+    """
+    condition = (CardSet.folder_id == folder_id) & or_(CardSet.owner_id == user_id, CardSet.is_public == True)
+    return _stream_export(session_factory, condition, fmt, with_set=True, deck_prefix=folder_name)
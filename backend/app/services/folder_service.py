@@ -1,45 +1,48 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import delete, or_
+from datetime import datetime
+from typing import Optional
 
-from app.db.models import Folder, CardSet
+from app.db.models import Folder
 from app.schemas.folder import FolderCreate, FolderUpdate, FolderRead
+from app.core.pagination import decode_cursor, keyset_after
+from app.services import search_service, tag_service
 from fastapi import HTTPException, status
 
-async def get_folders(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 20, search: str = ""):
-    """Получает список папок с пагинацией, поиском и подсчетом наборов."""
+async def get_folders(
+        db: AsyncSession, user_id: int, skip: int = 0, limit: int = 20, search: str = "", cursor: Optional[str] = None
+):
+    """
+    Получает список папок с пагинацией и поиском.
+    Если передан cursor (ключ (created_at, id) последней папки предыдущей страницы),
+    используется keyset-пагинация и skip игнорируется.
+    Результаты поиска (search) отсортированы по релевантности и листаются только через skip.
+    """
 
-    # Подзапрос для подсчета наборов в каждой папке
-    set_count_subq = (
-        select(CardSet.folder_id, func.count(CardSet.id).label("set_count"))
-        .group_by(CardSet.folder_id)
-        .subquery()
+    # Основной запрос на получение папок: set_count хранится в самой папке
+    query = select(Folder).where(
+        # Условие доступа: папка принадлежит пользователю ИЛИ она публичная
+        or_(Folder.owner_id == user_id, Folder.is_public == True)
     )
 
-    # Основной запрос на получение папок
-    query = (
-        select(Folder, func.coalesce(set_count_subq.c.set_count, 0).label("set_count"))
-        .outerjoin(set_count_subq, Folder.id == set_count_subq.c.folder_id)
-        .where(
-            # Условие доступа: папка принадлежит пользователю ИЛИ она публичная
-            or_(Folder.owner_id == user_id, Folder.is_public == True)
+    # Если есть поисковый запрос, ищем по триграммному индексу (на PostgreSQL) и сортируем по релевантности
+    if search:
+        query = query.where(search_service.name_matches(Folder.name, search)).order_by(
+            search_service.name_rank(Folder.name, search).desc()
         )
-    )
 
-    # Если есть поисковый запрос, добавляем фильтр по имени
-    if search:
-        query = query.where(Folder.name.ilike(f"%{search}%"))
+    # Keyset-пагинация: продолжаем строго после последней папки предыдущей страницы.
+    # Для поиска курсор по (created_at, id) не подходит - там сортировка по релевантности.
+    if cursor and not search:
+        created_at, folder_id = decode_cursor(cursor, datetime, int)
+        query = query.where(keyset_after(db, (Folder.created_at, Folder.id), (created_at, folder_id), descending=True))
+    else:
+        query = query.offset(skip)
 
     # Сортировка, пагинация и выполнение запроса
-    result = await db.execute(query.order_by(Folder.created_at.desc()).offset(skip).limit(limit))
-
-    # Преобразуем результат в нужный формат
-    folders_with_counts = []
-    for folder, count in result.all():
-        folder.set_count = count  # Добавляем вычисленное поле
-        folders_with_counts.append(folder)
-
-    return folders_with_counts
+    result = await db.execute(query.order_by(Folder.created_at.desc(), Folder.id.desc()).limit(limit))
+    return result.scalars().all()
 
 
 async def get_folder_by_id(
@@ -74,10 +77,9 @@ async def delete_folder_by_id(
 
     if not folder:
         return False
-    # Удаляем экземпляр
-    await db.delete(folder)
-    # Флашим изменения и коммитим транзакцию
-    await db.flush()
+    # Удаляем папку одним DELETE: наборы, их карточки и связи с тегами удаляет база (ON DELETE CASCADE)
+    await tag_service.release_folder_tags(db, folder_id)
+    await db.execute(delete(Folder).where(Folder.id == folder_id).execution_options(synchronize_session=False))
     await db.commit()
     return True
 
@@ -88,8 +90,6 @@ async def create_folder(db: AsyncSession, folder: FolderCreate, user_id: int):
     db.add(db_folder)
     await db.commit()
     await db.refresh(db_folder)
-    # После создания у папки еще нет наборов
-    db_folder.set_count = 0
     return db_folder
 
 
@@ -106,11 +106,6 @@ async def update_folder(db: AsyncSession, folder_id: int, folder_update: FolderU
 
     await db.commit()
     await db.refresh(folder)
-
-    # После обновления нам нужно заново посчитать количество наборов
-    count_result = await db.execute(select(func.count(CardSet.id)).where(CardSet.folder_id == folder_id))
-    folder.set_count = count_result.scalar() or 0
-
     return folder
 
 
@@ -121,8 +116,7 @@ async def delete_folder(db: AsyncSession, folder_id: int, user_id: int):
         return False  # Папка не найдена или нет прав
 
     # Проверка на пустоту папки на бэкенде
-    count_result = await db.execute(select(func.count(CardSet.id)).where(CardSet.folder_id == folder_id))
-    if (count_result.scalar() or 0) > 0:
+    if folder.set_count > 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete a folder that contains card sets.",
@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+from enum import Enum
+from itertools import islice
+from typing import Awaitable, BinaryIO, Callable, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.database import set_statement_timeout
+from app.db.models import Card
+from app.schemas.card import CardCreate, CardImportResult, CardImportRowError
+from app.services import card_service
+
+# Сколько строк валидируем и вставляем за один раз. Память ограничена размером чанка, а не файла.
+IMPORT_CHUNK_SIZE = 1000
+# Отчет об ошибках тоже ограничен, иначе битый файл на миллион строк раздует ответ
+MAX_REPORTED_ERRORS = 1000
+
+CARD_FIELDS = ("term", "definition", "example", "translation")
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    TSV = "tsv"
+    JSONL = "jsonl"
+
+
+def detect_format(filename: Optional[str]) -> Optional[ImportFormat]:
+    """Определяет формат файла по расширению."""
+    if not filename or "." not in filename:
+        return None
+    extension = filename.rsplit(".", 1)[1].lower()
+    if extension == "txt":
+        return ImportFormat.TSV
+    if extension == "ndjson":
+        return ImportFormat.JSONL
+    try:
+        return ImportFormat(extension)
+    except ValueError:
+        return None
+
+
+def _iter_delimited(text: io.TextIOBase, delimiter: str) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Построчно читает CSV/TSV. Если первая строка - заголовок из названий полей карточки,
+    колонки сопоставляются по нему, иначе по порядку: term, definition, example, translation.
+    """
+    reader = csv.reader(text, delimiter=delimiter)
+    columns = CARD_FIELDS
+    first = True
+    for values in reader:
+        row_number = reader.line_num
+        if first:
+            first = False
+            header = [value.strip().lower() for value in values]
+            if "term" in header and set(header) <= set(CARD_FIELDS):
+                columns = tuple(header)
+                continue
+        if not any(value.strip() for value in values):
+            continue
+        yield row_number, {key: value for key, value in zip(columns, values) if value}, None
+
+
+def _iter_jsonl(text: io.TextIOBase) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Построчно читает JSON Lines: один объект карточки на строку."""
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, {key: data[key] for key in CARD_FIELDS if key in data}, None
+
+
+def iter_rows(fileobj: BinaryIO, fmt: ImportFormat) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Потоково разбирает загруженный файл.
+    Отдает кортежи (номер строки, данные карточки или None, ошибка разбора или None).
+    """
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        if fmt == ImportFormat.JSONL:
+            yield from _iter_jsonl(text)
+        else:
+            yield from _iter_delimited(text, delimiter="\t" if fmt == ImportFormat.TSV else ",")
+    finally:
+        # Не закрываем исходный файл вместе с оберткой - им владеет UploadFile
+        text.detach()
+
+
+def _format_validation_error(error: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+
+async def _insert_chunk(db: AsyncSession, values: list[dict]):
+    """Вставляет пачку карточек: COPY на asyncpg, многострочный INSERT на остальных драйверах."""
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        columns = (*CARD_FIELDS, "order", "set_id")
+        await raw_connection.driver_connection.copy_records_to_table(
+            Card.__tablename__,
+            records=[tuple(row[column] for column in columns) for row in values],
+            columns=columns,
+        )
+    else:
+        # render_nulls: не разбивать пачку на несколько INSERT из-за пустых необязательных полей
+        await db.execute(insert(Card).execution_options(render_nulls=True), values)
+
+
+async def import_cards(
+        db: AsyncSession, set_id: int, fileobj: BinaryIO, fmt: ImportFormat,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> CardImportResult:
+    """
+    Импортирует карточки из файла в набор одной транзакцией.
+    Строки валидируются по лимитам CardCreate чанками по IMPORT_CHUNK_SIZE,
+    порядок (order) назначается подряд после последней карточки набора (card_service.allocate_orders).
+    on_progress (фоновый импорт) получает число обработанных строк после каждого чанка.
+    """
+    # Импорт большого файла - одна длинная транзакция: обычного statement_timeout ей мало
+    await set_statement_timeout(db, settings.DB_LONG_STATEMENT_TIMEOUT_MS)
+    rows = iter_rows(fileobj, fmt)
+    imported = 0
+    failed = 0
+    errors: list[CardImportRowError] = []
+
+    def report(row_number: int, messages: list[str]):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(CardImportRowError(row=row_number, errors=messages))
+
+    while True:
+        # Чтение и разбор файла - блокирующие операции, выносим их из event loop
+        chunk = await run_in_threadpool(lambda: list(islice(rows, IMPORT_CHUNK_SIZE)))
+        if not chunk:
+            break
+
+        cards = []
+        for row_number, data, parse_error in chunk:
+            if parse_error:
+                report(row_number, [parse_error])
+                continue
+            try:
+                card = CardCreate.model_validate(data)
+            except ValidationError as e:
+                report(row_number, _format_validation_error(e))
+                continue
+            cards.append(card)
+
+        if cards:
+            orders = await card_service.allocate_orders(db, set_id, len(cards))
+            values = [{**card.dict(), "set_id": set_id, "order": order} for card, order in zip(cards, orders)]
+            await _insert_chunk(db, values)
+            imported += len(values)
+
+        if on_progress:
+            await on_progress(imported + failed)
+
+    await db.commit()
+    return CardImportResult(imported=imported, failed=failed, errors=errors)
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Awaitable, BinaryIO, Callable, Dict, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import CardSet, Job
+from app.services import import_service, set_service
+
+logger = logging.getLogger(__name__)
+
+jobs_succeeded = metrics.counter("jobs_succeeded_total", "Background jobs finished successfully")
+jobs_failed = metrics.counter("jobs_failed_total", "Background jobs finished with an error")
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobKind(str, Enum):
+    DELETE_SET = "delete_set"
+    IMPORT_CARDS = "import_cards"
+    CLONE_SET = "clone_set"
+
+
+@dataclass
+class JobContext:
+    """То, что получает обработчик задачи: ее параметры и фабрика сессий (у задачи свои транзакции)."""
+    job_id: int
+    owner_id: int
+    payload: dict
+    session_factory: async_sessionmaker
+
+    async def progress(self, done: int, total: Optional[int] = None):
+        """Записывает прогресс отдельной короткой транзакцией, чтобы GET /jobs/{id} видел его сразу."""
+        values = {"progress": done, "heartbeat_at": _now()}
+        if total is not None:
+            values["total"] = total
+        async with self.session_factory() as db:
+            await db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            await db.commit()
+
+
+JobHandler = Callable[[JobContext], Awaitable[Optional[dict]]]
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: JobKind):
+    """Регистрирует обработчик задач вида kind. Его результат (dict) сохраняется в Job.result."""
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[kind.value] = handler
+        return handler
+    return register
+
+
+def spool_file(fileobj: BinaryIO, suffix: str = "") -> str:
+    """
+    Копирует файл в JOB_SPOOL_DIR, откуда его прочитает задача (загруженный файл импорта), и возвращает путь.
+    Блокирующая функция: из обработчиков запросов вызывать через run_in_threadpool.
+    """
+    directory = settings.JOB_SPOOL_DIR or os.path.join(tempfile.gettempdir(), "flashcards-jobs")
+    os.makedirs(directory, exist_ok=True)
+    handle, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    with os.fdopen(handle, "wb") as spooled:
+        shutil.copyfileobj(fileobj, spooled)
+    return path
+
+
+async def enqueue(db: AsyncSession, kind: JobKind, owner_id: int, payload: dict, total: Optional[int] = None) -> Job:
+    """Ставит задачу в очередь (commit) и будит исполнителя этого процесса."""
+    job = Job(kind=kind.value, owner_id=owner_id, payload=payload, total=total, status=JobStatus.QUEUED.value)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    runner.notify()
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int, user_id: int) -> Optional[Job]:
+    """Задача пользователя по id; чужие задачи не видны."""
+    job = await db.get(Job, job_id)
+    if job is None or job.owner_id != user_id:
+        return None
+    return job
+
+
+def _now() -> datetime:
+    # Отметки жизни и граница аренды - по часам исполнителей, чтобы сравнивать значения из одного источника
+    return datetime.now(timezone.utc)
+
+
+def _abandoned(now: datetime):
+    """Задача в running, исполнитель которой не отмечался дольше аренды (для старых строк - от started_at)."""
+    lease_started = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    return and_(
+        Job.status == JobStatus.RUNNING.value,
+        func.coalesce(Job.heartbeat_at, Job.started_at) < lease_started,
+    )
+
+
+async def _claim_next(session_factory: async_sessionmaker) -> Optional[tuple]:
+    """
+    Забирает самую старую задачу из очереди одним UPDATE ... WHERE status = 'queued' RETURNING.
+    Брошенные задачи (running с истекшей арендой) забираются так же, если у них остались попытки,
+    иначе становятся failed.
+    На PostgreSQL подзапрос берет строку с FOR UPDATE SKIP LOCKED, поэтому несколько воркеров
+    не получают одну задачу и не ждут друг друга.
+    """
+    now = _now()
+    async with session_factory() as db:
+        exhausted = await db.execute(
+            update(Job)
+            .where(_abandoned(now), Job.attempts >= settings.JOB_MAX_ATTEMPTS)
+            .values(
+                status=JobStatus.FAILED.value, finished_at=func.now(),
+                error=f"The worker running this job stopped {settings.JOB_MAX_ATTEMPTS} times",
+            )
+        )
+        if exhausted.rowcount:
+            logger.warning("%s abandoned job(s) failed after %s attempts", exhausted.rowcount, settings.JOB_MAX_ATTEMPTS)
+            jobs_failed.inc(exhausted.rowcount)
+
+        claimable = or_(Job.status == JobStatus.QUEUED.value, _abandoned(now))
+        candidate = select(Job.id).where(claimable).order_by(Job.id).limit(1)
+        if db.get_bind().dialect.name == "postgresql":
+            candidate = candidate.with_for_update(skip_locked=True)
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == candidate.scalar_subquery(), claimable)
+            .values(status=JobStatus.RUNNING.value, started_at=func.now(), heartbeat_at=now, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.kind, Job.owner_id, Job.payload)
+        )
+        claimed = result.first()
+        await db.commit()
+        return claimed
+
+
+async def _heartbeat(session_factory: async_sessionmaker, job_id: int):
+    """Отмечает задачу живой раз в треть аренды, пока ее не отменят."""
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        try:
+            async with session_factory() as db:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == JobStatus.RUNNING.value)
+                    .values(heartbeat_at=_now())
+                )
+                await db.commit()
+        except Exception:
+            # Например, SQLite занят долгой транзакцией самой задачи; попробуем в следующий раз
+            logger.warning("Could not record a heartbeat for job %s", job_id, exc_info=True)
+
+
+async def _finish(session_factory: async_sessionmaker, job_id: int, status: JobStatus, **values):
+    async with session_factory() as db:
+        finished_at = None if status == JobStatus.QUEUED else func.now()
+        await db.execute(
+            update(Job).where(Job.id == job_id).values(status=status.value, finished_at=finished_at, **values)
+        )
+        await db.commit()
+
+
+async def run_job(session_factory: async_sessionmaker, job_id: int, kind: str, owner_id: int, payload: dict):
+    """
+    Выполняет задачу и записывает итог. Ошибка обработчика делает задачу failed.
+    При штатной остановке процесса (отмена) задача сразу возвращается в очередь.
+    Если процесс убит (SIGKILL, OOM), задача остается running, пока не истечет аренда
+    JOB_LEASE_SECONDS, затем ее забирает другой исполнитель - не более JOB_MAX_ATTEMPTS запусков.
+    Поэтому обработчики должны переживать повторный запуск.
+    """
+    handler = _handlers.get(kind)
+    if handler is None:
+        await _finish(session_factory, job_id, JobStatus.FAILED, error=f"Unknown job kind: {kind}")
+        jobs_failed.inc()
+        return
+
+    context = JobContext(job_id=job_id, owner_id=owner_id, payload=payload, session_factory=session_factory)
+    heartbeat = asyncio.create_task(_heartbeat(session_factory, job_id))
+    try:
+        try:
+            result = await handler(context)
+        finally:
+            heartbeat.cancel()
+    except asyncio.CancelledError:
+        # Штатная остановка не тратит попытку
+        await asyncio.shield(_finish(
+            session_factory, job_id, JobStatus.QUEUED, started_at=None, heartbeat_at=None, attempts=Job.attempts - 1,
+        ))
+        raise
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job_id, kind)
+        await _finish(session_factory, job_id, JobStatus.FAILED, error=str(e) or type(e).__name__)
+        jobs_failed.inc()
+    else:
+        await _finish(session_factory, job_id, JobStatus.SUCCEEDED, result=result)
+        jobs_succeeded.inc()
+
+
+class JobRunner:
+    """
+    Исполнитель фоновых задач внутри процесса: concurrency циклов, которые забирают задачи из таблицы jobs.
+    Задачи своего процесса стартуют сразу (notify), чужие - не позже чем через poll_seconds.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, concurrency: int, poll_seconds: float):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while True:
+            # Сбрасываем событие до проверки очереди, чтобы не пропустить задачу, поставленную в этот момент
+            self._wakeup.clear()
+            try:
+                claimed = await _claim_next(self.session_factory)
+            except Exception:
+                logger.exception("Could not fetch the next job")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await run_job(self.session_factory, *claimed)
+
+
+# Исполнитель этого процесса: запускается в startup приложения (JOB_RUNNER_ENABLED) или в app.worker
+runner = JobRunner(AsyncSessionLocal, concurrency=settings.JOB_CONCURRENCY, poll_seconds=settings.JOB_POLL_SECONDS)
+
+
+# --- Обработчики задач ---
+
+@job_handler(JobKind.DELETE_SET)
+async def _delete_set(context: JobContext) -> dict:
+    async with context.session_factory() as db:
+        deleted = await set_service.purge_set(
+            db, context.payload["set_id"], batch_size=settings.JOB_DELETE_BATCH_SIZE, on_progress=context.progress
+        )
+    return {"set_id": context.payload["set_id"], "deleted_cards": deleted}
+
+
+@job_handler(JobKind.CLONE_SET)
+async def _clone_set(context: JobContext) -> dict:
+    # Права проверены при постановке задачи, clone_set проверяет их еще раз на момент выполнения
+    async with context.session_factory() as db:
+        cloned = await set_service.clone_set(
+            db, context.payload["set_id"], user_id=context.owner_id,
+            folder_id=context.payload["folder_id"], name=context.payload.get("name"),
+        )
+    if cloned is None:
+        raise LookupError("Card Set or folder not found or access denied")
+    await context.progress(cloned.card_count)
+    return {"set_id": cloned.id, "card_count": cloned.card_count}
+
+
+@job_handler(JobKind.IMPORT_CARDS)
+async def _import_cards(context: JobContext) -> dict:
+    path = context.payload["path"]
+    try:
+        async with context.session_factory() as db:
+            if await db.get(CardSet, context.payload["set_id"]) is None:
+                raise LookupError("Card Set not found")
+            # Импорт - одна транзакция. SQLite допускает одного писателя, и пока она открыта,
+            # прогресс из другой транзакции не записать - там обходимся без него
+            on_progress = context.progress if db.get_bind().dialect.name != "sqlite" else None
+            with open(path, "rb") as fileobj:
+                result = await import_service.import_cards(
+                    db, set_id=context.payload["set_id"], fileobj=fileobj,
+                    fmt=import_service.ImportFormat(context.payload["format"]), on_progress=on_progress,
+                )
+    except asyncio.CancelledError:
+        raise  # Задача вернется в очередь, файл еще понадобится
+    except Exception:
+        _discard(path)
+        raise
+    _discard(path)
+    return result.model_dump(mode="json")
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,176 @@
+import html
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, literal, literal_column, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.models import Card, CardSet, card_search_document
+from app.schemas.search import CardSearchHit
+
+# Порог схожести, как у pg_trgm по умолчанию (pg_trgm.similarity_threshold)
+SIMILARITY_THRESHOLD = 0.3
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# Сколько слов запроса учитываем при поиске по карточкам
+MAX_QUERY_WORDS = 8
+# Слова короче ищутся как префикс почти всех карточек ('a:*') - такие слова отбрасываем
+MIN_WORD_LENGTH = 3
+# Сколько совпадений ранжируется: глубже этой границы выдача не листается
+SEARCH_CANDIDATES = 1000
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+
+
+def escape_like(value: str) -> str:
+    """Экранирует спецсимволы LIKE, чтобы поисковая строка искалась буквально."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@lru_cache(maxsize=4096)
+def trigrams(text: str) -> frozenset:
+    """
+    Набор триграмм строки по правилам pg_trgm: строка приводится к нижнему регистру,
+    бьется на слова, каждое слово дополняется двумя пробелами слева и одним справа.
+    """
+    result = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def trigram_similarity(left: str | None, right: str | None) -> float:
+    """Чисто питоновский аналог pg_trgm similarity(): доля общих триграмм."""
+    if not left or not right:
+        return 0.0
+    left_trigrams, right_trigrams = trigrams(left), trigrams(right)
+    union = len(left_trigrams | right_trigrams)
+    return len(left_trigrams & right_trigrams) / union if union else 0.0
+
+
+def register_sqlite_functions(dbapi_connection):
+    """
+    Регистрирует similarity() в SQLite, чтобы ранжированный поиск работал в тестовых прогонах
+    теми же запросами, что и на PostgreSQL с pg_trgm. Индекса за этим нет: в SQLite поиск
+    по названию - полный просмотр таблицы с построчным вызовом функции.
+    """
+    dbapi_connection.create_function("similarity", 2, trigram_similarity, deterministic=True)
+
+
+def name_matches(column, query: str) -> ColumnElement:
+    """
+    Условие поиска по названию. На PostgreSQL его обслуживает GIN-индекс gin_trgm_ops,
+    поэтому ведущий % не приводит к полному сканированию. В SQLite индекса нет - это полный просмотр.
+    """
+    return column.ilike(f"%{escape_like(query)}%", escape="\\")
+
+
+def name_rank(column, query: str) -> ColumnElement:
+    """Релевантность найденного названия: чем больше общих триграмм с запросом, тем выше."""
+    return func.similarity(column, query)
+
+
+def query_words(query: str) -> List[str]:
+    """Слова поискового запроса: только буквы и цифры, в нижнем регистре, не короче MIN_WORD_LENGTH."""
+    return [word for word in _WORD_RE.findall(query.lower()) if len(word) >= MIN_WORD_LENGTH][:MAX_QUERY_WORDS]
+
+
+def _prefix_tsquery(words: List[str]) -> ColumnElement:
+    """tsquery с префиксным совпадением каждого слова: 'сло:* & запр:*'."""
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{word}:*" for word in words))
+
+
+def _sql_html_escape(column) -> ColumnElement:
+    return func.replace(func.replace(func.replace(column, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+
+def _pg_headline(column, tsquery) -> ColumnElement:
+    options = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, HighlightAll=true"
+    return func.ts_headline(literal_column("'simple'::regconfig"), _sql_html_escape(column), tsquery, options)
+
+
+def highlight(text: Optional[str], words: List[str]) -> Optional[str]:
+    """Питоновская подсветка для SQLite: оборачивает слова, начинающиеся с искомых префиксов."""
+    if text is None:
+        return None
+    escaped = html.escape(text, quote=False)
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")[^\W_]*", re.IGNORECASE)
+    return pattern.sub(lambda match: f"{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_STOP}", escaped)
+
+
+async def search_cards(
+        db: AsyncSession, user_id: int, query: str, limit: int = 20, offset: int = 0
+) -> List[CardSearchHit]:
+    """
+    Ищет карточки по term / definition / translation в наборах пользователя и в публичных наборах.
+    На PostgreSQL совпадения берутся по GIN-индексу ix_cards_search_document (префиксный tsquery),
+    упорядочиваются по (ts_rank desc, id), и листаются только первые SEARCH_CANDIDATES из них;
+    подсветку делает ts_headline только для строк страницы.
+    В SQLite - построчный LIKE без ранжирования (по id) и подсветка на Python.
+    offset - позиция в ранжированной выдаче (курсор хранит смещение, см. offset_from_cursor).
+    Запрос без слов длиной от MIN_WORD_LENGTH отклоняется с 422.
+    """
+    words = query_words(query)
+    if not words:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Search query needs at least one word of {MIN_WORD_LENGTH} or more letters",
+        )
+    if offset >= SEARCH_CANDIDATES:
+        return []
+
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    if is_postgres:
+        tsquery = _prefix_tsquery(words)
+        document = card_search_document(Card.term, Card.definition, Card.translation)
+        match = document.op("@@")(tsquery)
+        rank = func.ts_rank(document, tsquery)
+    else:
+        match = and_(*(
+            or_(*(column.ilike(f"%{escape_like(word)}%", escape="\\") for column in (Card.term, Card.definition, Card.translation)))
+            for word in words
+        ))
+        rank = literal(0)
+
+    # Лучшие SEARCH_CANDIDATES совпадений. Порядок задан до LIMIT и однозначен (id при равном rank),
+    # поэтому в кандидаты попадают самые релевантные, а смещение курсора указывает на те же строки
+    # от запроса к запросу. JOIN и подсветка дальше - только для кандидатов и страницы
+    candidates = (
+        select(Card.id.label("card_id"), rank.label("rank"))
+        .join(CardSet, CardSet.id == Card.set_id)
+        .where(match, or_(CardSet.owner_id == user_id, CardSet.is_public == True))
+        .order_by(rank.desc(), Card.id)
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+    columns = [Card.id, Card.set_id, CardSet.name.label("set_name"), Card.order, Card.term, Card.definition, Card.translation]
+    if is_postgres:
+        columns += [
+            _pg_headline(Card.term, tsquery).label("term_highlight"),
+            _pg_headline(Card.definition, tsquery).label("definition_highlight"),
+            _pg_headline(Card.translation, tsquery).label("translation_highlight"),
+        ]
+    stmt = (
+        select(*columns)
+        .join(candidates, candidates.c.card_id == Card.id)
+        .join(CardSet, CardSet.id == Card.set_id)
+        .order_by(candidates.c.rank.desc(), Card.id)
+        .offset(offset)
+        .limit(min(limit, SEARCH_CANDIDATES - offset))
+    )
+
+    result = await db.execute(stmt)
+    hits = []
+    for row in result.mappings().all():
+        data = dict(row)
+        if not is_postgres:
+            data["term_highlight"] = highlight(row["term"], words)
+            data["definition_highlight"] = highlight(row["definition"], words)
+            data["translation_highlight"] = highlight(row["translation"], words)
+        hits.append(CardSearchHit(**data))
+    return hits
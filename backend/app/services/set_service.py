@@ -1,50 +1,104 @@
-from sqlalchemy import func, or_
+from datetime import datetime
+from enum import Enum
+from sqlalchemy import delete, exists, func, insert, literal, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload, joinedload
-from typing import List
-from app.db.models import CardSet, Folder, Tag, User, Card
+from sqlalchemy.orm import selectinload
+from typing import Awaitable, Callable, List, Optional
+from app.core.pagination import decode_cursor, keyset_after
+from app.db.models import Card, CardSet, Folder, card_set_tags_association
+from app.core.config import settings
+from app.db.database import set_statement_timeout
 from app.schemas.set import CardSetCreate, CardSetUpdate
-from app.services import tag_service
+from app.services import card_service, tag_service, search_service
+
+
+class SetLoad(str, Enum):
+    """Профили загрузки набора. Каждый вызывающий явно выбирает, сколько данных ему нужно."""
+    META = "meta"  # Только строка набора: для проверки прав доступа
+    TAGS = "tags"  # Набор + теги: для ответа CardSetRead
+
+
+class TagMatch(str, Enum):
+    """Режим фильтра наборов по тегам."""
+    ANY = "any"  # Набор с хотя бы одним из тегов
+    ALL = "all"  # Набор со всеми тегами сразу
+
+
+def _tag_filter(tag_ids: List[int], match: TagMatch):
+    """
+    Полусоединение с card_set_tags по индексу ix_card_set_tags_tag_id.
+    В отличие от JOIN, не размножает строки наборов, поэтому не нужен GROUP BY по наборам.
+    """
+    postings = card_set_tags_association.c
+    if match == TagMatch.ANY:
+        return exists().where(postings.card_set_id == CardSet.id, postings.tag_id.in_(tag_ids))
+    return CardSet.id.in_(
+        select(postings.card_set_id)
+        .where(postings.tag_id.in_(tag_ids))
+        .group_by(postings.card_set_id)
+        .having(func.count() == len(tag_ids))
+    )
+
+
+def _set_load_options(load: SetLoad) -> list:
+    """Возвращает опции жадной загрузки для выбранного профиля."""
+    if load == SetLoad.META:
+        return []
+    return [selectinload(CardSet.tags)]
+
 
 async def get_sets_by_folder(
         db: AsyncSession, folder_id: int, user_id: int, skip: int = 0, limit: int = 20, search: str = "",
-        tags: List[str] = []
+        tags: List[str] = [], cursor: Optional[str] = None, tag_match: TagMatch = TagMatch.ANY
 ):
-    """Получает список наборов в конкретной папке с пагинацией и поиском."""
+    """
+    Получает список наборов в конкретной папке с пагинацией, поиском и фильтром по тегам.
+    tag_match выбирает, нужен ли набору хотя бы один из тегов (any) или все сразу (all).
+    Если передан cursor (ключ (created_at, id) последнего набора предыдущей страницы),
+    используется keyset-пагинация и skip игнорируется.
+    Результаты поиска (search) отсортированы по релевантности и листаются только через skip.
+    """
 
     folder = await db.get(Folder, folder_id)
     if not folder or (not folder.is_public and folder.owner_id != user_id):
         return None
 
-    # 1. Основной запрос теперь выбирает и сам объект CardSet, и количество Card
+    # 1. Основной запрос: card_count хранится в самом наборе, поэтому JOIN с карточками не нужен
     query = (
-        select(CardSet, func.count(Card.id).label("card_count"))
-        .outerjoin(Card, CardSet.id == Card.set_id)  # Используем outerjoin на случай, если в наборе 0 карточек
+        select(CardSet)
         .where(CardSet.folder_id == folder_id)
-        .group_by(CardSet.id)  # Группируем по ID набора для корректного подсчета
         .options(selectinload(CardSet.tags))  # Жадно загружаем теги, как и раньше
     )
 
     # 2. Применяем фильтры
     if search:
-        query = query.where(CardSet.name.ilike(f"%{search}%"))
+        query = query.where(search_service.name_matches(CardSet.name, search)).order_by(
+            search_service.name_rank(CardSet.name, search).desc()
+        )
 
     if tags:
-        query = query.join(CardSet.tags).where(Tag.name.in_(tags))
-
-    # 3. Выполняем запрос с сортировкой и пагинацией
+        # Теги хранятся в нижнем регистре; id берем из кеша tag_service
+        tag_names = {name.strip().lower() for name in tags}
+        tag_ids = list((await tag_service.lookup_tag_ids(db, tag_names)).values())
+        if not tag_ids or (tag_match == TagMatch.ALL and len(tag_ids) < len(tag_names)):
+            # Ни одного такого тега нет (или для режима "все" не хватает какого-то) - наборов быть не может
+            return []
+        query = query.where(_tag_filter(tag_ids, tag_match))
+
+    # 3. Keyset-пагинация: продолжаем строго после последнего набора предыдущей страницы.
+    # Для поиска курсор по (created_at, id) не подходит - там сортировка по релевантности.
+    if cursor and not search:
+        created_at, set_id = decode_cursor(cursor, datetime, int)
+        query = query.where(keyset_after(db, (CardSet.created_at, CardSet.id), (created_at, set_id), descending=True))
+    else:
+        query = query.offset(skip)
+
+    # 4. Выполняем запрос с сортировкой и пагинацией
     result = await db.execute(
-        query.order_by(CardSet.created_at.desc()).offset(skip).limit(limit)
+        query.order_by(CardSet.created_at.desc(), CardSet.id.desc()).limit(limit)
     )
-
-    # 4. Обрабатываем результат, который теперь является кортежем (CardSet, count)
-    sets_with_counts = []
-    for card_set, count in result.all():
-        card_set.card_count = count  # Присваиваем вычисленное значение
-        sets_with_counts.append(card_set)
-
-    return sets_with_counts
+    return result.scalars().all()
 
 async def create_set_in_folder(db: AsyncSession, card_set: CardSetCreate, folder_id: int, user_id: int):
     """Создает новый набор карточек в указанной папке."""
@@ -67,47 +121,24 @@ async def create_set_in_folder(db: AsyncSession, card_set: CardSetCreate, folder
     )
 
     db.add(db_card_set)
+    await _change_set_count(db, folder_id, 1)
+    await tag_service.change_usage(db, added_ids=[tag.id for tag in tags_obj_list])
     await db.commit()
-    await db.refresh(db_card_set)
-
-    # Присваиваем 0, так как новый набор всегда пуст
-    db_card_set.card_count = 0
 
     # Мы все еще должны жадно загрузить теги для корректного ответа
     query = select(CardSet).where(CardSet.id == db_card_set.id).options(selectinload(CardSet.tags))
     result = await db.execute(query)
-    created_set_with_tags = result.scalars().one()
-    created_set_with_tags.card_count = 0  # Убеждаемся, что поле есть в финальном объекте
+    return result.scalars().one()
 
-    return created_set_with_tags
 
-
-async def get_set_by_id(db: AsyncSession, set_id: int, user_id: int):
-    """Получает один набор по ID, проверяя права доступа и подсчитывая карточки."""
-
-    # 1. Скалярный подзапрос для подсчета карточек. Он эффективен и не требует JOIN в основном запросе.
-    card_count_subq = (
-        select(func.count(Card.id))
-        .where(Card.set_id == set_id)
-        .scalar_subquery()  # Используем scalar_subquery для простоты
-    )
-
-    # 2. Основной запрос теперь намного чище.
-    # Мы убрали ненужные outerjoin() и group_by(), которые вызывали конфликт.
-    query = (
-        select(CardSet, card_count_subq.label("card_count"))
-        .where(CardSet.id == set_id)
-        .options(selectinload(CardSet.tags), joinedload(CardSet.owner))  # жадная загрузка остается
-    )
-
-    result = await db.execute(query)
-    res = result.first()
-
-    if not res:
-        return None
-
-    card_set, card_count = res
-    card_set.card_count = card_count
+async def get_set_by_id(db: AsyncSession, set_id: int, user_id: int, load: SetLoad = SetLoad.TAGS):
+    """
+    Получает один набор по ID, проверяя права доступа.
+    :param load: профиль загрузки. META не грузит теги,
+                 поэтому подходит для проверки прав перед изменением карточек.
+    """
+    result = await db.execute(select(CardSet).where(CardSet.id == set_id).options(*_set_load_options(load)))
+    card_set = result.scalars().one_or_none()
 
     if card_set and (card_set.is_public or card_set.owner_id == user_id):
         return card_set
@@ -117,7 +148,7 @@ async def get_set_by_id(db: AsyncSession, set_id: int, user_id: int):
 async def update_set(db: AsyncSession, set_id: int, set_update: CardSetUpdate, user_id: int):
     """Обновляет набор карточек."""
     # Эта функция теперь будет работать корректно, так как get_set_by_id исправлен
-    db_set = await get_set_by_id(db, set_id, user_id)
+    db_set = await get_set_by_id(db, set_id, user_id, load=SetLoad.TAGS)
     if not db_set or db_set.owner_id != user_id:
         return None
 
@@ -125,18 +156,85 @@ async def update_set(db: AsyncSession, set_id: int, set_update: CardSetUpdate, u
 
     if "tags" in update_data:
         tags_obj_list = await tag_service.get_or_create_tags(db, update_data["tags"])
+        old_tag_ids = {tag.id for tag in db_set.tags}
+        new_tag_ids = {tag.id for tag in tags_obj_list}
+        await tag_service.change_usage(
+            db, added_ids=new_tag_ids - old_tag_ids, removed_ids=old_tag_ids - new_tag_ids
+        )
         db_set.tags = tags_obj_list
         del update_data["tags"]
 
     for key, value in update_data.items():
         setattr(db_set, key, value)
+    # Любое изменение набора делает недействительными его ETag и закешированные ответы
+    db_set.version = CardSet.version + 1
 
     db.add(db_set)
     await db.commit()
     await db.refresh(db_set)
 
     # После обновления нам нужно вернуть объект со свежим подсчетом карточек
-    return await get_set_by_id(db, set_id=db_set.id, user_id=user_id)
+    return await get_set_by_id(db, set_id=db_set.id, user_id=user_id, load=SetLoad.TAGS)
+
+async def clone_set(db: AsyncSession, set_id: int, user_id: int, folder_id: int, name: Optional[str] = None):
+    """
+    Копирует доступный пользователю набор (свой или публичный) в его папку folder_id одной транзакцией.
+    Строка набора, связи с тегами и карточки копируются на стороне БД через INSERT ... SELECT,
+    карточки не проходят через приложение. Копия приватная, порядок карточек сохраняется.
+    Возвращает новый набор с тегами или None, если набора или папки нет (или нет прав).
+    """
+    source = await get_set_by_id(db, set_id, user_id, load=SetLoad.META)
+    folder = await db.get(Folder, folder_id)
+    if not source or not folder or folder.owner_id != user_id:
+        return None
+
+    # Копирование большого набора - долгая транзакция: обычного statement_timeout ей мало
+    await set_statement_timeout(db, settings.DB_LONG_STATEMENT_TIMEOUT_MS)
+
+    set_columns = ["name", "description", "is_public", "owner_id", "folder_id", "next_order"]
+    new_set_id = (await db.execute(
+        insert(CardSet)
+        .from_select(
+            set_columns,
+            select(
+                literal(name) if name else CardSet.name, CardSet.description, literal(False),
+                literal(user_id), literal(folder_id), CardSet.next_order,
+            ).where(CardSet.id == set_id),
+        )
+        .returning(CardSet.id)
+    )).scalar_one()
+
+    postings = card_set_tags_association.c
+    tag_ids = await tag_service.get_set_tag_ids(db, set_id)
+    if tag_ids:
+        await db.execute(
+            insert(card_set_tags_association).from_select(
+                ["card_set_id", "tag_id"],
+                select(literal(new_set_id), postings.tag_id).where(postings.card_set_id == set_id),
+            )
+        )
+        await tag_service.change_usage(db, added_ids=tag_ids)
+
+    card_columns = ["term", "definition", "example", "translation", "order", "set_id"]
+    copied = await db.execute(
+        insert(Card).from_select(
+            card_columns,
+            select(
+                Card.term, Card.definition, Card.example, Card.translation, Card.order, literal(new_set_id),
+            ).where(Card.set_id == set_id),
+        )
+    )
+    await db.execute(
+        update(CardSet)
+        .where(CardSet.id == new_set_id)
+        .values(card_count=copied.rowcount)
+        .execution_options(synchronize_session=False)
+    )
+    await _change_set_count(db, folder_id, 1)
+    await db.commit()
+
+    return await get_set_by_id(db, new_set_id, user_id, load=SetLoad.TAGS)
+
 
 async def delete_set(db: AsyncSession, set_id: int, user_id: int):
     """Удаляет набор карточек."""
@@ -145,6 +243,59 @@ async def delete_set(db: AsyncSession, set_id: int, user_id: int):
     if not db_set or db_set.owner_id != user_id:
         return None
 
-    await db.delete(db_set)
+    await _delete_set_row(db, set_id, db_set.folder_id)
+    await db.commit()
+    return True
+
+
+async def purge_set(
+        db: AsyncSession, set_id: int, batch_size: int,
+        on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> int:
+    """
+    Удаляет большой набор по частям (фоновая задача): карточки - пачками по batch_size,
+    каждая пачка в своей короткой транзакции, затем сам набор.
+    Права проверяются до постановки задачи. Возвращает число удаленных карточек; если набора уже нет - 0.
+    """
+    db_set = await db.get(CardSet, set_id)
+    if not db_set:
+        return 0
+    folder_id = db_set.folder_id
+
+    deleted = 0
+    while True:
+        batch = select(Card.id).where(Card.set_id == set_id).limit(batch_size)
+        result = await db.execute(
+            delete(Card).where(Card.id.in_(batch)).execution_options(synchronize_session=False)
+        )
+        if not result.rowcount:
+            break
+        await card_service.touch_set(db, set_id, card_count=CardSet.card_count - result.rowcount)
+        await db.commit()
+        deleted += result.rowcount
+        if on_progress:
+            await on_progress(deleted)
+
+    await _delete_set_row(db, set_id, folder_id)
     await db.commit()
-    return True
\ No newline at end of file
+    return deleted
+
+
+async def _delete_set_row(db: AsyncSession, set_id: int, folder_id: int):
+    """
+    Удаляет набор одним DELETE. Карточки, связи с тегами и состояния повторения
+    удаляет база (ON DELETE CASCADE) - ORM не загружает их и не удаляет по одной.
+    """
+    await tag_service.change_usage(db, removed_ids=await tag_service.get_set_tag_ids(db, set_id))
+    await db.execute(delete(CardSet).where(CardSet.id == set_id).execution_options(synchronize_session=False))
+    await _change_set_count(db, folder_id, -1)
+
+
+async def _change_set_count(db: AsyncSession, folder_id: int, delta: int):
+    """Сдвигает денормализованный счетчик Folder.set_count одним атомарным UPDATE."""
+    await db.execute(
+        update(Folder)
+        .where(Folder.id == folder_id)
+        .values(set_count=Folder.set_count + delta)
+        .execution_options(synchronize_session=False)
+    )
\ No newline at end of file
@@ -0,0 +1,169 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.models import Card, CardReview, CardSet
+from app.schemas.study import StudyAnswer, StudyAnswerResult, StudyCard
+
+# Параметры SM-2
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+PASSING_QUALITY = 3
+
+
+@dataclass
+class ReviewState:
+    ease_factor: float = INITIAL_EASE
+    interval_days: int = 0
+    repetitions: int = 0
+    lapses: int = 0
+
+
+def schedule(state: ReviewState, quality: int) -> ReviewState:
+    """
+    Один шаг алгоритма SM-2: новое состояние карточки после ответа с оценкой quality (0-5).
+    Неудачный ответ (< 3) сбрасывает серию и возвращает карточку на следующий день.
+    """
+    ease = state.ease_factor + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease = max(MIN_EASE, ease)
+    if quality < PASSING_QUALITY:
+        return ReviewState(ease_factor=ease, interval_days=1, repetitions=0, lapses=state.lapses + 1)
+
+    repetitions = state.repetitions + 1
+    if repetitions == 1:
+        interval = 1
+    elif repetitions == 2:
+        interval = 6
+    else:
+        interval = math.ceil(state.interval_days * state.ease_factor)
+    return ReviewState(ease_factor=ease, interval_days=interval, repetitions=repetitions, lapses=state.lapses)
+
+
+def _accessible(user_id: int):
+    """Условие доступа к набору карточки: свой или публичный."""
+    return or_(CardSet.owner_id == user_id, CardSet.is_public == True)
+
+
+CARD_COLUMNS = (Card.id, Card.set_id, Card.term, Card.definition, Card.example, Card.translation)
+
+
+def due_reviews_query(user_id: int, limit: int, now: datetime, set_id: Optional[int] = None):
+    """
+    Карточки с наступившим сроком повторения, самые просроченные первыми.
+    Набор, который с момента ответа стал приватным у другого владельца, в очередь не попадает.
+    """
+    query = (
+        select(*CARD_COLUMNS, CardReview.due_at, CardReview.interval_days, CardReview.ease_factor, CardReview.repetitions)
+        .join(Card, Card.id == CardReview.card_id)
+        .join(CardSet, CardSet.id == Card.set_id)
+        .where(CardReview.user_id == user_id, CardReview.due_at <= now, _accessible(user_id))
+        .order_by(CardReview.due_at)
+        .limit(limit)
+    )
+    if set_id is not None:
+        query = query.where(Card.set_id == set_id)
+    return query
+
+
+async def get_due_cards(
+        db: AsyncSession, user_id: int, limit: int = 20, new_limit: int = 10, set_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+) -> List[StudyCard]:
+    """
+    Очередь повторения: сначала карточки с наступившим due_at (самые просроченные первыми),
+    затем, если место осталось, до new_limit новых карточек из своих наборов пользователя.
+    Первая часть - диапазонный проход по индексу (user_id, due_at) с LIMIT, без сортировки в Python.
+    """
+    now = now or datetime.now(timezone.utc)
+    due_query = due_reviews_query(user_id, limit, now, set_id)
+    due = [StudyCard(**row, is_new=False) for row in (await db.execute(due_query)).mappings().all()]
+
+    new_count = min(new_limit, limit - len(due))
+    if new_count <= 0:
+        return due
+
+    # Новые карточки - без строки в card_reviews; берем по порядку наборов и карточек
+    new_query = (
+        select(*CARD_COLUMNS)
+        .join(CardSet, CardSet.id == Card.set_id)
+        .where(
+            ~exists().where(CardReview.user_id == user_id, CardReview.card_id == Card.id),
+        )
+        .order_by(Card.set_id, Card.order, Card.id)
+        .limit(new_count)
+    )
+    if set_id is not None:
+        new_query = new_query.where(Card.set_id == set_id, _accessible(user_id))
+    else:
+        new_query = new_query.where(CardSet.owner_id == user_id)
+    new = [StudyCard(**row, is_new=True) for row in (await db.execute(new_query)).mappings().all()]
+    return due + new
+
+
+def _insert_for(db: AsyncSession):
+    """INSERT с поддержкой ON CONFLICT для текущего диалекта."""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+async def record_answers(db: AsyncSession, user_id: int, answers: List[StudyAnswer]) -> List[StudyAnswerResult]:
+    """
+    Записывает пакет ответов одной транзакцией:
+    один SELECT доступных карточек вместе с текущим состоянием, расчет SM-2 в памяти
+    и один многострочный INSERT ... ON CONFLICT (user_id, card_id) DO UPDATE.
+    Несколько ответов на одну карточку применяются по порядку.
+    """
+    card_ids = {answer.card_id for answer in answers}
+    rows = await db.execute(
+        select(Card.id, CardReview.ease_factor, CardReview.interval_days, CardReview.repetitions, CardReview.lapses)
+        .join(CardSet, CardSet.id == Card.set_id)
+        .outerjoin(CardReview, and_(CardReview.card_id == Card.id, CardReview.user_id == user_id))
+        .where(Card.id.in_(card_ids), _accessible(user_id))
+    )
+    states = {
+        card_id: ReviewState(ease, interval, repetitions, lapses) if ease is not None else ReviewState()
+        for card_id, ease, interval, repetitions, lapses in rows.all()
+    }
+
+    now = datetime.now(timezone.utc)
+    results: List[StudyAnswerResult] = []
+    values: dict[int, dict] = {}
+    for answer in answers:
+        state = states.get(answer.card_id)
+        if state is None:
+            results.append(StudyAnswerResult(card_id=answer.card_id, ok=False, error="Card not found or access denied"))
+            continue
+        reviewed_at = min(answer.reviewed_at or now, now)
+        state = states[answer.card_id] = schedule(state, answer.quality)
+        due_at = reviewed_at + timedelta(days=state.interval_days)
+        values[answer.card_id] = {
+            "user_id": user_id,
+            "card_id": answer.card_id,
+            "ease_factor": state.ease_factor,
+            "interval_days": state.interval_days,
+            "repetitions": state.repetitions,
+            "lapses": state.lapses,
+            "due_at": due_at,
+            "last_reviewed_at": reviewed_at,
+        }
+        results.append(StudyAnswerResult(card_id=answer.card_id, ok=True, due_at=due_at, interval_days=state.interval_days))
+
+    if values:
+        insert = _insert_for(db)
+        stmt = insert(CardReview).values(list(values.values()))
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CardReview.user_id, CardReview.card_id],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in ("ease_factor", "interval_days", "repetitions", "lapses", "due_at", "last_reviewed_at")
+                },
+            )
+        )
+    await db.commit()
+    return results
@@ -1,32 +1,162 @@
+from sqlalchemy import event, func, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
-from app.db.models import Tag
+from sqlalchemy.orm import make_transient_to_detached
+from typing import Dict, Iterable, List
+from app.db.database import PrimarySession
+from app.db.models import CardSet, Tag, card_set_tags_association
+from app.services import search_service
+
+# Кеш "название тега -> id". Теги не удаляются и не переименовываются, поэтому записи не устаревают.
+# Новые теги попадают сюда только после commit транзакции, в которой они созданы
+MAX_CACHED_TAGS = 50000
+_tag_ids: Dict[str, int] = {}
+
+# Сколько подсказок отдает автодополнение по умолчанию
+DEFAULT_SUGGESTIONS = 10
+
+
+def _remember(tag_ids: Dict[str, int]):
+    if len(_tag_ids) + len(tag_ids) > MAX_CACHED_TAGS:
+        _tag_ids.clear()
+    _tag_ids.update(tag_ids)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _cache_committed_tags(session):
+    created = session.info.pop("created_tag_ids", None)
+    if created:
+        _remember(created)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _forget_uncommitted_tags(session):
+    session.info.pop("created_tag_ids", None)
+
+
+def _insert_for(db: AsyncSession):
+    """INSERT с поддержкой ON CONFLICT для текущего диалекта."""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+async def resolve_tag_ids(db: AsyncSession, tag_names: Iterable[str]) -> Dict[str, int]:
+    """
+    Возвращает id тегов по названиям, создавая недостающие.
+    Известные теги берутся из кеша; остальные вставляются одним
+    INSERT ... ON CONFLICT (name) DO NOTHING RETURNING. Если тег параллельно создал
+    другой запрос, RETURNING его не вернет - такие id дочитываются отдельным SELECT.
+    Поэтому одновременное создание наборов с одним новым тегом не падает на уникальном индексе.
+    """
+    names = list(dict.fromkeys(tag_names))
+    resolved = {name: _tag_ids[name] for name in names if name in _tag_ids}
+    missing = [name for name in names if name not in resolved]
+    if not missing:
+        return resolved
+
+    insert = _insert_for(db)
+    created = await db.execute(
+        insert(Tag)
+        .values([{"name": name} for name in missing])
+        .on_conflict_do_nothing(index_elements=[Tag.name])
+        .returning(Tag.id, Tag.name)
+    )
+    created_ids = {name: tag_id for tag_id, name in created.all()}
+    db.info.setdefault("created_tag_ids", {}).update(created_ids)
+
+    existing_names = [name for name in missing if name not in created_ids]
+    existing_ids = {}
+    if existing_names:
+        existing = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(existing_names)))
+        existing_ids = dict(existing.all())
+        _remember(existing_ids)
+
+    return {**resolved, **created_ids, **existing_ids}
+
+
+async def lookup_tag_ids(db: AsyncSession, tag_names: Iterable[str]) -> Dict[str, int]:
+    """Возвращает id существующих тегов по названиям (неизвестные названия пропускаются, теги не создаются)."""
+    names = list(dict.fromkeys(tag_names))
+    found = {name: _tag_ids[name] for name in names if name in _tag_ids}
+    missing = [name for name in names if name not in found]
+    if missing:
+        result = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing)))
+        loaded = dict(result.all())
+        _remember(loaded)
+        found.update(loaded)
+    return found
 
 
 async def get_or_create_tags(db: AsyncSession, tag_names: List[str]) -> List[Tag]:
     """
     Принимает список названий тегов.
-    Находит существующие теги в БД и создает новые, если их нет.
-    Возвращает список объектов модели Tag.
+    Находит существующие теги в БД и создает новые, если их нет (см. resolve_tag_ids).
+    Возвращает список объектов модели Tag, привязанных к сессии без дополнительного SELECT.
     """
     if not tag_names:
         return []
 
-    # Находим теги, которые уже существуют в базе данных
-    existing_tags_query = await db.execute(select(Tag).where(Tag.name.in_(tag_names)))
-    existing_tags = existing_tags_query.scalars().all()
-    existing_tag_names = {tag.name for tag in existing_tags}
+    tag_ids = await resolve_tag_ids(db, tag_names)
+    tags = []
+    for name, tag_id in tag_ids.items():
+        tag = Tag(id=tag_id, name=name)
+        make_transient_to_detached(tag)
+        tags.append(await db.merge(tag, load=False))
+    return tags
+
+
+async def change_usage(db: AsyncSession, added_ids: Iterable[int] = (), removed_ids: Iterable[int] = ()):
+    """Сдвигает Tag.usage_count: +1 тегам, которые получил набор, -1 тем, которые он потерял."""
+    for tag_ids, delta in ((set(added_ids), 1), (set(removed_ids), -1)):
+        if tag_ids:
+            await db.execute(
+                update(Tag)
+                .where(Tag.id.in_(tag_ids))
+                .values(usage_count=Tag.usage_count + delta)
+                .execution_options(synchronize_session=False)
+            )
 
-    # Определяем, какие теги нужно создать
-    new_tag_names = set(tag_names) - existing_tag_names
-    new_tags = [Tag(name=name) for name in new_tag_names]
 
-    # Если есть новые теги, добавляем их в сессию
-    if new_tags:
-        db.add_all(new_tags)
-        await db.flush()  # Используем flush, чтобы получить id для новых тегов без полного коммита
+async def release_folder_tags(db: AsyncSession, folder_id: int):
+    """
+    Перед удалением папки уменьшает Tag.usage_count на число ее наборов с каждым тегом.
+    Один UPDATE с коррелированным подзапросом вместо загрузки наборов.
+    """
+    postings = card_set_tags_association.c
+    folder_postings = (
+        select(postings.tag_id)
+        .join(CardSet, CardSet.id == postings.card_set_id)
+        .where(CardSet.folder_id == folder_id)
+    )
+    released = (
+        select(func.count())
+        .select_from(card_set_tags_association.join(CardSet, CardSet.id == postings.card_set_id))
+        .where(CardSet.folder_id == folder_id, postings.tag_id == Tag.id)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(Tag)
+        .where(Tag.id.in_(folder_postings))
+        .values(usage_count=Tag.usage_count - released)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_set_tag_ids(db: AsyncSession, set_id: int) -> List[int]:
+    result = await db.execute(
+        select(card_set_tags_association.c.tag_id).where(card_set_tags_association.c.card_set_id == set_id)
+    )
+    return list(result.scalars().all())
 
-    # Собираем итоговый список из существующих и только что созданных тегов
-    all_tags = list(existing_tags) + new_tags
-    return all_tags
\ No newline at end of file
+
+async def suggest_tags(db: AsyncSession, prefix: str, limit: int = DEFAULT_SUGGESTIONS):
+    """
+    Подсказки для автодополнения: теги, начинающиеся с prefix, самые популярные первыми.
+    На PostgreSQL префиксный LIKE идет по индексу ix_tags_name_prefix.
+    """
+    query = select(Tag).order_by(Tag.usage_count.desc(), Tag.name).limit(limit)
+    prefix = prefix.strip().lower()
+    if prefix:
+        query = query.where(Tag.name.like(f"{search_service.escape_like(prefix)}%", escape="\\"))
+    result = await db.execute(query)
+    return result.scalars().all()
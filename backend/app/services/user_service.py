@@ -2,17 +2,40 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.db.models import User
 from app.schemas.user import UserCreate
-from app.core.security import hash_password
+from app.core.security import hash_password, verify_password
 
 async def get_user_by_email(db: AsyncSession, email: str):
     """Находит пользователя по email."""
     result = await db.execute(select(User).filter(User.email == email))
     return result.scalars().first()
 
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    """Находит пользователя по id."""
+    return await db.get(User, user_id)
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    """
+    Возвращает пользователя, если пароль верный, иначе None.
+    Если хеш пароля посчитан с устаревшей стоимостью, заменяет его новым.
+    """
+    user = await get_user_by_email(db, email=email)
+    if not user:
+        return None
+    # Завершаем читающую транзакцию, чтобы не держать соединение из пула, пока считается bcrypt
+    await db.commit()
+    verified, new_hash = await verify_password(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
 async def create_user(db: AsyncSession, user: UserCreate):
     """Создает нового пользователя."""
-    # Хешируем пароль перед сохранением
-    hashed_pass = hash_password(user.password)
+    # Хешируем пароль перед сохранением. Соединение из пула на это время отпускаем
+    await db.commit()
+    hashed_pass = await hash_password(user.password)
     # Создаем объект модели SQLAlchemy
     db_user = User(email=user.email, hashed_password=hashed_pass)
     # Добавляем в сессию и сохраняем в БД
@@ -0,0 +1,37 @@
+"""
+Отдельный процесс для фоновых задач (удаление и импорт больших наборов):
+
+    python -m app.worker
+
+Берет задачи из той же таблицы jobs, что и исполнитель внутри API. Чтобы задачи выполнял
+только воркер, запускайте API с JOB_RUNNER_ENABLED=false. Для фонового импорта каталог
+JOB_SPOOL_DIR должен быть общим у API и воркера.
+"""
+import asyncio
+import logging
+import signal
+
+from app.db import replica
+from app.db.database import engine
+from app.services import job_service
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    job_service.runner.start()
+    try:
+        await stop.wait()
+    finally:
+        # Прерванная задача возвращается в очередь и будет выполнена заново
+        await job_service.runner.stop()
+        await replica.dispose()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
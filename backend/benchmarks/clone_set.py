@@ -0,0 +1,81 @@
+"""
+Бенчмарк копирования набора: POST /sets/{id}/clone против копирования силами клиента.
+
+Клиентский путь - то, что было доступно раньше: GET /sets/{id}/cards по X-Next-Cursor
+и POST /sets/{id}/cards на каждую карточку. Серверный путь копирует набор через INSERT ... SELECT
+одной транзакцией. Порог фоновой задачи поднят, чтобы мерить саму транзакцию;
+с --background копия идет через задачу (202) и замер включает ожидание ее завершения.
+
+    cd backend && python -m benchmarks.clone_set --cards 10000 --repeat 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from benchmarks.common import app_client, format_stats, login, seed_set, wait_for_job
+
+
+async def clone(client, headers: dict, set_id: int, folder_id: int) -> int:
+    response = await client.post(f"/api/v1/sets/{set_id}/clone", json={"folder_id": folder_id}, headers=headers)
+    response.raise_for_status()
+    if response.status_code == 202:
+        job = await wait_for_job(client, headers, response)
+        return job["result"]["card_count"]
+    return response.json()["card_count"]
+
+
+async def client_copy(client, headers: dict, set_id: int, folder_id: int) -> int:
+    """Копия так, как ее делал бы фронтенд без clone: постраничное чтение и POST на каждую карточку."""
+    card_set = (await client.get(f"/api/v1/sets/{set_id}", headers=headers)).json()
+    target = (await client.post(
+        f"/api/v1/folders/{folder_id}/sets", json={"name": card_set["name"], "tags": [tag["name"] for tag in card_set["tags"]]},
+        headers=headers,
+    )).json()
+    copied, cursor = 0, None
+    while True:
+        params = {"limit": 100, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(f"/api/v1/sets/{set_id}/cards", params=params, headers=headers)
+        response.raise_for_status()
+        for card in response.json():
+            body = {key: card[key] for key in ("term", "definition", "example", "translation")}
+            (await client.post(f"/api/v1/sets/{target['id']}/cards", json=body, headers=headers)).raise_for_status()
+            copied += 1
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return copied
+
+
+async def measure(name: str, copy, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        copied = await copy()
+        samples.append(time.perf_counter() - started)
+    print(format_stats(name, samples) + f" cards={copied}")
+
+
+async def run(cards: int, repeat: int, client_copies: int):
+    async with app_client() as client:
+        headers = await login(client)
+        set_id = await seed_set(client, headers, cards)
+        folder = (await client.post("/api/v1/folders/", json={"name": "clones"}, headers=headers)).json()
+        await measure("POST /clone", lambda: clone(client, headers, set_id, folder["id"]), repeat)
+        if client_copies:
+            await measure("client-side copy", lambda: client_copy(client, headers, set_id, folder["id"]), client_copies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--client-copies", type=int, default=1, help="how many client-side copies to time (0 to skip)")
+    parser.add_argument("--background", action="store_true", help="go through the background job path (202)")
+    args = parser.parse_args(argv)
+    os.environ.setdefault("JOB_THRESHOLD_CARDS", "0" if args.background else str(args.cards))
+    asyncio.run(run(args.cards, args.repeat, args.client_copies))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Общие части бенчмарков: временная база, запуск приложения в процессе, перцентили.
+
+Модуль нужно импортировать до app.*: он выставляет переменные окружения по умолчанию
+(временная SQLite-база), если они не заданы. Чтобы мерить на PostgreSQL, задайте DATABASE_URL.
+Зависимости бенчмарков (httpx, aiosqlite) - в requirements-dev.txt, запуск - в benchmarks/README.md.
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+from contextlib import asynccontextmanager
+
+_db_file = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_file}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+
+import httpx
+
+EMAIL, PASSWORD = "bench@example.com", "bench-password"
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50/p95/p99 в миллисекундах по задержкам в секундах."""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+
+def format_stats(name: str, samples: list[float]) -> str:
+    stats = percentiles(samples)
+    return f"{name:>24}: n={len(samples)} " + " ".join(f"{key}={value:.1f}ms" for key, value in stats.items())
+
+
+@asynccontextmanager
+async def app_client():
+    """Запускает приложение (startup/shutdown) и отдает httpx-клиент, работающий через ASGI без сети."""
+    from app.db.database import engine
+    from app.db.migrations import upgrade_to_head
+    from app.main import app
+
+    await asyncio.to_thread(upgrade_to_head)
+    for handler in app.router.on_startup:
+        await handler()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            yield client
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+        await engine.dispose()
+
+
+async def login(client: httpx.AsyncClient, email: str = EMAIL, password: str = PASSWORD) -> dict:
+    """Регистрирует пользователя (если его еще нет) и возвращает заголовки авторизации."""
+    await client.post("/api/v1/users/", json={"email": email, "password": password})
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def wait_for_job(client: httpx.AsyncClient, headers: dict, response: httpx.Response, interval: float = 0.05) -> dict:
+    """Если операция ушла в фоновую задачу (202), дожидается ее и возвращает итоговый JobRead."""
+    job = response.json()
+    while job["status"] not in ("succeeded", "failed"):
+        await asyncio.sleep(interval)
+        job = (await client.get(response.headers["location"], headers=headers)).json()
+    if job["status"] == "failed":
+        raise RuntimeError(f"job {job['id']} failed: {job['error']}")
+    return job
+
+
+async def seed_set(client: httpx.AsyncClient, headers: dict, cards: int, name: str = "bench") -> int:
+    """Создает папку и набор с cards карточками (через импорт CSV) и возвращает id набора."""
+    folder = (await client.post("/api/v1/folders/", json={"name": name}, headers=headers)).json()
+    card_set = (await client.post(f"/api/v1/folders/{folder['id']}/sets", json={"name": name, "tags": [name]}, headers=headers)).json()
+    rows = "\n".join(f"term {i},definition of term {i},example {i},перевод {i}" for i in range(cards))
+    csv_file = ("cards.csv", ("term,definition,example,translation\n" + rows).encode())
+    response = await client.post(f"/api/v1/sets/{card_set['id']}/cards/import", files={"file": csv_file}, headers=headers)
+    response.raise_for_status()
+    if response.status_code == 202:
+        await wait_for_job(client, headers, response)
+    return card_set["id"]
@@ -0,0 +1,151 @@
+"""
+Синтетический набор данных для бенчмарков: users × folders × sets × cards и словарь тегов.
+
+Строки вставляются пакетами через Core по моделям app.db.models (через API такие объемы
+заливались бы часами). Денормализованные счетчики (set_count, card_count, next_order, usage_count)
+записываются сразу согласованными, поэтому данные неотличимы от созданных через API.
+Один и тот же seed дает одни и те же данные, а значит, и сравнимые замеры.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from benchmarks.common import PASSWORD
+
+# Словарь для терминов, определений и поисковых запросов
+WORDS = (
+    "apple", "river", "mountain", "window", "garden", "letter", "summer", "winter", "forest", "island",
+    "market", "travel", "kitchen", "doctor", "teacher", "bridge", "castle", "engine", "flower", "planet",
+    "silver", "thunder", "village", "wonder", "yellow", "harbor", "journey", "lantern", "meadow", "orange",
+    "pencil", "quiet", "rocket", "shadow", "ticket", "umbrella", "valley", "whisper", "anchor", "blanket",
+)
+
+
+@dataclass
+class DatasetSize:
+    users: int = 10
+    folders: int = 5  # на пользователя
+    sets: int = 10  # на папку
+    cards: int = 100  # на набор
+    tags: int = 200  # размер словаря тегов
+    tags_per_set: int = 3  # наибольшее число тегов у набора
+
+    @property
+    def total_cards(self) -> int:
+        return self.users * self.folders * self.sets * self.cards
+
+
+@dataclass
+class SeededUser:
+    id: int
+    email: str
+    headers: dict  # заголовок Authorization с токеном, выданным без логина
+    folder_ids: List[int] = field(default_factory=list)
+    set_ids: List[int] = field(default_factory=list)
+    card_ids: Dict[int, List[int]] = field(default_factory=dict)  # набор -> карточки в порядке order
+
+
+@dataclass
+class Dataset:
+    size: DatasetSize
+    users: List[SeededUser]
+    tags: List[str]
+    set_tags: Dict[int, List[str]]
+
+
+def _card_row(rng: random.Random, set_id: int, order: int) -> dict:
+    first, second = rng.sample(WORDS, 2)
+    definition = " ".join(rng.choices(WORDS, k=8))
+    return {
+        "term": f"{first} {second}", "definition": f"the {definition}", "example": f"A {first} near the {second}.",
+        "translation": f"перевод {first}", "order": order, "set_id": set_id,
+    }
+
+
+async def _insert_returning_ids(db, model, rows: List[dict], batch_size: int) -> List[int]:
+    """Вставляет строки пакетами и возвращает их id в порядке rows."""
+    from sqlalchemy import insert
+
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        result = await db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows[start:start + batch_size]
+        )
+        ids += result.scalars().all()
+    return ids
+
+
+async def seed_dataset(size: DatasetSize, seed: int = 42, batch_size: int = 5000) -> Dataset:
+    """Заполняет базу (после миграций) и возвращает id созданных строк и токены пользователей."""
+    from sqlalchemy import insert, update
+
+    from app.core.security import create_access_token, hash_password, token_claims
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import Card, CardSet, Folder, Tag, User, card_set_tags_association
+
+    rng = random.Random(seed)
+    tag_names = [f"{rng.choice(WORDS)}-{i:05d}" for i in range(size.tags)]
+    # Пароль у всех один: bcrypt считаем один раз
+    hashed_password = await hash_password(PASSWORD)
+
+    async with AsyncSessionLocal() as db:
+        emails = [f"bench{u:05d}@example.com" for u in range(size.users)]
+        user_ids = await _insert_returning_ids(
+            db, User, [{"email": email, "hashed_password": hashed_password, "is_active": True} for email in emails],
+            batch_size,
+        )
+        users = [
+            SeededUser(id=user_id, email=email, headers={
+                "Authorization": f"Bearer {create_access_token(token_claims(User(id=user_id, email=email)))}",
+            })
+            for user_id, email in zip(user_ids, emails)
+        ]
+        owners = {user.id: user for user in users}
+        tag_ids = dict(zip(tag_names, await _insert_returning_ids(
+            db, Tag, [{"name": name, "usage_count": 0} for name in tag_names], batch_size,
+        )))
+
+        folder_rows = [
+            {"name": f"{rng.choice(WORDS)} folder {f}", "owner_id": user.id, "is_public": False, "set_count": size.sets}
+            for user in users for f in range(size.folders)
+        ]
+        folder_ids = await _insert_returning_ids(db, Folder, folder_rows, batch_size)
+        for row, folder_id in zip(folder_rows, folder_ids):
+            owners[row["owner_id"]].folder_ids.append(folder_id)
+
+        set_rows = [
+            {
+                "name": f"{rng.choice(WORDS)} set {s}", "description": f"Synthetic set {s}", "owner_id": row["owner_id"],
+                "folder_id": folder_id, "is_public": rng.random() < 0.1,
+                "card_count": size.cards, "next_order": size.cards, "version": 1,
+            }
+            for row, folder_id in zip(folder_rows, folder_ids) for s in range(size.sets)
+        ]
+        set_ids = await _insert_returning_ids(db, CardSet, set_rows, batch_size)
+        for row, set_id in zip(set_rows, set_ids):
+            owners[row["owner_id"]].set_ids.append(set_id)
+
+        set_tags: Dict[int, List[str]] = {}
+        postings = []
+        for set_id in set_ids:
+            set_tags[set_id] = rng.sample(tag_names, rng.randint(0, min(size.tags_per_set, len(tag_names))))
+            postings += [{"card_set_id": set_id, "tag_id": tag_ids[name]} for name in set_tags[set_id]]
+        for start in range(0, len(postings), batch_size):
+            await db.execute(insert(card_set_tags_association), postings[start:start + batch_size])
+        usage: Dict[int, int] = {}
+        for posting in postings:
+            usage[posting["tag_id"]] = usage.get(posting["tag_id"], 0) + 1
+        if usage:
+            await db.execute(update(Tag), [{"id": tag_id, "usage_count": count} for tag_id, count in usage.items()])
+
+        # Карточки вставляются пакетами по целым наборам, чтобы сразу разложить id по наборам
+        sets_per_batch = max(1, batch_size // max(size.cards, 1))
+        for start in range(0, len(set_ids), sets_per_batch):
+            chunk = list(zip(set_rows[start:start + sets_per_batch], set_ids[start:start + sets_per_batch]))
+            rows = [_card_row(rng, set_id, order) for _, set_id in chunk for order in range(1, size.cards + 1)]
+            card_ids = await _insert_returning_ids(db, Card, rows, batch_size)
+            for index, (row, set_id) in enumerate(chunk):
+                owners[row["owner_id"]].card_ids[set_id] = card_ids[index * size.cards:(index + 1) * size.cards]
+
+        await db.commit()
+    return Dataset(size=size, users=users, tags=tag_names, set_tags=set_tags)
@@ -0,0 +1,80 @@
+"""
+Нагрузочный тест: задержка несвязанного эндпоинта во время шторма логинов.
+
+Приложение поднимается в процессе (httpx.ASGITransport) на временной SQLite-базе.
+Сначала меряется задержка GET /api/v1/folders/ без нагрузки, затем - пока параллельно
+идут логины. Если bcrypt блокирует event loop, p99 во втором замере вырастет на порядок.
+
+    cd backend && python -m benchmarks.login_storm --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import EMAIL, PASSWORD, app_client, format_stats, login
+
+
+async def probe(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event, interval: float) -> list[float]:
+    """Опрашивает несвязанный эндпоинт, пока не выставлен stop, и возвращает задержки."""
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/v1/folders/", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def login_storm(client: httpx.AsyncClient, logins: int, concurrency: int) -> dict[int, int]:
+    """Выполняет logins логинов не более чем concurrency одновременно; возвращает счетчик статусов."""
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: dict[int, int] = {}
+
+    async def one():
+        async with semaphore:
+            response = await client.post("/api/v1/auth/login", data={"username": EMAIL, "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(logins)))
+    return statuses
+
+
+async def run(logins: int, concurrency: int, baseline_seconds: float, interval: float):
+    async with app_client() as client:
+        headers = await login(client)
+
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(probe(client, headers, stop, interval))
+        await asyncio.sleep(baseline_seconds)
+        stop.set()
+        baseline = await baseline_task
+
+        stop = asyncio.Event()
+        storm_probe = asyncio.create_task(probe(client, headers, stop, interval))
+        started = time.perf_counter()
+        statuses = await login_storm(client, logins, concurrency)
+        storm_seconds = time.perf_counter() - started
+        stop.set()
+        under_storm = await storm_probe
+
+    print(f"logins: {logins} in {storm_seconds:.2f}s, statuses {statuses}")
+    print(format_stats("baseline", baseline))
+    print(format_stats("under storm", under_storm))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="pause between probe requests, seconds")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.logins, args.concurrency, args.baseline_seconds, args.interval))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Бенчмарк загрузки набора целиком: постраничный ORM-путь против GET /sets/{id}/full.
+
+Постраничный путь - то, что делал фронтенд: GET /sets/{id} и GET /sets/{id}/cards?limit=100
+по X-Next-Cursor до конца (ORM-объекты + CardRead). Кеш ответов отключается, чтобы
+мерить именно сборку ответа. Для каждого пути печатаются p50/p95/p99 и пик памяти
+на один проход (tracemalloc, отдельным прогоном, чтобы не искажать время).
+
+    cd backend && python -m benchmarks.set_payload --cards 3000 --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("RESPONSE_CACHE_MAX_ENTRIES", "0")
+
+from benchmarks.common import app_client, format_stats, login, seed_set
+
+
+async def load_paginated(client, headers: dict, set_id: int, page_size: int) -> int:
+    (await client.get(f"/api/v1/sets/{set_id}", headers=headers)).raise_for_status()
+    loaded, cursor = 0, None
+    while True:
+        params = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(f"/api/v1/sets/{set_id}/cards", params=params, headers=headers)
+        response.raise_for_status()
+        loaded += len(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return loaded
+
+
+async def load_full(client, headers: dict, set_id: int, encoding: str) -> int:
+    response = await client.get(f"/api/v1/sets/{set_id}/full", headers={**headers, "Accept-Encoding": encoding})
+    response.raise_for_status()
+    return len(response.json()["cards"])
+
+
+async def measure(name: str, load, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        loaded = await load()
+        samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    await load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(format_stats(name, samples) + f" cards={loaded} peak_mem={peak / 1024 / 1024:.1f}MiB")
+
+
+async def run(cards: int, repeat: int, page_size: int):
+    async with app_client() as client:
+        headers = await login(client)
+        set_id = await seed_set(client, headers, cards)
+        await measure(f"paginated (limit={page_size})", lambda: load_paginated(client, headers, set_id, page_size), repeat)
+        await measure("full, identity", lambda: load_full(client, headers, set_id, "identity"), repeat)
+        await measure("full, gzip", lambda: load_full(client, headers, set_id, "gzip"), repeat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.cards, args.repeat, args.page_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Бенчмарк очереди повторения: GET /api/v1/study/due у пользователя со 100k карточек.
+
+Карточки и состояния повторения вставляются пакетами через Core (API импорта для такого
+объема слишком медленный). Меряется задержка эндпоинта целиком и отдельно - самого
+запроса study_service.get_due_cards; в конце печатается план запроса очереди,
+чтобы было видно, что он идет по индексу ix_card_reviews_user_id_due_at, а не сортирует все строки.
+
+    cd backend && python -m benchmarks.study_due --cards 100000 --reviewed 0.8 --repeat 200
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import EMAIL, app_client, format_stats, login
+
+BATCH_SIZE = 5000
+
+
+async def seed(client, headers: dict, cards: int, reviewed: float, sets: int) -> int:
+    """Создает sets наборов с cards карточками в сумме и состояния для доли reviewed карточек; возвращает id пользователя."""
+    from sqlalchemy import func, insert, select, update
+
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import Card, CardReview, CardSet, User
+
+    folder = (await client.post("/api/v1/folders/", json={"name": "study"}, headers=headers)).json()
+    set_ids = [
+        (await client.post(f"/api/v1/folders/{folder['id']}/sets", json={"name": f"study {i}"}, headers=headers)).json()["id"]
+        for i in range(sets)
+    ]
+
+    now = datetime.now(timezone.utc)
+    rng = random.Random(42)
+    async with AsyncSessionLocal() as db:
+        user_id = (await db.execute(select(User.id).where(User.email == EMAIL))).scalar_one()
+        for start in range(0, cards, BATCH_SIZE):
+            rows = [
+                {"term": f"term {i}", "definition": f"definition {i}", "order": i, "set_id": set_ids[i % sets]}
+                for i in range(start, min(start + BATCH_SIZE, cards))
+            ]
+            await db.execute(insert(Card), rows)
+        card_ids = (await db.execute(select(Card.id).where(Card.set_id.in_(set_ids)))).scalars().all()
+
+        reviewed_ids = rng.sample(card_ids, int(len(card_ids) * reviewed))
+        for start in range(0, len(reviewed_ids), BATCH_SIZE):
+            rows = [
+                {
+                    "user_id": user_id, "card_id": card_id, "ease_factor": 2.5, "interval_days": 6,
+                    "repetitions": 2, "lapses": 0, "last_reviewed_at": None,
+                    # Около 10% карточек просрочены, остальные запланированы на ближайший год
+                    "due_at": now + timedelta(minutes=rng.randint(-30 * 24 * 60, 330 * 24 * 60)),
+                }
+                for card_id in reviewed_ids[start:start + BATCH_SIZE]
+            ]
+            await db.execute(insert(CardReview), rows)
+
+        card_count = select(func.count(Card.id)).where(Card.set_id == CardSet.id).scalar_subquery()
+        await db.execute(update(CardSet).where(CardSet.id.in_(set_ids)).values(card_count=card_count, next_order=cards))
+        await db.commit()
+    return user_id
+
+
+async def explain(user_id: int, limit: int):
+    """Печатает план запроса очереди (EXPLAIN QUERY PLAN на SQLite, EXPLAIN на PostgreSQL)."""
+    from sqlalchemy import text
+
+    from app.db.database import AsyncSessionLocal
+    from app.services import study_service
+
+    query = study_service.due_reviews_query(user_id, limit, now=datetime.now(timezone.utc))
+    async with AsyncSessionLocal() as db:
+        dialect = db.get_bind().dialect
+        compiled = query.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+        prefix = "EXPLAIN ANALYZE" if dialect.name == "postgresql" else "EXPLAIN QUERY PLAN"
+        result = await db.execute(text(f"{prefix} {compiled}"))
+        print("plan:")
+        for row in result.all():
+            print("   ", " ".join(str(value) for value in row))
+
+
+async def run(cards: int, reviewed: float, sets: int, repeat: int, limit: int):
+    from app.db.database import AsyncSessionLocal
+    from app.services import study_service
+
+    async with app_client() as client:
+        headers = await login(client)
+        started = time.perf_counter()
+        user_id = await seed(client, headers, cards, reviewed, sets)
+        print(f"seeded {cards} cards ({reviewed:.0%} reviewed) in {sets} sets in {time.perf_counter() - started:.1f}s")
+
+        endpoint = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = await client.get("/api/v1/study/due", params={"limit": limit}, headers=headers)
+            response.raise_for_status()
+            endpoint.append(time.perf_counter() - started)
+
+        query = []
+        async with AsyncSessionLocal() as db:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                due = await study_service.get_due_cards(db, user_id=user_id, limit=limit)
+                query.append(time.perf_counter() - started)
+
+        print(format_stats("GET /study/due", endpoint) + f" cards={len(response.json())}")
+        print(format_stats("get_due_cards", query) + f" cards={len(due)}")
+        await explain(user_id, limit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=100000)
+    parser.add_argument("--reviewed", type=float, default=0.8, help="share of cards that already have a review state")
+    parser.add_argument("--sets", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.cards, args.reviewed, args.sets, args.repeat, args.limit))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Набор нагрузочных сценариев для API: воспроизводимые замеры, которые можно сравнивать между коммитами.
+
+База заполняется синтетическими данными (benchmarks.dataset: users × folders × sets × cards × tags),
+приложение поднимается в процессе (httpx.ASGITransport, без сети), затем по очереди
+прогоняются сценарии - каждый concurrency параллельными клиентами:
+
+- library  - просмотр библиотеки: папки, наборы папки (иногда с фильтром по тегу), набор целиком;
+- autosave - редактор: PUT /cards/{id} на каждое изменение и пакетное сохранение cards:batch;
+- reorder  - перестановка всех карточек набора и перенос одной карточки;
+- search   - поиск карточек, поиск папок по названию, подсказки тегов;
+- login    - вход по паролю (bcrypt).
+
+По каждому эндпоинту печатаются число запросов, пропускная способность, p50/p95/p99, ошибки
+и среднее число SQL-выражений на запрос (из метрик app.core.instrumentation).
+--output сохраняет результат в JSON, --baseline сравнивает прогон с сохраненным.
+
+    cd backend && python -m benchmarks.suite --users 10 --folders 5 --sets 10 --cards 100 \\
+        --iterations 300 --concurrency 8 --output bench-main.json
+    cd backend && python -m benchmarks.suite --baseline bench-main.json --output bench-branch.json
+
+По умолчанию база - временный файл SQLite. Для PostgreSQL задайте DATABASE_URL одноразовой базы:
+схема создается миграциями, данные сидируются заново при каждом запуске.
+Кеш ответов включен, как в проде; без него: RESPONSE_CACHE_MAX_ENTRIES=0.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import PASSWORD, app_client, percentiles
+from benchmarks.dataset import WORDS, Dataset, DatasetSize, SeededUser, seed_dataset
+
+
+class Recorder:
+    """Задержки и ошибки по эндпоинтам; эндпоинт - метод и шаблон пути, как в метриках приложения."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs) -> httpx.Response:
+        endpoint = f"{method} {route}"
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[endpoint].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, SeededUser, Dataset, random.Random], Awaitable[None]]
+
+
+async def browse_library(client, recorder: Recorder, user: SeededUser, dataset: Dataset, rng: random.Random):
+    await recorder.request(client, "GET", "/api/v1/folders/", "/api/v1/folders/", params={"limit": 20}, headers=user.headers)
+    folder_id = rng.choice(user.folder_ids)
+    params = {"limit": 20}
+    if rng.random() < 0.3:
+        params["tags"] = rng.choice(dataset.tags)
+    await recorder.request(
+        client, "GET", "/api/v1/folders/{folder_id}/sets", f"/api/v1/folders/{folder_id}/sets",
+        params=params, headers=user.headers,
+    )
+    set_id = rng.choice(user.set_ids)
+    await recorder.request(client, "GET", "/api/v1/sets/{set_id}/full", f"/api/v1/sets/{set_id}/full", headers=user.headers)
+
+
+def _edited_card(rng: random.Random) -> dict:
+    first, second = rng.sample(WORDS, 2)
+    return {"term": f"{first} {second}", "definition": "the " + " ".join(rng.choices(WORDS, k=8)),
+            "translation": f"перевод {first}"}
+
+
+async def editor_autosave(client, recorder: Recorder, user: SeededUser, dataset: Dataset, rng: random.Random):
+    set_id = rng.choice(user.set_ids)
+    card_ids = user.card_ids[set_id]
+    # Редактор отправляет карточку целиком (CardUpdate), как при вводе в поле
+    for card_id in rng.sample(card_ids, min(3, len(card_ids))):
+        await recorder.request(
+            client, "PUT", "/api/v1/cards/{card_id}", f"/api/v1/cards/{card_id}",
+            json=_edited_card(rng), headers=user.headers,
+        )
+    operations = [
+        {"op": "update", "id": card_id, **_edited_card(rng)}
+        for card_id in rng.sample(card_ids, min(10, len(card_ids)))
+    ]
+    await recorder.request(
+        client, "POST", "/api/v1/sets/{set_id}/cards:batch", f"/api/v1/sets/{set_id}/cards:batch",
+        json={"operations": operations}, headers=user.headers,
+    )
+
+
+async def bulk_reorder(client, recorder: Recorder, user: SeededUser, dataset: Dataset, rng: random.Random):
+    set_id = rng.choice(user.set_ids)
+    card_ids = user.card_ids[set_id]
+    shuffled = rng.sample(card_ids, len(card_ids))
+    await recorder.request(
+        client, "POST", "/api/v1/sets/{set_id}/reorder", f"/api/v1/sets/{set_id}/reorder",
+        json={"card_ids": shuffled}, headers=user.headers,
+    )
+    if len(card_ids) >= 2:
+        card_id, after_id = rng.sample(card_ids, 2)
+        await recorder.request(
+            client, "POST", "/api/v1/sets/{set_id}/cards/{card_id}/move", f"/api/v1/sets/{set_id}/cards/{card_id}/move",
+            json={"after_id": after_id}, headers=user.headers,
+        )
+
+
+async def search(client, recorder: Recorder, user: SeededUser, dataset: Dataset, rng: random.Random):
+    word = rng.choice(WORDS)
+    await recorder.request(
+        client, "GET", "/api/v1/search/cards", "/api/v1/search/cards", params={"q": word}, headers=user.headers,
+    )
+    await recorder.request(
+        client, "GET", "/api/v1/folders/", "/api/v1/folders/", params={"search": word[:4]}, headers=user.headers,
+    )
+    await recorder.request(
+        client, "GET", "/api/v1/tags/", "/api/v1/tags/", params={"prefix": word[:2]}, headers=user.headers,
+    )
+
+
+async def login(client, recorder: Recorder, user: SeededUser, dataset: Dataset, rng: random.Random):
+    await recorder.request(
+        client, "POST", "/api/v1/auth/login", "/api/v1/auth/login", data={"username": user.email, "password": PASSWORD},
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "library": browse_library,
+    "autosave": editor_autosave,
+    "reorder": bulk_reorder,
+    "search": search,
+    "login": login,
+}
+
+
+def _sql_snapshot() -> Dict[str, tuple]:
+    """Число запросов и сумма SQL-выражений по эндпоинтам из гистограммы http_request_db_statements."""
+    from app.core.instrumentation import request_statements
+
+    return {f"{method} {route}": (values[-2], values[-1]) for (method, route), values in request_statements.series().items()}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, dataset: Dataset,
+                       iterations: int, concurrency: int, warmup: int, seed: int) -> dict:
+    """
+    Выполняет iterations итераций сценария concurrency воркерами. Воркер i работает от имени
+    пользователя i % users, поэтому записи разных воркеров почти не пересекаются.
+    """
+    remaining = warmup
+
+    async def worker(phase: str, index: int, recorder: Recorder):
+        nonlocal remaining
+        # У каждого воркера и фазы своя, но воспроизводимая последовательность случайных чисел
+        rng = random.Random(f"{seed}-{phase}-{index}")
+        user = dataset.users[index % len(dataset.users)]
+        while remaining > 0:
+            remaining -= 1
+            await scenario(client, recorder, user, dataset, rng)
+
+    # Прогрев: кеши, подготовленные выражения и пул соединений; в результат не попадает
+    await asyncio.gather(*(worker("warmup", i, Recorder()) for i in range(concurrency)))
+
+    recorder = Recorder()
+    remaining = iterations
+    sql_before = _sql_snapshot()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker("measure", i, recorder) for i in range(concurrency)))
+    seconds = time.perf_counter() - started
+    sql_after = _sql_snapshot()
+
+    endpoints = {}
+    for endpoint, samples in recorder.samples.items():
+        requests_before, statements_before = sql_before.get(endpoint, (0, 0))
+        requests_after, statements_after = sql_after.get(endpoint, (0, 0))
+        measured = requests_after - requests_before
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "errors": recorder.errors[endpoint],
+            "throughput_rps": len(samples) / seconds,
+            **{f"{key}_ms": value for key, value in percentiles(samples).items()},
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "sql_per_request": (statements_after - statements_before) / measured if measured else None,
+        }
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "iterations": iterations,
+        "seconds": seconds,
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "throughput_rps": total / seconds,
+        "endpoints": endpoints,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def print_report(results: dict, baseline: Optional[dict] = None):
+    print(f"{'endpoint':<48} {'n':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5} {'sql':>5}")
+    for name, scenario in results["scenarios"].items():
+        print(f"[{name}] {scenario['requests']} requests in {scenario['seconds']:.2f}s, "
+              f"{scenario['throughput_rps']:.1f} req/s, {scenario['errors']} errors")
+        before = (baseline or {}).get("scenarios", {}).get(name, {}).get("endpoints", {})
+        for endpoint, stats in scenario["endpoints"].items():
+            sql = f"{stats['sql_per_request']:.1f}" if stats["sql_per_request"] is not None else "-"
+            print(
+                f"  {endpoint:<46} {stats['requests']:>6} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>6.1f}ms"
+                f" {stats['p95_ms']:>6.1f}ms {stats['p99_ms']:>6.1f}ms {stats['errors']:>5} {sql:>5}"
+            )
+            if endpoint in before:
+                changes = " ".join(
+                    f"{key} {before[endpoint][f'{key}_ms']:.1f}->{stats[f'{key}_ms']:.1f}ms"
+                    f" ({(stats[f'{key}_ms'] / before[endpoint][f'{key}_ms'] - 1) * 100:+.0f}%)"
+                    for key in ("p50", "p95", "p99") if before[endpoint][f"{key}_ms"]
+                )
+                print(f"  {'':<46} vs {baseline['meta'].get('commit') or 'baseline'}: {changes}")
+
+
+async def run(args):
+    size = DatasetSize(
+        users=args.users, folders=args.folders, sets=args.sets, cards=args.cards,
+        tags=args.tags, tags_per_set=args.tags_per_set,
+    )
+    scenarios = args.scenarios.split(",")
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(unknown)}; available: {', '.join(SCENARIOS)}")
+
+    async with app_client() as client:
+        from sqlalchemy.engine import make_url
+
+        from app.core.config import settings
+
+        started = time.perf_counter()
+        dataset = await seed_dataset(size, seed=args.seed)
+        seed_seconds = time.perf_counter() - started
+        print(f"seeded {size.users} users, {size.users * size.folders} folders, "
+              f"{size.users * size.folders * size.sets} sets, {size.total_cards} cards in {seed_seconds:.1f}s")
+
+        results = {
+            "meta": {
+                "commit": _git_commit(),
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "database": make_url(settings.DATABASE_URL).get_backend_name(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "dataset": vars(size),
+                "seed": args.seed,
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "concurrency": args.concurrency,
+                "seed_seconds": seed_seconds,
+            },
+            "scenarios": {},
+        }
+        for name in scenarios:
+            results["scenarios"][name] = await run_scenario(
+                client, SCENARIOS[name], dataset, iterations=args.iterations, concurrency=args.concurrency,
+                warmup=args.warmup, seed=args.seed,
+            )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+        print(f"results written to {args.output}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--folders", type=int, default=5, help="folders per user")
+    parser.add_argument("--sets", type=int, default=10, help="sets per folder")
+    parser.add_argument("--cards", type=int, default=100, help="cards per set")
+    parser.add_argument("--tags", type=int, default=200, help="size of the tag vocabulary")
+    parser.add_argument("--tags-per-set", type=int, default=3)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=200, help="scenario iterations to measure")
+    parser.add_argument("--warmup", type=int, default=20, help="scenario iterations to run before measuring")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
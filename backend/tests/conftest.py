@@ -0,0 +1,113 @@
+"""
+Общие фикстуры тестов: временная SQLite-база со схемой из миграций, httpx-клиент к приложению
+через ASGI (без сети), пользователи и подсчет SQL-выражений.
+
+    cd backend && pip install -r requirements-dev.txt && python -m pytest
+
+Переменные окружения выставляются до импорта app.*; DATABASE_URL можно переопределить.
+"""
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+_db_file = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_file}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "7")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # минимальная стоимость: регистрация в каждом тесте
+os.environ.setdefault("RESPONSE_CACHE_MAX_ENTRIES", "0")  # число SQL не должно зависеть от кеша ответов
+os.environ.setdefault("JOB_RUNNER_ENABLED", "false")
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    from app.db.migrations import upgrade_to_head
+
+    upgrade_to_head()
+
+
+@pytest.fixture
+async def client():
+    from app.db.database import engine
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+            yield test_client
+    finally:
+        # У каждого теста свой event loop: соединения пула прошлого теста к нему не привязать
+        await engine.dispose()
+
+
+async def register(client: httpx.AsyncClient) -> dict:
+    """Создает пользователя с уникальным email и возвращает заголовки авторизации."""
+    email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/api/v1/users/", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def headers(client) -> dict:
+    return await register(client)
+
+
+async def create_set(client: httpx.AsyncClient, headers: dict, cards: int = 0, tags=(), is_public: bool = False) -> dict:
+    """Создает папку и набор в ней (с cards карточками) и возвращает набор."""
+    folder = (await client.post("/api/v1/folders/", json={"name": "folder"}, headers=headers)).json()
+    response = await client.post(
+        f"/api/v1/folders/{folder['id']}/sets",
+        json={"name": "set", "tags": list(tags), "is_public": is_public}, headers=headers,
+    )
+    response.raise_for_status()
+    card_set = response.json()
+    for i in range(cards):
+        response = await client.post(
+            f"/api/v1/sets/{card_set['id']}/cards", json={"term": f"term {i}", "definition": f"definition {i}"},
+            headers=headers,
+        )
+        response.raise_for_status()
+    return card_set
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_statements():
+    """Считает SQL-выражения, выполненные основной БД внутри блока."""
+    from app.db.database import engine
+
+    counter = StatementCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,78 @@
+"""Пакетные операции над карточками набора."""
+import pytest
+
+from conftest import create_set
+
+pytestmark = pytest.mark.anyio
+
+
+async def list_cards(client, headers, set_id: int) -> dict[int, dict]:
+    cards = (await client.get(f"/api/v1/sets/{set_id}/cards", headers=headers)).json()
+    return {card["id"]: card for card in cards}
+
+
+async def test_update_keeps_fields_that_were_not_sent(client, headers):
+    card_set = await create_set(client, headers)
+    created = await client.post(
+        f"/api/v1/sets/{card_set['id']}/cards",
+        json={"term": "term", "definition": "definition", "example": "example", "translation": "translation"},
+        headers=headers,
+    )
+    card_id = created.json()["id"]
+
+    response = await client.post(
+        f"/api/v1/sets/{card_set['id']}/cards:batch",
+        json={"operations": [
+            {"op": "update", "id": card_id, "term": "new term", "definition": "new definition"},
+        ]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"][0]["ok"]
+    card = (await list_cards(client, headers, card_set["id"]))[card_id]
+    assert (card["term"], card["definition"]) == ("new term", "new definition")
+    assert (card["example"], card["translation"]) == ("example", "translation")
+
+
+async def test_update_can_clear_a_field_explicitly(client, headers):
+    card_set = await create_set(client, headers)
+    created = await client.post(
+        f"/api/v1/sets/{card_set['id']}/cards",
+        json={"term": "term", "definition": "definition", "example": "example", "translation": "translation"},
+        headers=headers,
+    )
+    card_id = created.json()["id"]
+
+    await client.post(
+        f"/api/v1/sets/{card_set['id']}/cards:batch",
+        json={"operations": [
+            {"op": "update", "id": card_id, "term": "term", "definition": "definition", "example": None},
+        ]},
+        headers=headers,
+    )
+
+    card = (await list_cards(client, headers, card_set["id"]))[card_id]
+    assert (card["example"], card["translation"]) == (None, "translation")
+
+
+async def test_second_operation_on_the_same_card_is_rejected(client, headers):
+    card_set = await create_set(client, headers, cards=1)
+    (card_id,) = await list_cards(client, headers, card_set["id"])
+
+    response = await client.post(
+        f"/api/v1/sets/{card_set['id']}/cards:batch",
+        json={"operations": [
+            {"op": "update", "id": card_id, "term": "first", "definition": "first"},
+            {"op": "update", "id": card_id, "term": "second", "definition": "second"},
+            {"op": "delete", "id": card_id},
+        ]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [True, False, False]
+    assert all("operation 0" in result["error"] for result in results[1:])
+    card = (await list_cards(client, headers, card_set["id"]))[card_id]
+    assert card["term"] == "first"
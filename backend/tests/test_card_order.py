@@ -0,0 +1,30 @@
+"""Порядок карточек выдается атомарным счетчиком набора и не повторяется при параллельной вставке."""
+import asyncio
+
+import pytest
+
+from conftest import create_set
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_parallel_card_creation_gets_unique_increasing_orders(client, headers):
+    card_set = await create_set(client, headers)
+
+    async def add_card(i: int) -> dict:
+        response = await client.post(
+            f"/api/v1/sets/{card_set['id']}/cards", json={"term": f"term {i}", "definition": "text"}, headers=headers,
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    created = await asyncio.gather(*(add_card(i) for i in range(20)))
+
+    orders = [card["order"] for card in sorted(created, key=lambda card: card["id"])]
+    assert len(set(orders)) == len(orders)
+    assert orders == sorted(orders)  # id и order выдаются в одной транзакции, по порядку
+
+    listed = (await client.get(f"/api/v1/sets/{card_set['id']}/cards", params={"limit": 100}, headers=headers)).json()
+    listed_orders = [card["order"] for card in listed]
+    assert all(a < b for a, b in zip(listed_orders, listed_orders[1:]))
+    assert sorted(listed_orders) == sorted(orders)
@@ -0,0 +1,117 @@
+"""Перестановка карточек: reorder всего набора и перенос одной карточки между соседями."""
+import pytest
+
+from conftest import create_set
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def card_ids(client, headers) -> tuple[int, list[int]]:
+    """Набор из четырех карточек (order 1024, 2048, 3072, 4096): id набора и id карточек по порядку."""
+    card_set = await create_set(client, headers, cards=4)
+    return card_set["id"], await ordered_ids(client, headers, card_set["id"])
+
+
+async def ordered_ids(client, headers, set_id: int) -> list[int]:
+    cards = (await client.get(f"/api/v1/sets/{set_id}/cards", params={"limit": 100}, headers=headers)).json()
+    return [card["id"] for card in cards]
+
+
+async def move(client, headers, set_id: int, card_id: int, **neighbours):
+    return await client.post(f"/api/v1/sets/{set_id}/cards/{card_id}/move", json=neighbours, headers=headers)
+
+
+async def set_orders(client, headers, set_id: int, orders: dict[int, int]):
+    operations = [{"op": "move", "id": card_id, "order": order} for card_id, order in orders.items()]
+    response = await client.post(f"/api/v1/sets/{set_id}/cards:batch", json={"operations": operations}, headers=headers)
+    assert all(result["ok"] for result in response.json()["results"])
+
+
+async def test_reorder_whole_set(client, headers, card_ids):
+    set_id, (a, b, c, d) = card_ids
+
+    response = await client.post(f"/api/v1/sets/{set_id}/reorder", json={"card_ids": [d, b, a, c]}, headers=headers)
+
+    assert response.status_code == 204
+    assert await ordered_ids(client, headers, set_id) == [d, b, a, c]
+
+
+async def test_move_between_two_neighbours(client, headers, card_ids):
+    set_id, (a, b, c, d) = card_ids
+
+    response = await move(client, headers, set_id, d, after_id=a, before_id=b)
+
+    assert response.status_code == 200
+    assert response.json()["order"] == 1536
+    assert await ordered_ids(client, headers, set_id) == [a, d, b, c]
+
+
+@pytest.mark.parametrize("neighbours, expected", [
+    # Только after_id: карточка встает сразу за ним, перед следующей карточкой набора
+    (lambda a, b, c: {"after_id": a}, lambda a, b, c, d: [a, d, b, c]),
+    # Только before_id: сразу перед ним, после предыдущей карточки
+    (lambda a, b, c: {"before_id": c}, lambda a, b, c, d: [a, b, d, c]),
+    # Края набора
+    (lambda a, b, c: {"before_id": a}, lambda a, b, c, d: [d, a, b, c]),
+], ids=["after", "before", "first"])
+async def test_move_next_to_one_neighbour(client, headers, card_ids, neighbours, expected):
+    set_id, (a, b, c, d) = card_ids
+
+    response = await move(client, headers, set_id, d, **neighbours(a, b, c))
+
+    assert response.status_code == 200
+    assert await ordered_ids(client, headers, set_id) == expected(a, b, c, d)
+
+
+async def test_move_to_the_end(client, headers, card_ids):
+    set_id, (a, b, c, d) = card_ids
+
+    response = await move(client, headers, set_id, a, after_id=d)
+
+    assert response.status_code == 200
+    assert await ordered_ids(client, headers, set_id) == [b, c, d, a]
+
+
+@pytest.mark.parametrize("pair", [
+    lambda a, b, c: {"after_id": b, "before_id": a},  # соседи перепутаны
+    lambda a, b, c: {"after_id": a, "before_id": c},  # между ними есть карточка b
+], ids=["inverted", "gap"])
+async def test_move_rejects_neighbours_that_are_not_adjacent(client, headers, card_ids, pair):
+    set_id, (a, b, c, d) = card_ids
+
+    response = await move(client, headers, set_id, d, **pair(a, b, c))
+
+    assert response.status_code == 400
+    assert await ordered_ids(client, headers, set_id) == [a, b, c, d]
+
+
+async def test_move_into_exhausted_gap_renumbers_set(client, headers, card_ids):
+    set_id, (a, b, c, d) = card_ids
+    await set_orders(client, headers, set_id, {b: 1025})  # a=1024, b=1025: места между ними нет
+
+    response = await move(client, headers, set_id, d, after_id=a, before_id=b)
+
+    assert response.status_code == 200
+    assert await ordered_ids(client, headers, set_id) == [a, d, b, c]
+    cards = (await client.get(f"/api/v1/sets/{set_id}/cards", headers=headers)).json()
+    orders = [card["order"] for card in cards]
+    assert len(set(orders)) == len(orders)
+
+
+async def test_move_next_to_neighbour_with_equal_order(client, headers, card_ids):
+    set_id, (a, b, c, d) = card_ids
+    await set_orders(client, headers, set_id, {b: 1024})  # у a и b одинаковый order, порядок решает id
+
+    response = await move(client, headers, set_id, d, after_id=a)
+
+    assert response.status_code == 200
+    assert await ordered_ids(client, headers, set_id) == [a, d, b, c]
+
+
+async def test_move_with_unknown_neighbour_is_404(client, headers, card_ids):
+    set_id, (a, b, c, d) = card_ids
+
+    response = await move(client, headers, set_id, d, after_id=10 ** 9)
+
+    assert response.status_code == 404
@@ -0,0 +1,86 @@
+"""Копирование набора: INSERT ... SELECT на стороне БД и фоновая задача для больших наборов."""
+import uuid
+
+import pytest
+
+from conftest import create_set, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def tag_usage(client, headers, name: str) -> int:
+    suggestions = (await client.get("/api/v1/tags/", params={"prefix": name}, headers=headers)).json()
+    return next(tag["usage_count"] for tag in suggestions if tag["name"] == name)
+
+
+async def new_folder(client, headers) -> int:
+    return (await client.post("/api/v1/folders/", json={"name": "copies"}, headers=headers)).json()["id"]
+
+
+async def test_clone_public_set_with_cards_and_tags(client, headers):
+    tag = "clone-" + uuid.uuid4().hex[:8]
+    author = await register(client)
+    source = await create_set(client, author, cards=3, tags=[tag], is_public=True)
+    source_cards = (await client.get(f"/api/v1/sets/{source['id']}/cards", headers=author)).json()
+    folder_id = await new_folder(client, headers)
+
+    response = await client.post(
+        f"/api/v1/sets/{source['id']}/clone", json={"folder_id": folder_id, "name": "my copy"}, headers=headers,
+    )
+
+    assert response.status_code == 201
+    copy = response.json()
+    assert copy["id"] != source["id"]
+    assert (copy["name"], copy["is_public"], copy["card_count"]) == ("my copy", False, 3)
+    assert [t["name"] for t in copy["tags"]] == [tag]
+    assert await tag_usage(client, headers, tag) == 2
+
+    copied_cards = (await client.get(f"/api/v1/sets/{copy['id']}/cards", headers=headers)).json()
+    assert [(c["term"], c["order"]) for c in copied_cards] == [(c["term"], c["order"]) for c in source_cards]
+    assert not {c["id"] for c in copied_cards} & {c["id"] for c in source_cards}
+
+    folders = (await client.get("/api/v1/folders/", params={"limit": 100}, headers=headers)).json()
+    assert next(folder["set_count"] for folder in folders if folder["id"] == folder_id) == 1
+
+    # Новая карточка копии встает после скопированных
+    added = await client.post(f"/api/v1/sets/{copy['id']}/cards", json={"term": "new", "definition": "d"}, headers=headers)
+    assert added.json()["order"] > copied_cards[-1]["order"]
+
+
+async def test_private_set_of_another_user_cannot_be_cloned(client, headers):
+    author = await register(client)
+    source = await create_set(client, author, cards=1)
+
+    response = await client.post(
+        f"/api/v1/sets/{source['id']}/clone", json={"folder_id": await new_folder(client, headers)}, headers=headers,
+    )
+
+    assert response.status_code == 404
+
+
+async def test_large_set_is_cloned_by_background_job(client, headers, monkeypatch):
+    from app.core.config import settings
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import Job
+    from app.services import job_service
+
+    monkeypatch.setattr(settings, "JOB_THRESHOLD_CARDS", 2)
+    source = await create_set(client, headers, cards=3)
+    folder_id = await new_folder(client, headers)
+
+    response = await client.post(f"/api/v1/sets/{source['id']}/clone", json={"folder_id": folder_id}, headers=headers)
+
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.headers["Location"] == f"/api/v1/jobs/{job_id}"
+    assert response.json()["status"] == "queued"
+
+    # Исполнитель в тестах выключен (JOB_RUNNER_ENABLED=false): выполняем задачу напрямую
+    async with AsyncSessionLocal() as db:
+        job = await db.get(Job, job_id)
+    await job_service.run_job(AsyncSessionLocal, job.id, job.kind, job.owner_id, job.payload)
+
+    finished = (await client.get(f"/api/v1/jobs/{job_id}", headers=headers)).json()
+    assert finished["status"] == "succeeded"
+    copy = (await client.get(f"/api/v1/sets/{finished['result']['set_id']}", headers=headers)).json()
+    assert (copy["folder_id"], copy["card_count"]) == (folder_id, 3)
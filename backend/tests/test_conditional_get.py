@@ -0,0 +1,99 @@
+"""ETag / If-None-Match и кеш ответов набора и его карточек: ключ включает версию набора."""
+import pytest
+
+from conftest import count_statements, create_set
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """Включает кеш ответов в памяти (в остальных тестах он выключен, чтобы не влиять на число SQL)."""
+    from app.core import cache
+
+    backend = cache.LRUCacheBackend(max_entries=100)
+    monkeypatch.setattr(cache, "response_cache", backend)
+    return backend
+
+
+@pytest.mark.parametrize("path", ["/api/v1/sets/{id}", "/api/v1/sets/{id}/cards", "/api/v1/sets/{id}/full"])
+async def test_not_modified_until_a_card_is_added(client, headers, path):
+    card_set = await create_set(client, headers, cards=2)
+    url = path.format(id=card_set["id"])
+
+    first = await client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    repeated = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert repeated.status_code == 304
+    assert repeated.content == b""
+    assert repeated.headers["ETag"] == etag
+
+    await client.post(f"/api/v1/sets/{card_set['id']}/cards", json={"term": "new", "definition": "card"}, headers=headers)
+
+    changed = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+async def test_card_edit_changes_etag_of_card_list(client, headers):
+    card_set = await create_set(client, headers, cards=1)
+    url = f"/api/v1/sets/{card_set['id']}/cards"
+    first = await client.get(url, headers=headers)
+
+    await client.put(f"/api/v1/cards/{first.json()[0]['id']}", json={"term": "edited", "definition": "text"}, headers=headers)
+
+    changed = await client.get(url, headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json()[0]["term"] == "edited"
+
+
+@pytest.mark.parametrize("if_none_match, status", [
+    ('W/"0000", {etag}', 304),  # ETag где-то в списке
+    ('{etag} , W/"0000"', 304),  # пробелы вокруг элементов
+    ("*", 304),
+    ('{strong}', 304),  # сравнение слабое: W/ не учитывается
+    ('W/"0000", "1111"', 200),
+])
+async def test_if_none_match_list(client, headers, if_none_match, status):
+    card_set = await create_set(client, headers)
+    url = f"/api/v1/sets/{card_set['id']}"
+    etag = (await client.get(url, headers=headers)).headers["ETag"]
+
+    value = if_none_match.format(etag=etag, strong=etag[2:])
+    response = await client.get(url, headers={**headers, "If-None-Match": value})
+
+    assert response.status_code == status
+
+
+async def test_cached_card_page_skips_cards_query_and_sees_new_version(client, headers, response_cache):
+    card_set = await create_set(client, headers, cards=3)
+    url = f"/api/v1/sets/{card_set['id']}/cards"
+    first = await client.get(url, headers=headers)
+
+    with count_statements() as sql:
+        cached = await client.get(url, headers=headers)
+    assert cached.content == first.content
+    # Только проверка доступа к набору: страница карточек взята из кеша
+    assert sql.count == 1, sql.statements
+
+    await client.post(f"/api/v1/sets/{card_set['id']}/cards", json={"term": "new", "definition": "card"}, headers=headers)
+
+    fresh = await client.get(url, headers=headers)
+    assert [card["term"] for card in fresh.json()][-1] == "new"
+    assert fresh.headers["ETag"] != first.headers["ETag"]
+
+
+async def test_lru_backend_evicts_least_recently_used():
+    from app.core.cache import LRUCacheBackend
+
+    backend = LRUCacheBackend(max_entries=2)
+    await backend.set("a", b"1", ttl_seconds=60)
+    await backend.set("b", b"2", ttl_seconds=60)
+    assert await backend.get("a") == b"1"  # "a" становится самой свежей
+    await backend.set("c", b"3", ttl_seconds=60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert await backend.get("c") == b"3"
@@ -0,0 +1,142 @@
+"""Потоковая выгрузка набора и папки в CSV, JSONL и колоду Anki (.apkg)."""
+import csv
+import io
+import json
+import sqlite3
+import zipfile
+
+import pytest
+
+from conftest import create_set, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def export(client, headers, url: str, file_format: str):
+    response = await client.get(url, params={"format": file_format}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+async def set_with_cards(client, headers) -> dict:
+    """Набор из двух карточек: вторая - со всеми полями, запятой и переносом строки."""
+    card_set = await create_set(client, headers, cards=1, tags=["export"])
+    await client.put(f"/api/v1/sets/{card_set['id']}", json={"name": "Слова"}, headers=headers)
+    await client.post(
+        f"/api/v1/sets/{card_set['id']}/cards",
+        json={"term": "кот", "definition": "cat, pet", "example": "line 1\nline 2", "translation": "cat"},
+        headers=headers,
+    )
+    return card_set
+
+
+def read_anki_notes(content: bytes, tmp_path) -> tuple[list[str], dict]:
+    """Поля заметок и колоды из .apkg."""
+    with zipfile.ZipFile(io.BytesIO(content)) as package:
+        assert set(package.namelist()) == {"collection.anki2", "media"}
+        package.extract("collection.anki2", tmp_path)
+    connection = sqlite3.connect(tmp_path / "collection.anki2")
+    try:
+        notes = [flds for (flds,) in connection.execute("SELECT flds FROM notes ORDER BY id")]
+        (decks,) = connection.execute("SELECT decks FROM col").fetchone()
+    finally:
+        connection.close()
+    return notes, json.loads(decks)
+
+
+async def test_set_csv(client, headers):
+    card_set = await set_with_cards(client, headers)
+
+    response = await export(client, headers, f"/api/v1/sets/{card_set['id']}/export", "csv")
+
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == (
+        f'attachment; filename="set-{card_set["id"]}.csv"; filename*=UTF-8\'\'%D0%A1%D0%BB%D0%BE%D0%B2%D0%B0.csv'
+    )
+    text = response.content.decode()
+    assert text.startswith("\ufeff")
+    assert list(csv.reader(io.StringIO(text[1:]))) == [
+        ["term", "definition", "example", "translation"],
+        ["term 0", "definition 0", "", ""],
+        ["кот", "cat, pet", "line 1\nline 2", "cat"],
+    ]
+
+
+async def test_set_csv_can_be_imported_back(client, headers):
+    card_set = await set_with_cards(client, headers)
+    exported = (await export(client, headers, f"/api/v1/sets/{card_set['id']}/export", "csv")).content
+    target = await create_set(client, headers)
+
+    response = await client.post(
+        f"/api/v1/sets/{target['id']}/cards/import", files={"file": ("cards.csv", exported, "text/csv")}, headers=headers,
+    )
+
+    assert (response.json()["imported"], response.json()["failed"]) == (2, 0)
+    cards = (await client.get(f"/api/v1/sets/{target['id']}/cards", headers=headers)).json()
+    assert [(card["term"], card["example"]) for card in cards] == [("term 0", None), ("кот", "line 1\nline 2")]
+
+
+async def test_set_jsonl(client, headers):
+    card_set = await set_with_cards(client, headers)
+
+    response = await export(client, headers, f"/api/v1/sets/{card_set['id']}/export", "jsonl")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    # Пустые поля не выгружаются
+    assert [json.loads(line) for line in response.content.decode().splitlines()] == [
+        {"term": "term 0", "definition": "definition 0"},
+        {"term": "кот", "definition": "cat, pet", "example": "line 1\nline 2", "translation": "cat"},
+    ]
+
+
+async def test_set_anki_package(client, headers, tmp_path):
+    card_set = await set_with_cards(client, headers)
+
+    response = await export(client, headers, f"/api/v1/sets/{card_set['id']}/export", "apkg")
+
+    assert response.headers["content-type"] == "application/zip"
+    assert "content-encoding" not in response.headers
+    notes, decks = read_anki_notes(response.content, tmp_path)
+    assert len(notes) == 2
+    assert all(note.count("\x1f") == 1 for note in notes)
+    assert any("кот" in note and "line 1<br>line 2" in note for note in notes)
+    assert "Слова" in {deck["name"] for deck in decks.values()}
+
+
+async def test_empty_set_exports_header_only(client, headers):
+    card_set = await create_set(client, headers)
+
+    csv_response = await export(client, headers, f"/api/v1/sets/{card_set['id']}/export", "csv")
+    jsonl_response = await export(client, headers, f"/api/v1/sets/{card_set['id']}/export", "jsonl")
+
+    assert csv_response.content.decode() == "\ufeffterm,definition,example,translation\r\n"
+    assert jsonl_response.content == b""
+
+
+async def test_folder_export_has_set_column(client, headers, tmp_path):
+    first = await set_with_cards(client, headers)
+    folder_id = first["folder_id"]
+    second = (await client.post(f"/api/v1/folders/{folder_id}/sets", json={"name": "Второй"}, headers=headers)).json()
+    await client.post(f"/api/v1/sets/{second['id']}/cards", json={"term": "dog", "definition": "собака"}, headers=headers)
+    url = f"/api/v1/folders/{folder_id}/export"
+
+    rows = list(csv.reader(io.StringIO((await export(client, headers, url, "csv")).content.decode()[1:])))
+    lines = (await export(client, headers, url, "jsonl")).content.decode().splitlines()
+    notes, decks = read_anki_notes((await export(client, headers, url, "apkg")).content, tmp_path)
+
+    assert rows[0] == ["set", "term", "definition", "example", "translation"]
+    assert [(row[0], row[1]) for row in rows[1:]] == [("Слова", "term 0"), ("Слова", "кот"), ("Второй", "dog")]
+    assert [(json.loads(line)["set"], json.loads(line)["term"]) for line in lines] == [
+        ("Слова", "term 0"), ("Слова", "кот"), ("Второй", "dog"),
+    ]
+    assert len(notes) == 3
+    # Каждый набор - подколода колоды папки
+    assert {"folder::Слова", "folder::Второй"} <= {deck["name"] for deck in decks.values()}
+
+
+async def test_export_of_foreign_private_set_is_404(client, headers):
+    card_set = await create_set(client, await register(client), cards=1)
+
+    response = await client.get(f"/api/v1/sets/{card_set['id']}/export", headers=headers)
+
+    assert response.status_code == 404
@@ -0,0 +1,44 @@
+"""GET /sets/{id}/full: набор и все карточки одним потоковым JSON-ответом."""
+import pytest
+
+from conftest import create_set
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip"])
+async def test_full_set_matches_paged_endpoints(client, headers, accept_encoding):
+    card_set = await create_set(client, headers, cards=5, tags=["full"])
+
+    response = await client.get(
+        f"/api/v1/sets/{card_set['id']}/full", headers={**headers, "Accept-Encoding": accept_encoding},
+    )
+
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == (None if accept_encoding == "identity" else "gzip")
+    body = response.json()
+    card_set_read = (await client.get(f"/api/v1/sets/{card_set['id']}", headers=headers)).json()
+    cards = (await client.get(f"/api/v1/sets/{card_set['id']}/cards", headers=headers)).json()
+    assert body["cards"] == cards
+    assert {key: body["set"][key] for key in card_set_read if key != "created_at"} == {
+        key: value for key, value in card_set_read.items() if key != "created_at"
+    }
+
+
+async def test_set_deleted_after_access_check_is_404(client, headers, monkeypatch):
+    from app.services import export_service
+
+    card_set = await create_set(client, headers, cards=2)
+    load_set_payload = export_service.load_set_payload
+
+    async def deleted_meanwhile(db, set_id):
+        # Набор удаляют между проверкой прав и чтением строки набора
+        response = await client.delete(f"/api/v1/sets/{set_id}", headers=headers)
+        assert response.status_code == 204
+        return await load_set_payload(db, set_id)
+
+    monkeypatch.setattr(export_service, "load_set_payload", deleted_meanwhile)
+
+    response = await client.get(f"/api/v1/sets/{card_set['id']}/full", headers=headers)
+
+    assert response.status_code == 404
@@ -0,0 +1,117 @@
+"""Потоковый импорт карточек из CSV / TSV / JSONL."""
+import json
+
+import pytest
+
+from conftest import create_set
+
+pytestmark = pytest.mark.anyio
+
+
+async def import_file(client, headers, set_id: int, filename: str, content: str, **params):
+    return await client.post(
+        f"/api/v1/sets/{set_id}/cards/import", params=params,
+        files={"file": (filename, content.encode(), "application/octet-stream")}, headers=headers,
+    )
+
+
+async def list_cards(client, headers, set_id: int) -> list[dict]:
+    return (await client.get(f"/api/v1/sets/{set_id}/cards", params={"limit": 1000}, headers=headers)).json()
+
+
+async def test_csv_with_header_reports_bad_rows(client, headers):
+    card_set = await create_set(client, headers, cards=2)
+    content = (
+        "definition,term,translation\n"
+        "first definition,first,первый\n"
+        "\n"
+        "no term,,\n"
+        f"{'x' * 10},{'t' * 300},\n"
+        '"with, comma",second,\n'
+    )
+
+    response = await import_file(client, headers, card_set["id"], "cards.csv", content)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (2, 2)
+    # Номера строк - по исходному файлу, с учетом заголовка и пустой строки
+    assert [error["row"] for error in result["errors"]] == [4, 5]
+    assert any("term" in message for message in result["errors"][0]["errors"])
+
+    cards = await list_cards(client, headers, card_set["id"])
+    imported = cards[2:]
+    assert [(card["term"], card["definition"], card["translation"]) for card in imported] == [
+        ("first", "first definition", "первый"), ("second", "with, comma", None),
+    ]
+    # Импортированные карточки встают после существующих
+    orders = [card["order"] for card in cards]
+    assert orders == sorted(orders) and len(set(orders)) == len(orders)
+    card_set_now = (await client.get(f"/api/v1/sets/{card_set['id']}", headers=headers)).json()
+    assert card_set_now["card_count"] == 4
+
+
+async def test_tsv_without_header_maps_columns_by_position(client, headers):
+    card_set = await create_set(client, headers)
+    content = "term one\tdefinition one\texample one\ttranslation one\nterm two\tdefinition two\n"
+
+    response = await import_file(client, headers, card_set["id"], "cards.txt", content)
+
+    assert response.json()["imported"] == 2
+    first, second = await list_cards(client, headers, card_set["id"])
+    assert (first["term"], first["definition"], first["example"], first["translation"]) == (
+        "term one", "definition one", "example one", "translation one",
+    )
+    assert (second["example"], second["translation"]) == (None, None)
+
+
+async def test_jsonl_reports_parse_errors(client, headers):
+    card_set = await create_set(client, headers)
+    content = "\n".join([
+        json.dumps({"term": "ok", "definition": "fine", "unknown": "ignored"}),
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"term": "no definition"}),
+    ])
+
+    response = await import_file(client, headers, card_set["id"], "cards.ndjson", content)
+
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (1, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["errors"][0].startswith("Invalid JSON")
+
+
+async def test_chunks_get_consecutive_orders_and_errors_are_capped(client, headers, monkeypatch):
+    from app.services import import_service
+
+    monkeypatch.setattr(import_service, "IMPORT_CHUNK_SIZE", 3)
+    monkeypatch.setattr(import_service, "MAX_REPORTED_ERRORS", 2)
+    card_set = await create_set(client, headers, cards=1)
+    lines = []
+    for i in range(10):
+        lines.append(f"term {i},definition {i}")
+        if i % 2:
+            lines.append(f"bad {i},")  # без definition
+    response = await import_file(client, headers, card_set["id"], "cards.csv", "\n".join(lines))
+
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (10, 5)
+    assert len(result["errors"]) == 2
+
+    cards = await list_cards(client, headers, card_set["id"])
+    assert [card["term"] for card in cards[1:]] == [f"term {i}" for i in range(10)]
+    orders = [card["order"] for card in cards]
+    assert all(a < b for a, b in zip(orders, orders[1:]))
+    card_set_now = (await client.get(f"/api/v1/sets/{card_set['id']}", headers=headers)).json()
+    assert card_set_now["card_count"] == 11
+
+
+async def test_format_param_overrides_extension(client, headers):
+    card_set = await create_set(client, headers)
+
+    unknown = await import_file(client, headers, card_set["id"], "cards.xlsx", "term,definition\n")
+    forced = await import_file(client, headers, card_set["id"], "cards.xlsx", "a\tb\n", format="tsv")
+
+    assert unknown.status_code == 400
+    assert forced.json()["imported"] == 1
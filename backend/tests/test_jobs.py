@@ -0,0 +1,81 @@
+"""Аренда фоновых задач: задачи убитых воркеров возвращаются в очередь."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def session_factory():
+    from app.db.database import AsyncSessionLocal, engine
+
+    yield AsyncSessionLocal
+    await engine.dispose()
+
+
+async def add_running_job(session_factory, heartbeat_age: timedelta, attempts: int) -> int:
+    """Задача в running, исполнитель которой последний раз отмечался heartbeat_age назад."""
+    from app.db.models import Job, User
+
+    async with session_factory() as db:
+        user = User(email=f"jobs-{uuid.uuid4().hex[:12]}@example.com", hashed_password="-", is_active=True)
+        db.add(user)
+        await db.flush()
+        heartbeat_at = datetime.now(timezone.utc) - heartbeat_age
+        job = Job(
+            kind="delete_set", owner_id=user.id, payload={"set_id": 0}, status="running",
+            attempts=attempts, started_at=heartbeat_at, heartbeat_at=heartbeat_at,
+        )
+        db.add(job)
+        await db.commit()
+        return job.id
+
+
+async def get_job(session_factory, job_id: int):
+    from app.db.models import Job
+
+    async with session_factory() as db:
+        return await db.get(Job, job_id)
+
+
+async def test_abandoned_job_is_claimed_again(session_factory):
+    from app.core.config import settings
+    from app.services import job_service
+
+    job_id = await add_running_job(session_factory, timedelta(seconds=settings.JOB_LEASE_SECONDS * 2), attempts=1)
+
+    claimed = await job_service._claim_next(session_factory)
+
+    assert claimed is not None and claimed[0] == job_id
+    job = await get_job(session_factory, job_id)
+    assert (job.status, job.attempts) == ("running", 2)
+
+
+async def test_job_with_live_worker_is_not_claimed(session_factory):
+    from app.services import job_service
+
+    job_id = await add_running_job(session_factory, timedelta(seconds=1), attempts=1)
+
+    claimed = await job_service._claim_next(session_factory)
+
+    assert claimed is None or claimed[0] != job_id
+    job = await get_job(session_factory, job_id)
+    assert (job.status, job.attempts) == ("running", 1)
+
+
+async def test_abandoned_job_fails_after_max_attempts(session_factory):
+    from app.core.config import settings
+    from app.services import job_service
+
+    job_id = await add_running_job(
+        session_factory, timedelta(seconds=settings.JOB_LEASE_SECONDS * 2), attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+
+    claimed = await job_service._claim_next(session_factory)
+
+    assert claimed is None or claimed[0] != job_id
+    job = await get_job(session_factory, job_id)
+    assert job.status == "failed"
+    assert job.finished_at is not None
@@ -0,0 +1,94 @@
+"""
+Keyset-пагинация списков папок, наборов и карточек: проход по всем страницам через X-Next-Cursor
+не теряет и не повторяет строки, в том числе при одинаковых ключах сортировки.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from conftest import create_set
+
+pytestmark = pytest.mark.anyio
+
+
+async def walk(client, headers, url: str, limit: int) -> list[dict]:
+    """Все строки списка, собранные постранично по курсору."""
+    rows, cursor = [], None
+    for _ in range(100):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        rows += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+    raise AssertionError("pagination does not end")
+
+
+async def set_created_at(model, ids: list[int], created_at: datetime):
+    from app.db.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(model).where(model.id.in_(ids)).values(created_at=created_at))
+        await db.commit()
+
+
+def newest_first(rows: list[dict]) -> list[dict]:
+    return sorted(rows, key=lambda row: (datetime.fromisoformat(row["created_at"]), row["id"]), reverse=True)
+
+
+async def test_sets_in_folder_with_equal_created_at(client, headers):
+    from app.db.models import CardSet
+
+    folder = (await client.post("/api/v1/folders/", json={"name": "paged"}, headers=headers)).json()
+    ids = []
+    for i in range(7):
+        response = await client.post(f"/api/v1/folders/{folder['id']}/sets", json={"name": f"set {i}"}, headers=headers)
+        ids.append(response.json()["id"])
+    # Половина наборов - с одинаковым временем в формате с микросекундами, остальные - CURRENT_TIMESTAMP
+    await set_created_at(CardSet, ids[:4], datetime(2026, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc))
+
+    rows = await walk(client, headers, f"/api/v1/folders/{folder['id']}/sets", limit=2)
+
+    assert sorted(row["id"] for row in rows) == sorted(ids)
+    assert rows == newest_first(rows)
+
+
+async def test_folders_with_equal_created_at(client, headers):
+    from app.db.models import Folder
+
+    ids = []
+    for i in range(5):
+        ids.append((await client.post("/api/v1/folders/", json={"name": f"folder {i}"}, headers=headers)).json()["id"])
+    await set_created_at(Folder, ids, datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+    rows = await walk(client, headers, "/api/v1/folders/", limit=2)
+
+    # В списке есть и чужие публичные папки из других тестов: проверяем свои и отсутствие повторов
+    seen = [row["id"] for row in rows]
+    assert len(seen) == len(set(seen))
+    assert [folder_id for folder_id in seen if folder_id in ids] == sorted(ids, reverse=True)
+    assert rows == newest_first(rows)
+
+
+async def test_cards_with_equal_order(client, headers):
+    card_set = await create_set(client, headers, cards=6)
+    url = f"/api/v1/sets/{card_set['id']}/cards"
+    cards = (await client.get(url, headers=headers)).json()
+    # Все карточки с одним order: порядок и курсор держатся на id
+    operations = [{"op": "move", "id": card["id"], "order": 1024} for card in cards]
+    await client.post(f"/api/v1/sets/{card_set['id']}/cards:batch", json={"operations": operations}, headers=headers)
+
+    rows = await walk(client, headers, url, limit=4)
+
+    assert [row["id"] for row in rows] == sorted(card["id"] for card in cards)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "WzFd", "WyJ4IiwgInkiXQ"])  # мусор, [1], ["x", "y"]
+async def test_invalid_cursor_is_400(client, headers, cursor):
+    card_set = await create_set(client, headers)
+
+    for url in ("/api/v1/folders/", f"/api/v1/folders/{card_set['folder_id']}/sets", f"/api/v1/sets/{card_set['id']}/cards"):
+        response = await client.get(url, params={"cursor": cursor}, headers=headers)
+        assert response.status_code == 400, url
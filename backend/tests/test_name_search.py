@@ -0,0 +1,89 @@
+"""
+Поиск папок и наборов по названию. В тестах база - SQLite: ILIKE полным просмотром
+и similarity() на Python (search_service.trigram_similarity) вместо pg_trgm.
+"""
+import uuid
+
+import pytest
+
+from conftest import register
+
+pytestmark = pytest.mark.anyio
+
+
+def unique_word() -> str:
+    return "n" + uuid.uuid4().hex[:10]
+
+
+async def create_folder(client, headers, name: str, is_public: bool = False) -> int:
+    response = await client.post("/api/v1/folders/", json={"name": name, "is_public": is_public}, headers=headers)
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def search_folders(client, headers, search: str, **params) -> list[str]:
+    response = await client.get("/api/v1/folders/", params={"search": search, **params}, headers=headers)
+    assert response.status_code == 200
+    return [folder["name"] for folder in response.json()]
+
+
+async def test_folders_are_ranked_by_similarity(client, headers):
+    word = unique_word()
+    for name in (f"{word} and many other words", word, f"{word} deck", "unrelated"):
+        await create_folder(client, headers, name)
+
+    names = await search_folders(client, headers, word.upper())
+
+    assert names == [word, f"{word} deck", f"{word} and many other words"]
+
+
+async def test_like_wildcards_are_matched_literally(client, headers):
+    word = unique_word()
+    await create_folder(client, headers, f"{word} 100%")
+    await create_folder(client, headers, f"{word} 1000")
+    await create_folder(client, headers, f"{word} a_b")
+    await create_folder(client, headers, f"{word} axb")
+
+    assert await search_folders(client, headers, f"{word} 100%") == [f"{word} 100%"]
+    assert await search_folders(client, headers, f"{word} a_b") == [f"{word} a_b"]
+
+
+async def test_search_sees_own_and_public_folders_only(client, headers):
+    word = unique_word()
+    await create_folder(client, headers, f"{word} own")
+    other = await register(client)
+    await create_folder(client, other, f"{word} public", is_public=True)
+    await create_folder(client, other, f"{word} private")
+
+    assert sorted(await search_folders(client, headers, word)) == [f"{word} own", f"{word} public"]
+
+
+async def test_search_pages_with_offset_cursor(client, headers):
+    word = unique_word()
+    expected = {f"{word} {i}" for i in range(5)}
+    for name in expected:
+        await create_folder(client, headers, name)
+
+    seen, cursor = [], None
+    while True:
+        params = {"search": word, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/folders/", params=params, headers=headers)
+        seen += [folder["name"] for folder in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(expected)
+    assert set(seen) == expected
+
+
+async def test_sets_in_folder_are_searched_by_name(client, headers):
+    word = unique_word()
+    folder_id = await create_folder(client, headers, "folder")
+    for name in (f"{word} verbs", word, "nouns"):
+        response = await client.post(f"/api/v1/folders/{folder_id}/sets", json={"name": name}, headers=headers)
+        response.raise_for_status()
+
+    response = await client.get(f"/api/v1/folders/{folder_id}/sets", params={"search": word}, headers=headers)
+
+    assert [card_set["name"] for card_set in response.json()] == [word, f"{word} verbs"]
@@ -0,0 +1,39 @@
+"""Пул хеширования паролей: лимит одновременных задач и 429 при переполнении."""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cancelled_request_keeps_its_slot_until_the_thread_finishes(monkeypatch):
+    from app.core import security
+
+    monkeypatch.setattr(security, "_password_jobs_limit", 1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hash"
+
+    request = asyncio.create_task(security._run_password_job(slow_hash))
+    assert await asyncio.to_thread(started.wait, 5)
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+    # Запрос отменен, но поток еще считает хеш: место в пуле занято
+    with pytest.raises(HTTPException) as error:
+        await security._run_password_job(lambda: "other")
+    assert error.value.status_code == 429
+
+    release.set()
+    for _ in range(100):
+        if security._password_jobs_in_flight == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert await security._run_password_job(lambda: "other") == "other"
+    assert security._password_jobs_in_flight == 0
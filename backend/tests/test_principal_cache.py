@@ -0,0 +1,92 @@
+"""Кеш Principal в get_current_user: TTL, вытеснение LRU и сброс при деактивации пользователя."""
+import time
+
+import pytest
+from jose import jwt
+from sqlalchemy import update
+
+from conftest import register
+
+pytestmark = pytest.mark.anyio
+
+
+def user_id(headers: dict) -> int:
+    return jwt.get_unverified_claims(headers["Authorization"].split()[1])["uid"]
+
+
+async def authenticated(client, headers) -> int:
+    return (await client.get("/api/v1/folders/", headers=headers)).status_code
+
+
+async def test_orm_deactivation_takes_effect_on_next_request(client):
+    from app.core.principal_cache import principal_cache
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import User
+
+    headers, other = await register(client), await register(client)
+    assert await authenticated(client, headers) == 200
+    assert principal_cache.get(user_id(headers)) is not None
+
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id(headers))
+        user.is_active = False
+        await db.commit()
+
+    assert principal_cache.get(user_id(headers)) is None
+    assert await authenticated(client, headers) == 401
+    assert await authenticated(client, other) == 200
+
+
+async def test_deactivation_bypassing_orm_is_seen_after_ttl(client):
+    from app.core.principal_cache import principal_cache
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import User
+
+    headers = await register(client)
+    assert await authenticated(client, headers) == 200
+
+    # UPDATE без ORM-объекта не вызывает слушатель: до истечения TTL действует закешированный Principal
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id(headers)).values(is_active=False))
+        await db.commit()
+    assert await authenticated(client, headers) == 200
+
+    # Делаем запись просроченной, как будто TTL уже истек
+    _, cached = principal_cache._entries[user_id(headers)]
+    principal_cache._entries[user_id(headers)] = (time.monotonic() - 1, cached)
+    assert await authenticated(client, headers) == 401
+
+
+def principal(user_id: int):
+    from app.core.principal_cache import Principal
+
+    return Principal(id=user_id, email=f"{user_id}@example.com", is_active=True)
+
+
+async def test_lru_eviction_and_ttl(monkeypatch):
+    from app.core import principal_cache as module
+
+    cache = module.PrincipalCache(ttl_seconds=10, max_size=2)
+    now = 1000.0
+    monkeypatch.setattr(module.time, "monotonic", lambda: now)
+
+    cache.put(principal(1))
+    cache.put(principal(2))
+    assert cache.get(1) == principal(1)  # 1 становится самой свежей
+    cache.put(principal(3))
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == (principal(1), principal(3))
+
+    now += 11
+    assert cache.get(1) is None
+    assert len(cache._entries) == 1  # просроченная запись удаляется при чтении
+
+
+@pytest.mark.parametrize("ttl_seconds, max_size", [(0, 10), (10, 0)])
+async def test_disabled_cache_stores_nothing(ttl_seconds, max_size):
+    from app.core.principal_cache import PrincipalCache
+
+    cache = PrincipalCache(ttl_seconds=ttl_seconds, max_size=max_size)
+    cache.put(principal(1))
+
+    assert cache.get(1) is None
@@ -0,0 +1,50 @@
+"""
+Число SQL-выражений на горячих эндпоинтах. Рост числа - признак N+1 или лишней жадной загрузки
+(например, selectin карточек при проверке прав на набор). Меняя эти числа, объясните почему.
+"""
+import pytest
+
+from conftest import count_statements, create_set
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_autosave_card(client, headers):
+    card_set = await create_set(client, headers, cards=20)
+    card_id = (await client.get(f"/api/v1/sets/{card_set['id']}/cards", headers=headers)).json()[0]["id"]
+
+    with count_statements() as sql:
+        response = await client.put(f"/api/v1/cards/{card_id}", json={"term": "new", "definition": "text"}, headers=headers)
+
+    assert response.status_code == 200
+    # Проверка владельца одним JOIN, UPDATE ... RETURNING и новая версия набора
+    assert sql.count == 3, sql.statements
+
+
+async def test_list_cards_in_set(client, headers):
+    card_set = await create_set(client, headers, cards=20)
+
+    with count_statements() as sql:
+        response = await client.get(f"/api/v1/sets/{card_set['id']}/cards", params={"limit": 100}, headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+    # Строка набора для проверки прав и одна страница карточек
+    assert sql.count == 2, sql.statements
+
+
+async def test_meta_permission_check_does_not_load_cards_or_tags(client, headers):
+    from app.db.database import AsyncSessionLocal
+    from app.services import set_service
+
+    card_set = await create_set(client, headers, cards=20, tags=["one", "two"])
+
+    async with AsyncSessionLocal() as db:
+        with count_statements() as sql:
+            loaded = await set_service.get_set_by_id(
+                db, card_set["id"], user_id=card_set["owner_id"], load=set_service.SetLoad.META
+            )
+
+    assert loaded.id == card_set["id"]
+    assert sql.count == 1, sql.statements
+    assert "cards" not in sql.statements[0].split("FROM", 1)[1]
@@ -0,0 +1,98 @@
+"""Поиск по карточкам. В тестах база - SQLite: совпадения без ранжирования, порядок по id."""
+import uuid
+
+import pytest
+
+from conftest import create_set, register
+
+pytestmark = pytest.mark.anyio
+
+
+def unique_word() -> str:
+    # База общая для всех тестов: искомое слово не должно встречаться в карточках других тестов
+    return "w" + uuid.uuid4().hex[:10]
+
+
+async def add_cards(client, headers, set_id: int, terms: list[str]) -> list[int]:
+    ids = []
+    for term in terms:
+        response = await client.post(
+            f"/api/v1/sets/{set_id}/cards", json={"term": term, "definition": "text"}, headers=headers,
+        )
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def search(client, headers, q: str, **params):
+    return await client.get("/api/v1/search/cards", params={"q": q, **params}, headers=headers)
+
+
+async def test_paging_walks_every_hit_once(client, headers):
+    word = unique_word()
+    card_set = await create_set(client, headers)
+    expected = await add_cards(client, headers, card_set["id"], [f"{word} {i}" for i in range(7)])
+    await add_cards(client, headers, card_set["id"], ["unrelated"])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = await search(client, headers, word, **params)
+        assert response.status_code == 200
+        seen += [hit["id"] for hit in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == sorted(expected)
+    assert pages == 3
+
+
+async def test_candidates_are_cut_in_rank_order(client, headers, monkeypatch):
+    from app.services import search_service
+
+    monkeypatch.setattr(search_service, "SEARCH_CANDIDATES", 4)
+    word = unique_word()
+    card_set = await create_set(client, headers)
+    ids = await add_cards(client, headers, card_set["id"], [f"{word} {i}" for i in range(6)])
+
+    first = await search(client, headers, word, limit=3)
+    second = await search(client, headers, word, limit=3, cursor=first.headers["X-Next-Cursor"])
+
+    # Равный rank: кандидаты - первые по id, вторая страница обрезана границей кандидатов
+    assert [hit["id"] for hit in first.json() + second.json()] == sorted(ids)[:4]
+    assert "X-Next-Cursor" not in second.headers
+
+
+async def test_only_own_and_public_sets_are_searched(client, headers):
+    word = unique_word()
+    own = await create_set(client, headers)
+    own_ids = await add_cards(client, headers, own["id"], [f"{word} own"])
+    other = await register(client)
+    public = await create_set(client, other, is_public=True)
+    public_ids = await add_cards(client, other, public["id"], [f"{word} public"])
+    private = await create_set(client, other)
+    await add_cards(client, other, private["id"], [f"{word} private"])
+
+    hits = (await search(client, headers, word)).json()
+
+    assert sorted(hit["id"] for hit in hits) == sorted(own_ids + public_ids)
+
+
+async def test_every_word_must_match_as_prefix_and_is_highlighted(client, headers):
+    word = unique_word()
+    card_set = await create_set(client, headers)
+    (both,) = await add_cards(client, headers, card_set["id"], [f"{word}ing <b>river</b>"])
+    await add_cards(client, headers, card_set["id"], [f"{word} mountain"])
+
+    hits = (await search(client, headers, f"{word} riv")).json()
+
+    assert [hit["id"] for hit in hits] == [both]
+    assert hits[0]["term_highlight"] == f"<mark>{word}ing</mark> &lt;b&gt;<mark>river</mark>&lt;/b&gt;"
+
+
+async def test_query_without_long_words_is_rejected(client, headers):
+    response = await search(client, headers, "a an")
+
+    assert response.status_code == 422
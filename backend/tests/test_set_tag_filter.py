@@ -0,0 +1,49 @@
+"""Фильтр наборов по нескольким тегам не размножает строки и не искажает card_count."""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+# Набор -> (теги, число карточек)
+SETS = {"both": (["a", "b"], 3), "only-a": (["a"], 2), "other": (["c"], 1)}
+
+
+@pytest.fixture
+async def folder_id(client, headers) -> int:
+    folder = (await client.post("/api/v1/folders/", json={"name": "tagged"}, headers=headers)).json()
+    for name, (tags, cards) in SETS.items():
+        response = await client.post(
+            f"/api/v1/folders/{folder['id']}/sets", json={"name": name, "tags": tags}, headers=headers,
+        )
+        response.raise_for_status()
+        set_id = response.json()["id"]
+        for i in range(cards):
+            response = await client.post(
+                f"/api/v1/sets/{set_id}/cards", json={"term": f"term {i}", "definition": "text"}, headers=headers,
+            )
+            response.raise_for_status()
+    return folder["id"]
+
+
+@pytest.mark.parametrize("tag_match, expected", [
+    ("any", {"both": 3, "only-a": 2}),
+    ("all", {"both": 3}),
+])
+async def test_card_count_with_several_tags(client, headers, folder_id, tag_match, expected):
+    response = await client.get(
+        f"/api/v1/folders/{folder_id}/sets", params={"tags": ["a", "b"], "tag_match": tag_match}, headers=headers,
+    )
+
+    assert response.status_code == 200
+    sets = response.json()
+    # Набор с обоими тегами попадает в выдачу один раз, а не по строке на каждый совпавший тег
+    assert sorted(card_set["name"] for card_set in sets) == sorted(expected)
+    assert {card_set["name"]: card_set["card_count"] for card_set in sets} == expected
+
+
+async def test_all_mode_with_unknown_tag_returns_nothing(client, headers, folder_id):
+    response = await client.get(
+        f"/api/v1/folders/{folder_id}/sets", params={"tags": ["a", "missing"], "tag_match": "all"}, headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,54 @@
+"""Очередь повторения и запись ответов."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import create_set, register
+
+pytestmark = pytest.mark.anyio
+
+
+async def first_card_id(client, headers, set_id: int) -> int:
+    return (await client.get(f"/api/v1/sets/{set_id}/cards", headers=headers)).json()[0]["id"]
+
+
+async def test_naive_reviewed_at_is_treated_as_utc(client, headers):
+    card_set = await create_set(client, headers, cards=1)
+    card_id = await first_card_id(client, headers, card_set["id"])
+    reviewed_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=3)
+
+    response = await client.post(
+        "/api/v1/study/answers",
+        json={"answers": [{"card_id": card_id, "quality": 4, "reviewed_at": reviewed_at.isoformat()}]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    (result,) = response.json()["results"]
+    assert result["ok"]
+    due_at = datetime.fromisoformat(result["due_at"])
+    assert due_at == (reviewed_at + timedelta(days=1)).replace(tzinfo=timezone.utc)
+
+
+async def test_due_queue_hides_cards_of_set_made_private(client, headers):
+    card_set = await create_set(client, headers, cards=1, is_public=True)
+    card_id = await first_card_id(client, headers, card_set["id"])
+    student = await register(client)
+    reviewed_at = datetime.now(timezone.utc) - timedelta(days=3)
+    response = await client.post(
+        "/api/v1/study/answers",
+        json={"answers": [{"card_id": card_id, "quality": 4, "reviewed_at": reviewed_at.isoformat()}]},
+        headers=student,
+    )
+    assert response.json()["results"][0]["ok"]
+
+    due = (await client.get("/api/v1/study/due", params={"new_limit": 0}, headers=student)).json()
+    assert [card["id"] for card in due] == [card_id]
+
+    response = await client.put(
+        f"/api/v1/sets/{card_set['id']}", json={"name": card_set["name"], "is_public": False}, headers=headers,
+    )
+    assert response.status_code == 200
+
+    due = (await client.get("/api/v1/study/due", params={"new_limit": 0}, headers=student)).json()
+    assert due == []
@@ -1,6 +1,6 @@
 import api from './api';
 import type {CardRead} from '../types/card'; // Мы создадим этот тип
-import type {CardPayload, GetCardsParams, ReorderPayload} from "../types/api.ts";
+import type {CardBatchOperation, CardBatchResult, CardPayload, GetCardsParams, MovePayload, ReorderPayload} from "../types/api.ts";
 
 // Используем новые, более простые и правильные эндпоинты
 export const getCardsBySet = async (setId: number, params: GetCardsParams): Promise<CardRead[]> => {
@@ -26,10 +26,22 @@ export const reorderCards = async (setId: number, payload: ReorderPayload): Prom
   await api.post(`/sets/${setId}/reorder`, payload);
 };
 
+// Переносит одну карточку между соседями; сервер обычно меняет только одну строку
+export const moveCard = async (setId: number, cardId: number, payload: MovePayload): Promise<CardRead> => {
+  const response = await api.post(`/sets/${setId}/cards/${cardId}/move`, payload);
+  return response.data;
+};
+
 export const deleteAllCards = async (setId: number): Promise<void> => {
   await api.delete(`/sets/${setId}/cards`);
 };
 
+// Отправляет несколько изменений карточек одним запросом и одной транзакцией
+export const batchCards = async (setId: number, operations: CardBatchOperation[]): Promise<CardBatchResult[]> => {
+  const response = await api.post(`/sets/${setId}/cards:batch`, { operations });
+  return response.data.results;
+};
+
 // // --- Типы ---
 // interface GetCardsParams { skip?: number; limit?: number; }
 // interface CardPayload {
@@ -1,6 +1,7 @@
 // import axios from 'axios';
 import api from './api'; // <-- Импортируем наш центральный экземпляр
 import { type FolderRead } from '../types/folder';
+import { type Page } from '../types/api.ts';
 
 // const API_URL = 'http://localhost:8000/api/v1';
 // const api = axios.create({ baseURL: API_URL });
@@ -17,13 +18,13 @@ import { type FolderRead } from '../types/folder';
 // });
 
 // --- Типы для параметров ---
-interface GetFoldersParams { skip?: number; limit?: number; search?: string; }
+interface GetFoldersParams { skip?: number; limit?: number; search?: string; cursor?: string; }
 interface FolderPayload { name: string; is_public: boolean; }
 
 // --- Функции API ---
-export const getFolders = async (params: GetFoldersParams): Promise<FolderRead[]> => {
+export const getFolders = async (params: GetFoldersParams): Promise<Page<FolderRead>> => {
   const response = await api.get('/folders/', { params });
-  return response.data;
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
 };
 
 export const createFolder = async (payload: FolderPayload): Promise<FolderRead> => {
@@ -38,4 +39,9 @@ export const updateFolder = async (id: number, payload: FolderPayload): Promise<
 
 export const deleteFolder = async (id: number): Promise<void> => {
   await api.delete(`/folders/${id}`);
-};
\ No newline at end of file
+};
+// Выгрузка всех наборов папки одним файлом (csv, jsonl или колода Anki)
+export const exportFolder = async (id: number, format: 'csv' | 'jsonl' | 'apkg' = 'csv'): Promise<Blob> => {
+  const response = await api.get(`/folders/${id}/export`, { params: { format }, responseType: 'blob' });
+  return response.data;
+};
@@ -0,0 +1,24 @@
+import api from './api';
+import { type JobRead } from '../types/job';
+
+// --- Функции API ---
+export const getJob = async (id: number): Promise<JobRead> => {
+  const response = await api.get(`/jobs/${id}`);
+  return response.data;
+};
+
+// Опрашивает задачу, пока она не завершится; onProgress получает каждое промежуточное состояние
+export const waitForJob = async (
+  id: number,
+  onProgress?: (job: JobRead) => void,
+  intervalMs = 1000,
+): Promise<JobRead> => {
+  for (;;) {
+    const job = await getJob(id);
+    onProgress?.(job);
+    if (job.status === 'succeeded' || job.status === 'failed') {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
@@ -1,6 +1,7 @@
 import api from './api'; // <-- Импортируем наш центральный экземпляр
 import { type CardSetRead } from '../types/set';
-import { type SetPayload } from "../types/api.ts";
+import { type Page, type SetPayload } from "../types/api.ts";
+import { waitForJob } from './jobApi';
 
 // --- Типы для параметров ---
 interface GetSetsParams {
@@ -8,6 +9,8 @@ interface GetSetsParams {
     limit?: number; // Ограничить количество возвращаемых записей
     search?: string; // Поиск по названию или содержимому
     tags?: string[]; // Фильтрация по тегам
+    tag_match?: 'any' | 'all'; // Хотя бы один из тегов или все сразу
+    cursor?: string; // Курсор следующей страницы из предыдущего ответа
 }
 
 // --- Функции API ---
@@ -17,9 +20,9 @@ export const getSetById = async (setId: number): Promise<CardSetRead> => {
   return response.data;
 };
 
-export const getSetsByFolder = async (folderId: number, params: GetSetsParams): Promise<CardSetRead[]> => {
+export const getSetsByFolder = async (folderId: number, params: GetSetsParams): Promise<Page<CardSetRead>> => {
   const response = await api.get(`/folders/${folderId}/sets`, { params });
-  return response.data;
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
 };
 
 export const createSet = async (folderId: number, payload: SetPayload): Promise<CardSetRead> => {
@@ -32,6 +35,35 @@ export const updateSet = async (id: number, payload: SetPayload): Promise<CardSe
     return response.data;
 };
 
+// Копирует свой или публичный набор в свою папку. Большой набор копируется фоновой задачей (202):
+// ждем ее и загружаем готовую копию
+export const cloneSet = async (id: number, folderId: number, name?: string): Promise<CardSetRead> => {
+  const response = await api.post(`/sets/${id}/clone`, { folder_id: folderId, name });
+  if (response.status !== 202) {
+    return response.data;
+  }
+  const job = await waitForJob(response.data.id);
+  if (job.status === 'failed') {
+    throw new Error(job.error ?? 'Set cloning failed');
+  }
+  const { set_id } = job.result as { set_id: number };
+  return (await api.get(`/sets/${set_id}`)).data;
+};
+
+// Большой набор удаляется фоновой задачей: сервер отвечает 202, и мы ждем ее завершения
 export const deleteSet = async (id: number): Promise<void> => {
-  await api.delete(`/sets/${id}`);
-};
\ No newline at end of file
+  const response = await api.delete(`/sets/${id}`);
+  if (response.status === 202) {
+    const job = await waitForJob(response.data.id);
+    if (job.status === 'failed') {
+      throw new Error(job.error ?? 'Set deletion failed');
+    }
+  }
+};
+export type ExportFormat = 'csv' | 'jsonl' | 'apkg';
+
+// Выгрузка карточек набора файлом (csv, jsonl или колода Anki)
+export const exportSet = async (id: number, format: ExportFormat = 'csv'): Promise<Blob> => {
+  const response = await api.get(`/sets/${id}/export`, { params: { format }, responseType: 'blob' });
+  return response.data;
+};
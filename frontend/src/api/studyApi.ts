@@ -0,0 +1,14 @@
+import api from './api';
+import { type StudyAnswer, type StudyAnswerResult, type StudyCard } from '../types/study';
+
+// --- Функции API ---
+export const getDueCards = async (limit = 20, newLimit = 10, setId?: number): Promise<StudyCard[]> => {
+  const response = await api.get('/study/due', { params: { limit, new_limit: newLimit, set_id: setId } });
+  return response.data;
+};
+
+// Ответы отправляются пакетом в конце сессии (или порциями) - одна транзакция на сервере
+export const submitAnswers = async (answers: StudyAnswer[]): Promise<StudyAnswerResult[]> => {
+  const response = await api.post('/study/answers', { answers });
+  return response.data.results;
+};
@@ -0,0 +1,8 @@
+import api from './api';
+import { type TagSuggestion } from '../types/tag';
+
+// --- Функции API ---
+export const suggestTags = async (prefix: string, limit = 10): Promise<TagSuggestion[]> => {
+  const response = await api.get('/tags/', { params: { prefix, limit } });
+  return response.data;
+};
@@ -7,12 +7,12 @@ import EditableCard from './EditableCard';
 interface CardListProps {
   cards: CardRead[];
   setCards: React.Dispatch<React.SetStateAction<CardRead[]>>;
-  onReorder: (reorderedCards: CardRead[]) => void;
+  onMove: (cardId: number, afterId: number | null, beforeId: number | null) => void;
   onUpdateCard: (cardId: number, data: any) => void;
   onDeleteCard: (cardId: number) => void;
 }
 
-const CardList: React.FC<CardListProps> = ({ cards, setCards, onReorder, onUpdateCard, onDeleteCard }) => {
+const CardList: React.FC<CardListProps> = ({ cards, setCards, onMove, onUpdateCard, onDeleteCard }) => {
   // Настройка сенсоров для dnd-kit (для мыши и клавиатуры)
   const sensors = useSensors(
     useSensor(PointerSensor),
@@ -29,8 +29,8 @@ const CardList: React.FC<CardListProps> = ({ cards, setCards, onReorder, onUpdat
 
       // 1. Оптимистично обновляем UI
       setCards(reorderedCards);
-      // 2. Вызываем функцию для отправки нового порядка на сервер
-      onReorder(reorderedCards);
+      // 2. Отправляем на сервер только перенос одной карточки между ее новыми соседями
+      onMove(active.id, reorderedCards[newIndex - 1]?.id ?? null, reorderedCards[newIndex + 1]?.id ?? null);
     }
   }
 
@@ -119,12 +119,12 @@ const FlashcardEditorPage = () => {
         }
     };
 
-    const handleReorderCards = useCallback(async (reorderedCards: CardRead[]) => {
+    const handleMoveCard = useCallback(async (cardId: number, afterId: number | null, beforeId: number | null) => {
         if (!setId) return;
         setSaveStatus('saving');
         try {
-            const cardIds = reorderedCards.map(c => c.id);
-            await cardApi.reorderCards(Number(setId), { card_ids: cardIds });
+            const movedCard = await cardApi.moveCard(Number(setId), cardId, { after_id: afterId, before_id: beforeId });
+            setCards(prev => prev.map(c => c.id === movedCard.id ? movedCard : c));
             setSaveStatus('saved');
         } catch (error) {
             console.error("Failed to reorder cards:", error);
@@ -155,7 +155,7 @@ const FlashcardEditorPage = () => {
                         <CardList
                             cards={cards}
                             setCards={setCards}
-                            onReorder={handleReorderCards}
+                            onMove={handleMoveCard}
                             onUpdateCard={handleUpdateCard}
                             onDeleteCard={handleDeleteCard}
                         />
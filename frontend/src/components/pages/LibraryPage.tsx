@@ -24,6 +24,8 @@ const LibraryPage = () => {
     const [loadingSets, setLoadingSets] = useState(false);
     const [hasMoreFolders, setHasMoreFolders] = useState(true);
     const [hasMoreSets, setHasMoreSets] = useState(true);
+    const [foldersCursor, setFoldersCursor] = useState<string | null>(null);
+    const [setsCursor, setSetsCursor] = useState<string | null>(null);
     const [searchQuery, setSearchQuery] = useState('');
     const debouncedSearch = useDebounce(searchQuery, 500);
     const [selectedFolderId, setSelectedFolderId] = useState<number | null>(null);
@@ -36,26 +38,28 @@ const LibraryPage = () => {
     const fetchFolders = useCallback(async (isSearch: boolean) => {
         if (!isSearch && loadingFolders) return;
         setLoadingFolders(true);
-        const skip = isSearch ? 0 : folders.length;
+        const cursor = isSearch ? undefined : foldersCursor ?? undefined;
         try {
-            const newFolders = await folderApi.getFolders({ search: debouncedSearch, skip, limit: PAGE_SIZE });
-            setFolders(prev => isSearch ? newFolders : [...prev, ...newFolders]);
-            setHasMoreFolders(newFolders.length === PAGE_SIZE);
+            const page = await folderApi.getFolders({ search: debouncedSearch, cursor, limit: PAGE_SIZE });
+            setFolders(prev => isSearch ? page.items : [...prev, ...page.items]);
+            setFoldersCursor(page.nextCursor);
+            setHasMoreFolders(page.nextCursor !== null);
         } catch (error) { console.error("Failed to fetch folders:", error); }
         finally { setLoadingFolders(false); }
-    }, [debouncedSearch, folders.length, loadingFolders]);
+    }, [debouncedSearch, foldersCursor, loadingFolders]);
 
     const fetchSets = useCallback(async (isNewSelection: boolean) => {
         if (!selectedFolderId || (!isNewSelection && loadingSets)) return;
         setLoadingSets(true);
-        const skip = isNewSelection ? 0 : sets.length;
+        const cursor = isNewSelection ? undefined : setsCursor ?? undefined;
         try {
-            const newSets = await setApi.getSetsByFolder(selectedFolderId, { search: debouncedSearch, skip, limit: PAGE_SIZE });
-            setSets(prev => isNewSelection ? newSets : [...prev, ...newSets]);
-            setHasMoreSets(newSets.length === PAGE_SIZE);
+            const page = await setApi.getSetsByFolder(selectedFolderId, { search: debouncedSearch, cursor, limit: PAGE_SIZE });
+            setSets(prev => isNewSelection ? page.items : [...prev, ...page.items]);
+            setSetsCursor(page.nextCursor);
+            setHasMoreSets(page.nextCursor !== null);
         } catch (error) { console.error("Failed to fetch sets:", error); }
         finally { setLoadingSets(false); }
-    }, [selectedFolderId, debouncedSearch, sets.length, loadingSets]);
+    }, [selectedFolderId, debouncedSearch, setsCursor, loadingSets]);
 
     useEffect(() => { fetchFolders(true); }, [debouncedSearch]);
     useEffect(() => { if (selectedFolderId) fetchSets(true); else setSets([]); }, [selectedFolderId, debouncedSearch]);
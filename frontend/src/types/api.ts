@@ -10,6 +10,26 @@ export interface ReorderPayload {
   card_ids: number[];
 }
 
+export interface MovePayload {
+  after_id: number | null;
+  before_id: number | null;
+}
+
+// --- Batch card operations (POST /sets/{setId}/cards:batch) ---
+export type CardBatchOperation =
+  | ({ op: 'create' } & CardPayload)
+  | ({ op: 'update'; id: number } & CardPayload)
+  | { op: 'delete'; id: number }
+  | { op: 'move'; id: number; order: number };
+
+export interface CardBatchResult {
+  index: number;
+  op: CardBatchOperation['op'];
+  ok: boolean;
+  id: number | null;
+  error: string | null;
+}
+
 // --- Payloads for Set operations ---
 export interface SetPayload {
   name: string;
@@ -22,4 +42,12 @@ export interface SetPayload {
 export interface GetCardsParams {
   skip?: number;
   limit?: number;
+  cursor?: string;
+}
+
+// --- Cursor-paginated responses ---
+// Сервер отдает курсор следующей страницы в заголовке X-Next-Cursor
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
 }
\ No newline at end of file
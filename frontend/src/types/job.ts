@@ -0,0 +1,15 @@
+// frontend/src/types/job.ts
+export type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed';
+
+export interface JobRead {
+  id: number;
+  kind: string;
+  status: JobStatus;
+  progress: number;
+  total?: number | null;
+  result?: unknown;
+  error?: string | null;
+  created_at?: string | null;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
@@ -0,0 +1,29 @@
+// frontend/src/types/study.ts
+export interface StudyCard {
+  id: number;
+  set_id: number;
+  term: string;
+  definition: string;
+  example?: string | null;
+  translation?: string | null;
+  is_new: boolean;
+  due_at?: string | null;
+  interval_days: number;
+  ease_factor?: number | null;
+  repetitions: number;
+}
+
+// Оценка ответа по шкале SM-2: 0-2 - не вспомнил, 3 - с трудом, 4 - хорошо, 5 - легко
+export interface StudyAnswer {
+  card_id: number;
+  quality: number;
+  reviewed_at?: string;
+}
+
+export interface StudyAnswerResult {
+  card_id: number;
+  ok: boolean;
+  due_at?: string | null;
+  interval_days?: number | null;
+  error?: string | null;
+}
@@ -2,4 +2,7 @@
 export interface TagRead {
   id: number;
   name: string;
-}
\ No newline at end of file
+}
+export interface TagSuggestion extends TagRead {
+  usage_count: number;
+}